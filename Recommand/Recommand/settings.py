@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'Recommand.sql_instrumentation.SQLInstrumentationMiddleware',  # SQL counters (SQL_INSTRUMENTATION)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
@@ -112,6 +113,94 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Use a shared backend (e.g. Redis or Memcached) when running several workers,
+# otherwise each process keeps its own recommendation cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'recommand'),
+    }
+}
+
+# Seconds a user's ranked recommendation list stays cached
+RECOMMENDATION_CACHE_TIMEOUT = int(os.getenv('RECOMMENDATION_CACHE_TIMEOUT', '600'))
+
+# Prebuilt ingredient search index (python manage.py build_recipe_index).
+# Workers load it on first use instead of vectorizing every recipe themselves.
+RECIPE_INDEX_PATH = os.getenv('RECIPE_INDEX_PATH', os.path.join(BASE_DIR, 'recipe_index.joblib'))
+
+# Indexes with at least ANN_MIN_RECIPES recipes also get an IVF approximate index:
+# ANN_LISTS clusters (0 = sqrt(N)), of which ANN_PROBES are scanned per query.
+# More probes raise recall and latency (see ann_benchmark.py).
+RECIPE_INDEX_ANN_MIN_RECIPES = int(os.getenv('RECIPE_INDEX_ANN_MIN_RECIPES', '50000'))
+RECIPE_INDEX_ANN_LISTS = int(os.getenv('RECIPE_INDEX_ANN_LISTS', '0'))
+RECIPE_INDEX_ANN_PROBES = int(os.getenv('RECIPE_INDEX_ANN_PROBES', '8'))
+
+# Recipe edits patch the loaded index and their RecipeSimilarity rows after
+# UPDATE_DELAY_MS; every COMPACT_INTERVAL seconds (0 = never) an index with pending
+# edits is rebuilt from scratch to refresh IDF weights. With BACKGROUND off, an
+# already loaded index is patched from the request thread. Edits are published in
+# the cache with a version number; every SYNC_INTERVAL_MS each worker that loaded the
+# index applies the versions it has not seen (share the cache between workers).
+RECIPE_INDEX_BACKGROUND = os.getenv('RECIPE_INDEX_BACKGROUND', 'True') == 'True'
+RECIPE_INDEX_UPDATE_DELAY_MS = int(os.getenv('RECIPE_INDEX_UPDATE_DELAY_MS', '500'))
+RECIPE_INDEX_SYNC_INTERVAL_MS = int(os.getenv('RECIPE_INDEX_SYNC_INTERVAL_MS', '5000'))
+RECIPE_INDEX_COMPACT_INTERVAL = int(os.getenv('RECIPE_INDEX_COMPACT_INTERVAL', '3600'))
+
+# Ingredient vocabulary and its compiled Aho-Corasick automaton
+# (python manage.py build_ingredient_automaton)
+INGREDIENT_VOCABULARY_PATH = os.getenv('INGREDIENT_VOCABULARY_PATH', os.path.join(BASE_DIR.parent, 'ingredients.txt'))
+INGREDIENT_AUTOMATON_PATH = os.getenv('INGREDIENT_AUTOMATON_PATH', os.path.join(BASE_DIR, 'ingredient_automaton.npz'))
+
+# Item-item collaborative filtering model (python manage.py train_item_cf).
+# Recommendations skip the collaborative stage while the file does not exist.
+ITEM_CF_MODEL_PATH = os.getenv('ITEM_CF_MODEL_PATH', os.path.join(BASE_DIR, 'item_cf_model.npz'))
+
+# Recommendation history is queued in-process and written by a background thread
+# with bulk_create every BATCH_SIZE records or FLUSH_INTERVAL_MS milliseconds.
+# Records beyond MAX_BUFFER are dropped (and counted) instead of blocking requests.
+# With BACKGROUND off, records are written from the request thread once a batch fills up.
+RECOMMENDATION_HISTORY_BACKGROUND = os.getenv('RECOMMENDATION_HISTORY_BACKGROUND', 'True') == 'True'
+RECOMMENDATION_HISTORY_BATCH_SIZE = int(os.getenv('RECOMMENDATION_HISTORY_BATCH_SIZE', '200'))
+RECOMMENDATION_HISTORY_FLUSH_INTERVAL_MS = int(os.getenv('RECOMMENDATION_HISTORY_FLUSH_INTERVAL_MS', '1000'))
+RECOMMENDATION_HISTORY_MAX_BUFFER = int(os.getenv('RECOMMENDATION_HISTORY_MAX_BUFFER', '10000'))
+
+# Article detail views are buffered per process and added to views_count by a
+# background thread every FLUSH_INTERVAL_MS milliseconds (one UPDATE per distinct count).
+# A buffer holding MAX_PENDING views is flushed from the request thread, which bounds
+# the views lost if a process dies. A failed flush keeps its views for the next one.
+# With BACKGROUND off, only that bound triggers a flush.
+ARTICLE_VIEW_COUNT_BACKGROUND = os.getenv('ARTICLE_VIEW_COUNT_BACKGROUND', 'True') == 'True'
+ARTICLE_VIEW_COUNT_FLUSH_INTERVAL_MS = int(os.getenv('ARTICLE_VIEW_COUNT_FLUSH_INTERVAL_MS', '5000'))
+ARTICLE_VIEW_COUNT_MAX_PENDING = int(os.getenv('ARTICLE_VIEW_COUNT_MAX_PENDING', '1000'))
+
+# Per-request SQL counters: query count, DB time and repeated query shapes are added
+# as X-DB-* response headers and logged as JSON on the Recommand.sql logger.
+# Views over their query_budget log a warning, or fail the request when STRICT is on (tests).
+# With LOG off only the over-budget warnings are logged.
+SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', 'False') == 'True'
+SQL_INSTRUMENTATION_LOG = os.getenv('SQL_INSTRUMENTATION_LOG', 'True') == 'True'
+SQL_QUERY_BUDGET_STRICT = os.getenv('SQL_QUERY_BUDGET_STRICT', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'Recommand.sql': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
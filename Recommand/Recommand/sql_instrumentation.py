@@ -0,0 +1,214 @@
+"""
+Per-request SQL instrumentation and query budgets.
+
+SQLInstrumentationMiddleware wraps every database cursor used while a request
+is handled and records the number of queries, the time spent in the database
+and how often each query shape (fingerprint) was repeated. Repeated
+fingerprints are the usual sign of an N+1 pattern in a serializer or a loop.
+
+The numbers are added to the response as headers and logged as one JSON line
+on the ``Recommand.sql`` logger:
+
+    X-DB-Queries: 12
+    X-DB-Time-Ms: 3.481
+    X-DB-Duplicate-Queries: 9
+    X-DB-Query-Budget: 8
+
+Views declare how many queries they may run with a ``query_budget`` attribute
+(an int, or a dict keyed by viewset action / lowercase HTTP method), or with
+the @query_budget decorator on function views. Only queries run after URL
+resolution count against the budget; session logins add two of them
+(the session and the user lookup). Going over budget logs a warning (even with
+SQL_INSTRUMENTATION_LOG off), or raises
+QueryBudgetExceeded when SQL_QUERY_BUDGET_STRICT is on, which is what
+@enforce_query_budgets does for tests.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('Recommand.sql')
+
+# Duplicate fingerprints included in the log line
+MAX_LOGGED_DUPLICATES = 5
+MAX_LOGGED_SQL_LENGTH = 300
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a view runs more queries than its budget."""
+
+
+def normalize_sql(sql):
+    """SQL with literals and IN lists replaced, so queries differing only by values compare equal."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """
+    Execute wrapper (see connection.execute_wrapper) that records each query.
+
+    Attributes:
+        count: number of queries executed
+        duration: seconds spent executing them
+        fingerprints: Counter of query fingerprints
+        view_offset: number of queries recorded before the view was resolved
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.samples = {}
+        self.view_offset = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            key = fingerprint(sql)
+            self.fingerprints[key] += 1
+            self.samples.setdefault(key, sql)
+
+    def mark_view_start(self):
+        self.view_offset = self.count
+
+    @property
+    def view_count(self):
+        return self.count - self.view_offset
+
+    def duplicates(self):
+        """[(fingerprint, count, sample sql)] for fingerprints executed more than once, most repeated first."""
+        return [
+            (key, count, self.samples[key])
+            for key, count in self.fingerprints.most_common()
+            if count > 1
+        ]
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.fingerprints.values())
+
+
+def query_budget(budget):
+    """Declare the query budget of a function view (an int or a dict keyed by lowercase HTTP method)."""
+    def decorator(view_func):
+        view_func.query_budget = budget
+        return view_func
+    return decorator
+
+
+def view_query_budget(view_func, method):
+    """
+    Query budget declared for a resolved view, or None.
+
+    DRF class-based views expose the view class as ``view_func.cls`` and, for
+    viewsets, the method -> action mapping as ``view_func.actions``.
+    """
+    view_class = getattr(view_func, 'cls', None)
+    budget = getattr(view_class, 'query_budget', None) if view_class else getattr(view_func, 'query_budget', None)
+    if isinstance(budget, dict):
+        method = method.lower()
+        action = getattr(view_func, 'actions', {}).get(method, method)
+        return budget.get(action)
+    return budget
+
+
+def view_name(view_func):
+    view_class = getattr(view_func, 'cls', None)
+    target = view_class or view_func
+    return f'{target.__module__}.{target.__qualname__}'
+
+
+class SQLInstrumentationMiddleware:
+    """Record SQL statistics per request (enabled by SQL_INSTRUMENTATION)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.sql_recorder = recorder
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        budget = getattr(request, 'query_budget', None)
+        over_budget = budget is not None and recorder.view_count > budget
+
+        response['X-DB-Queries'] = str(recorder.count)
+        response['X-DB-Time-Ms'] = f'{recorder.duration * 1000:.3f}'
+        response['X-DB-Duplicate-Queries'] = str(recorder.duplicate_count)
+        if budget is not None:
+            response['X-DB-Query-Budget'] = str(budget)
+
+        if over_budget or getattr(settings, 'SQL_INSTRUMENTATION_LOG', True):
+            self.log(request, response, recorder, budget, over_budget)
+
+        if over_budget and getattr(settings, 'SQL_QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path} ran {recorder.view_count} queries, '
+                f'budget is {budget}. Repeated queries:\n' + '\n'.join(
+                    f'  {count}x {sql[:MAX_LOGGED_SQL_LENGTH]}'
+                    for _, count, sql in recorder.duplicates()[:MAX_LOGGED_DUPLICATES]
+                )
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.sql_recorder.mark_view_start()
+        request.sql_view_name = view_name(view_func)
+        request.query_budget = view_query_budget(view_func, request.method)
+
+    def log(self, request, response, recorder, budget, over_budget):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request, 'sql_view_name', None),
+            'status': response.status_code,
+            'queries': recorder.count,
+            'view_queries': recorder.view_count,
+            'db_ms': round(recorder.duration * 1000, 3),
+            'duplicate_queries': recorder.duplicate_count,
+            'budget': budget,
+            'duplicates': [
+                {'fingerprint': key, 'count': count, 'sql': sql[:MAX_LOGGED_SQL_LENGTH]}
+                for key, count, sql in recorder.duplicates()[:MAX_LOGGED_DUPLICATES]
+            ],
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record, ensure_ascii=False))
+
+
+def enforce_query_budgets(test_item):
+    """Test class/method decorator: turn the middleware on and fail requests that go over budget."""
+    from django.test.utils import override_settings
+
+    return override_settings(
+        SQL_INSTRUMENTATION=True, SQL_QUERY_BUDGET_STRICT=True, SQL_INSTRUMENTATION_LOG=False,
+    )(test_item)
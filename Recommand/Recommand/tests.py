@@ -0,0 +1,71 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from articles.models import Article, Category, Comment
+from articles.views import CategoryViewSet, CommentViewSet
+from .sql_instrumentation import QueryBudgetExceeded, enforce_query_budgets, fingerprint, normalize_sql
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_values_and_in_lists_are_ignored(self):
+        self.assertEqual(
+            normalize_sql('SELECT *  FROM "t"\n WHERE "id" IN (%s, %s, %s) AND "name" = \'a\' LIMIT 21'),
+            'SELECT * FROM "t" WHERE "id" IN (...) AND "name" = ? LIMIT ?'
+        )
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s)'),
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s)')
+        )
+        self.assertNotEqual(fingerprint('SELECT 1 FROM "a"'), fingerprint('SELECT 1 FROM "b"'))
+
+
+class SQLInstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name='한식')
+        for name in ['alice', 'bob', 'carol']:
+            author = User.objects.create_user(name, password='pw')
+            article = Article.objects.create(title=name, content='...', author=author, category=category)
+            Comment.objects.create(article=article, author=author, content='맛있어요')
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('category-list'))
+        self.assertNotIn('X-DB-Queries', response)
+
+    @override_settings(SQL_INSTRUMENTATION=True)
+    def test_headers_and_log_report_repeated_queries(self):
+        # Without select_related each comment loads its author separately
+        with mock.patch.object(CommentViewSet, 'queryset', Comment.objects.all()):
+            with self.assertLogs('Recommand.sql', 'INFO') as logs:
+                response = self.client.get(reverse('comment-list'))
+
+        self.assertGreaterEqual(int(response['X-DB-Duplicate-Queries']), 2)
+        self.assertEqual(int(response['X-DB-Queries']), 2 + 3)
+        self.assertGreaterEqual(float(response['X-DB-Time-Ms']), 0)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'articles.views.CommentViewSet')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['duplicates'][0]['count'], 3)
+        self.assertIn('auth_user', record['duplicates'][0]['sql'])
+
+    @enforce_query_budgets
+    def test_strict_mode_fails_requests_over_budget(self):
+        response = self.client.get(reverse('category-list'))
+        self.assertEqual(response['X-DB-Query-Budget'], '2')
+
+        with mock.patch.object(CategoryViewSet, 'query_budget', {'list': 1}):
+            with self.assertLogs('Recommand.sql', 'WARNING'), self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('category-list'))
+
+    @override_settings(SQL_INSTRUMENTATION=True, SQL_INSTRUMENTATION_LOG=False)
+    def test_over_budget_is_logged_as_warning_when_not_strict(self):
+        with mock.patch.object(CategoryViewSet, 'query_budget', {'list': 1}):
+            with self.assertLogs('Recommand.sql', 'WARNING'):
+                response = self.client.get(reverse('category-list'))
+        self.assertEqual(response.status_code, 200)
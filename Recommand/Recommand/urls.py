@@ -10,7 +10,8 @@ from articles.views import (
 )
 from recommandationManager.views import (
     UserPreferenceViewSet, UserRecipeInteractionViewSet,
-    RecipeRecommendationView
+    RecipeRecommendationView, RecommendationInteractionView,
+    RecommendationCacheStatsView, IngredientRecommendationView
 )
 
 # Create a router and register our viewsets with it
@@ -34,4 +35,7 @@ urlpatterns = [
     path('api/auth/', include('loginManager.urls')),  # Include login manager URLs
     path('api-auth/', include('rest_framework.urls')),  # Include auth URLs for browsable API
     path('api/recommendations/', RecipeRecommendationView.as_view(), name='recipe-recommendations'),
+    path('api/recommendations/<uuid:recommendation_id>/interaction/', RecommendationInteractionView.as_view(), name='recommendation-interaction'),
+    path('api/recommendations/by-ingredients/', IngredientRecommendationView.as_view(), name='ingredient-recommendations'),
+    path('api/recommendations/cache-stats/', RecommendationCacheStatsView.as_view(), name='recommendation-cache-stats'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)  # Serve media files in development
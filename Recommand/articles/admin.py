@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Category, Tag, Article, Comment, Rating, Like, Dislike,
-    CookingTool, Ingredient, Recipe, RecipeStep, RecipeIngredient, CartItem
+    CookingTool, Ingredient, Recipe, RecipeStep, RecipeIngredient, Allergen, CartItem
 )
 
 @admin.register(Category)
@@ -71,9 +71,9 @@ class IngredientAdmin(admin.ModelAdmin):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'cooking_time', 'difficulty', 'serving_size')
-    list_filter = ('difficulty', 'created_at')
+    list_filter = ('difficulty', 'categories', 'created_at')
     search_fields = ('name', 'description', 'author__username')
-    filter_horizontal = ('tools',)
+    filter_horizontal = ('tools', 'categories')
     ordering = ('-created_at',)
 
 @admin.register(RecipeStep)
@@ -90,6 +90,13 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
     search_fields = ('recipe__name', 'ingredient__name')
     ordering = ('recipe', 'ingredient')
 
+@admin.register(Allergen)
+class AllergenAdmin(admin.ModelAdmin):
+    list_display = ('name', 'keywords')
+    search_fields = ('name', 'keywords')
+    exclude = ('ingredients', 'recipes')  # Maintained by articles.allergens
+    ordering = ('name',)
+
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ('user', 'ingredient', 'quantity', 'created_at')
@@ -0,0 +1,166 @@
+"""
+Precomputed allergen memberships for ingredients and recipes.
+
+Allergy filtering used to chain one `name__icontains` exclusion per allergy,
+each a join plus a leading-wildcard LIKE scan. Instead, every Allergen keeps
+the set of ingredients whose name contains one of its keywords and the set of
+recipes using any of those ingredients. The sets are updated whenever an
+allergen, ingredient or recipe ingredient is written (see articles.signals),
+so reading is a single lookup: `recipes.exclude(allergens__name__in=terms)`.
+
+The indexing functions take an optional app registry so they can run against
+historical models.
+"""
+
+from django.apps import apps as global_apps
+from django.db.models import Q
+
+# Allergens that must be labelled in Korea, with ingredient name fragments that contain them.
+# Users may list either the group ("난류") or any other term ("계란"); unknown terms get
+# their own allergen whose only keyword is the term itself.
+STANDARD_ALLERGENS = {
+    '난류': ['계란', '달걀', '메추리알'],
+    '우유': ['우유', '치즈', '버터', '생크림', '요거트', '요구르트', '연유'],
+    '메밀': ['메밀'],
+    '땅콩': ['땅콩'],
+    '대두': ['대두', '두부', '두유', '간장', '된장'],
+    '밀': ['밀가루', '부침가루', '튀김가루', '빵가루', '국수', '파스타', '라면'],
+    '고등어': ['고등어'],
+    '게': ['꽃게', '게살', '대게'],
+    '새우': ['새우'],
+    '돼지고기': ['돼지고기', '삼겹살', '목살', '베이컨', '햄', '소시지'],
+    '복숭아': ['복숭아'],
+    '토마토': ['토마토'],
+    '호두': ['호두'],
+    '닭고기': ['닭'],
+    '쇠고기': ['쇠고기', '소고기'],
+    '오징어': ['오징어'],
+    '조개류': ['조개', '굴', '전복', '홍합', '바지락', '가리비'],
+    '잣': ['잣'],
+}
+
+BATCH_SIZE = 1000
+
+
+def allergy_terms(text):
+    """Split a comma separated allergy list into distinct, stripped terms."""
+    return list(dict.fromkeys(term.strip() for term in text.split(',') if term.strip()))
+
+
+def allergen_keywords(allergen):
+    return [keyword.lower() for keyword in allergy_terms(allergen.keywords)] or [allergen.name.lower()]
+
+
+def _matching_allergen_ids(ingredient_name, allergens):
+    name = ingredient_name.lower()
+    return [
+        allergen.id for allergen in allergens
+        if any(keyword in name for keyword in allergen_keywords(allergen))
+    ]
+
+
+def refresh_recipe_allergens(recipe_ids, apps=global_apps):
+    """Recompute the allergen set of the given recipes from their ingredients."""
+    Allergen = apps.get_model('articles', 'Allergen')
+    RecipeIngredient = apps.get_model('articles', 'RecipeIngredient')
+    RecipeAllergen = Allergen.recipes.through
+
+    recipe_ids = list(set(recipe_ids))
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        chunk = recipe_ids[start:start + BATCH_SIZE]
+        pairs = RecipeIngredient.objects.filter(
+            recipe_id__in=chunk,
+            ingredient__allergens__isnull=False
+        ).values_list('recipe_id', 'ingredient__allergens').distinct()
+
+        RecipeAllergen.objects.filter(recipe_id__in=chunk).delete()
+        RecipeAllergen.objects.bulk_create([
+            RecipeAllergen(recipe_id=recipe_id, allergen_id=allergen_id)
+            for recipe_id, allergen_id in pairs
+        ], batch_size=BATCH_SIZE)
+
+
+def index_ingredient(ingredient, apps=global_apps):
+    """Resolve which allergens an ingredient contains and update the recipes using it."""
+    Allergen = apps.get_model('articles', 'Allergen')
+    RecipeIngredient = apps.get_model('articles', 'RecipeIngredient')
+
+    ingredient.allergens.set(_matching_allergen_ids(ingredient.name, Allergen.objects.all()))
+    refresh_recipe_allergens(
+        RecipeIngredient.objects.filter(ingredient=ingredient).values_list('recipe_id', flat=True),
+        apps
+    )
+
+
+def index_allergen(allergen, apps=global_apps):
+    """Resolve the ingredients and recipes containing an allergen."""
+    Ingredient = apps.get_model('articles', 'Ingredient')
+    RecipeIngredient = apps.get_model('articles', 'RecipeIngredient')
+
+    matches = Q()
+    for keyword in allergen_keywords(allergen):
+        matches |= Q(name__icontains=keyword)
+    ingredient_ids = list(Ingredient.objects.filter(matches).values_list('id', flat=True))
+
+    allergen.ingredients.set(ingredient_ids)
+    allergen.recipes.set(
+        RecipeIngredient.objects.filter(
+            ingredient_id__in=ingredient_ids
+        ).values_list('recipe_id', flat=True).distinct()
+    )
+
+
+def ensure_allergens(terms):
+    """Create an allergen for every term that does not have one yet (indexed on save)."""
+    from articles.models import Allergen
+
+    terms = list(dict.fromkeys(terms))
+    existing = set(Allergen.objects.filter(name__in=terms).values_list('name', flat=True))
+    for term in terms:
+        if term not in existing:
+            Allergen.objects.get_or_create(name=term)
+
+
+def rebuild_allergen_index(terms=(), apps=global_apps):
+    """
+    Recompute every allergen membership from scratch.
+
+    Creates the standard allergens and one allergen per given term if missing.
+
+    Returns:
+        (allergen count, ingredient membership count, recipe membership count)
+    """
+    Allergen = apps.get_model('articles', 'Allergen')
+    Ingredient = apps.get_model('articles', 'Ingredient')
+    RecipeIngredient = apps.get_model('articles', 'RecipeIngredient')
+    IngredientAllergen = Allergen.ingredients.through
+    RecipeAllergen = Allergen.recipes.through
+
+    existing = set(Allergen.objects.values_list('name', flat=True))
+    new_allergens = [
+        Allergen(name=name, keywords=', '.join(keywords))
+        for name, keywords in STANDARD_ALLERGENS.items() if name not in existing
+    ]
+    new_allergens += [
+        Allergen(name=term) for term in dict.fromkeys(terms)
+        if term not in existing and term not in STANDARD_ALLERGENS
+    ]
+    Allergen.objects.bulk_create(new_allergens)
+    allergens = list(Allergen.objects.all())
+
+    IngredientAllergen.objects.all().delete()
+    IngredientAllergen.objects.bulk_create([
+        IngredientAllergen(ingredient_id=ingredient_id, allergen_id=allergen_id)
+        for ingredient_id, name in Ingredient.objects.values_list('id', 'name').iterator()
+        for allergen_id in _matching_allergen_ids(name, allergens)
+    ], batch_size=BATCH_SIZE)
+
+    RecipeAllergen.objects.all().delete()
+    RecipeAllergen.objects.bulk_create([
+        RecipeAllergen(recipe_id=recipe_id, allergen_id=allergen_id)
+        for recipe_id, allergen_id in RecipeIngredient.objects.filter(
+            ingredient__allergens__isnull=False
+        ).values_list('recipe_id', 'ingredient__allergens').distinct().iterator()
+    ], batch_size=BATCH_SIZE)
+
+    return len(allergens), IngredientAllergen.objects.count(), RecipeAllergen.objects.count()
@@ -12,3 +12,7 @@ Attributes:
 class ArticlesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articles'
+
+    def ready(self):
+        # 알레르기 인덱스를 갱신하는 시그널 핸들러 등록
+        from . import signals  # noqa: F401
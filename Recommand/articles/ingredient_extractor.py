@@ -0,0 +1,220 @@
+"""
+Ingredient extraction from free text with an Aho–Corasick automaton.
+
+The vocabulary comes from ingredients.txt (one name per line, heavily
+duplicated). It is deduplicated into a sorted list of canonical names and
+compiled into an automaton, so extracting ingredients from a sentence like
+"소고기200g을 깐마늘(국산)과 볶는다" is a single linear scan, regardless of how many
+names are in the vocabulary.
+
+The compiled automaton is saved as a NumPy .npz file that loads without
+pickle. Nothing here depends on Django except get_ingredient_extractor(),
+which reads the file locations from settings.
+
+Used by:
+- recommandationManager's ingredient-based recommendation (user queries)
+- the load_recipes command (recipe import)
+"""
+
+import os
+import re
+import threading
+
+import numpy as np
+
+# Unicode code points fit in 21 bits, so (state, character) packs into one int key
+_CHAR_BITS = 21
+
+# Parenthesised qualifiers such as "(국산)" are dropped from the canonical name
+_QUALIFIER_PATTERN = re.compile(r'\s*\([^)]*\)\s*')
+
+# Particles that may directly follow a single-character ingredient ("무를", "배와")
+_PARTICLES = set('을를이가은는와과도랑의에')
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def _is_hangul(char):
+    return '가' <= char <= '힣'
+
+
+def canonical_name(name):
+    """Normalise a vocabulary entry: strip qualifiers and whitespace ("깐마늘(국산)" -> "깐마늘")."""
+    return _QUALIFIER_PATTERN.sub('', name).strip()
+
+
+class IngredientExtractor:
+    """
+    Aho–Corasick automaton over ingredient surface forms.
+
+    Attributes:
+        names (list): Sorted canonical ingredient names.
+        surfaces (list): Every matchable surface form (original and canonical spelling).
+        surface_names (list): Index into names for each surface form.
+    """
+
+    def __init__(self, names, surfaces, surface_names, transitions, fail, output, dict_link):
+        self.names = names
+        self.surfaces = surfaces
+        self.surface_names = surface_names
+        self.transitions = transitions
+        self.fail = fail
+        self.output = output
+        self.dict_link = dict_link
+
+    @classmethod
+    def compile(cls, words):
+        """Deduplicate the given vocabulary and build the automaton."""
+        surface_to_name = {}
+        for word in words:
+            word = word.strip().lower()
+            if not word:
+                continue
+            name = canonical_name(word) or word
+            surface_to_name.setdefault(word, name)
+            surface_to_name.setdefault(name, name)
+
+        names = sorted(set(surface_to_name.values()))
+        name_index = {name: index for index, name in enumerate(names)}
+        surfaces = sorted(surface_to_name)
+        surface_names = [name_index[surface_to_name[surface]] for surface in surfaces]
+
+        # Trie
+        transitions = {}
+        children = [[]]
+        output = [-1]
+        for surface_index, surface in enumerate(surfaces):
+            state = 0
+            for char in surface:
+                key = state << _CHAR_BITS | ord(char)
+                next_state = transitions.get(key)
+                if next_state is None:
+                    next_state = len(output)
+                    transitions[key] = next_state
+                    children[state].append((ord(char), next_state))
+                    children.append([])
+                    output.append(-1)
+                state = next_state
+            output[state] = surface_index
+
+        # Failure and dictionary-suffix links, breadth first
+        fail = [0] * len(output)
+        dict_link = [-1] * len(output)
+        queue = [child for _, child in children[0]]
+        for state in queue:
+            for code, child in children[state]:
+                fallback = fail[state]
+                while fallback and (fallback << _CHAR_BITS | code) not in transitions:
+                    fallback = fail[fallback]
+                target = transitions.get(fallback << _CHAR_BITS | code, 0)
+                fail[child] = target if target != child else 0
+                dict_link[child] = fail[child] if output[fail[child]] >= 0 else dict_link[fail[child]]
+                queue.append(child)
+
+        return cls(names, surfaces, surface_names, transitions, fail, output, dict_link)
+
+    @classmethod
+    def from_vocabulary_file(cls, path):
+        """Compile from a text file with one ingredient name per line (e.g. ingredients.txt)."""
+        with open(path, encoding='utf-8') as file:
+            return cls.compile(file)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                names=data['names'].tolist(),
+                surfaces=data['surfaces'].tolist(),
+                surface_names=data['surface_names'].tolist(),
+                transitions=dict(zip(data['transition_keys'].tolist(), data['transition_states'].tolist())),
+                fail=data['fail'].tolist(),
+                output=data['output'].tolist(),
+                dict_link=data['dict_link'].tolist(),
+            )
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            np.savez_compressed(
+                file,
+                names=np.array(self.names, dtype=str),
+                surfaces=np.array(self.surfaces, dtype=str),
+                surface_names=np.array(self.surface_names, dtype=np.int32),
+                transition_keys=np.fromiter(self.transitions.keys(), dtype=np.int64, count=len(self.transitions)),
+                transition_states=np.fromiter(self.transitions.values(), dtype=np.int32, count=len(self.transitions)),
+                fail=np.array(self.fail, dtype=np.int32),
+                output=np.array(self.output, dtype=np.int32),
+                dict_link=np.array(self.dict_link, dtype=np.int32),
+            )
+
+    def __len__(self):
+        return len(self.names)
+
+    def _accept(self, text, end, surface):
+        # Single-character names ("무", "배", "파") only count when they are not the
+        # start of a longer word: "무 1개" and "무를" match, "무엇" does not.
+        if len(surface) > 1 or end == len(text):
+            return True
+        following = text[end]
+        return not _is_hangul(following) or following in _PARTICLES
+
+    def find(self, text):
+        """
+        Return non-overlapping matches as (start, end, name) tuples.
+
+        All matches are collected in one pass over the text; overlaps are then
+        resolved leftmost-longest, so "파프리카" wins over "파".
+        """
+        text = text.lower()
+        transitions, fail, output, dict_link = self.transitions, self.fail, self.output, self.dict_link
+
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            code = ord(char)
+            while state and (state << _CHAR_BITS | code) not in transitions:
+                state = fail[state]
+            state = transitions.get(state << _CHAR_BITS | code, 0)
+
+            match_state = state if output[state] >= 0 else dict_link[state]
+            while match_state > 0:
+                surface_index = output[match_state]
+                surface = self.surfaces[surface_index]
+                end = position + 1
+                if self._accept(text, end, surface):
+                    matches.append((end - len(surface), end, surface_index))
+                match_state = dict_link[match_state]
+
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        covered_until = 0
+        for start, end, surface_index in matches:
+            if start >= covered_until:
+                selected.append((start, end, self.names[self.surface_names[surface_index]]))
+                covered_until = end
+        return selected
+
+    def extract(self, text):
+        """Return the distinct ingredient names found in text, in order of appearance."""
+        return list(dict.fromkeys(name for _, _, name in self.find(text)))
+
+
+def get_ingredient_extractor():
+    """
+    Return the process-wide extractor.
+
+    Loads INGREDIENT_AUTOMATON_PATH when it exists, otherwise compiles
+    INGREDIENT_VOCABULARY_PATH on first use.
+    """
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                from django.conf import settings
+
+                path = settings.INGREDIENT_AUTOMATON_PATH
+                if path and os.path.exists(path):
+                    _extractor = IngredientExtractor.load(path)
+                else:
+                    _extractor = IngredientExtractor.from_vocabulary_file(settings.INGREDIENT_VOCABULARY_PATH)
+    return _extractor
@@ -0,0 +1,131 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from articles.models import Article, Dislike, Like
+from articles.reactions import annotate_shard_counts, react
+
+def legacy_react(article, user, reaction):
+    # The read-modify-write the like/dislike actions used to do, for comparison
+    model, opposite, field = (Like, Dislike, 'likes_count') if reaction == 'like' else (Dislike, Like, 'dislikes_count')
+    _, created = model.objects.get_or_create(article=article, user=user)
+    if created:
+        article = Article.objects.get(pk=article.pk)
+        setattr(article, field, getattr(article, field) + 1)
+        article.save()
+        opposite.objects.filter(article=article, user=user).delete()
+    return created
+
+class Command(BaseCommand):
+    help = ('Send concurrent likes and dislikes to one article in a throwaway database '
+            'and check that its counters match the reaction rows')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--reactions', type=int, default=2000,
+                            help='Total reactions sent across all threads')
+        parser.add_argument('--shards', type=int, default=0,
+                            help='Counter shards for the article (0 = update the article row)')
+        parser.add_argument('--legacy', action='store_true',
+                            help='Use the old get_or_create + save() code path to show lost updates')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as workdir:
+            # Never touch the configured database (a file on SQLite so threads share it)
+            if connection.vendor == 'sqlite':
+                connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'reactions.sqlite3')
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                result = self.run(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        self.stdout.write(
+            f'{result["reactions"]} reactions from {options["threads"]} threads in {result["seconds"]}s '
+            f'({result["per_second"]}/s), p50 {result["p50_ms"]}ms, p95 {result["p95_ms"]}ms, '
+            f'errors {result["errors"]}'
+        )
+        self.stdout.write(
+            f'likes: counter {result["likes_count"]}, rows {result["like_rows"]}; '
+            f'dislikes: counter {result["dislikes_count"]}, rows {result["dislike_rows"]}'
+        )
+        if result['lost_updates']:
+            message = f'{result["lost_updates"]} lost counter updates'
+            if options['legacy']:
+                self.stdout.write(self.style.WARNING(message))
+            else:
+                raise CommandError(message)
+        else:
+            self.stdout.write(self.style.SUCCESS('No lost updates'))
+
+    def run(self, options):
+        author = User.objects.create_user('benchmark-author')
+        User.objects.bulk_create([User(username=f'benchmark-user-{i}') for i in range(options['users'])])
+        users = list(User.objects.filter(username__startswith='benchmark-user-'))
+        article = Article.objects.create(
+            title='벤치마크', content='...', author=author, counter_shards=options['shards']
+        )
+        reaction_fn = legacy_react if options['legacy'] else react
+
+        latencies = []
+        errors = []
+        per_thread = options['reactions'] // options['threads']
+        start_barrier = threading.Barrier(options['threads'])
+
+        def worker(number):
+            rng = random.Random(f'{options["seed"]}-{number}')
+            local_latencies, local_errors = [], 0
+            start_barrier.wait()
+            try:
+                for _ in range(per_thread):
+                    user = rng.choice(users)
+                    reaction = rng.choice(['like', 'dislike'])
+                    started = time.perf_counter()
+                    try:
+                        reaction_fn(Article.objects.get(pk=article.pk), user, reaction)
+                    except DatabaseError:
+                        local_errors += 1
+                    local_latencies.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+
+        article = annotate_shard_counts(Article.objects.filter(pk=article.pk)).get()
+        likes_count = article.likes_count + article.shard_likes
+        dislikes_count = article.dislikes_count + article.shard_dislikes
+        like_rows = Like.objects.filter(article=article).count()
+        dislike_rows = Dislike.objects.filter(article=article).count()
+        latencies = np.asarray(latencies) * 1000
+        return {
+            'reactions': len(latencies),
+            'seconds': round(seconds, 3),
+            'per_second': round(len(latencies) / seconds, 1),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+            'errors': sum(errors),
+            'likes_count': likes_count,
+            'dislikes_count': dislikes_count,
+            'like_rows': like_rows,
+            'dislike_rows': dislike_rows,
+            'lost_updates': abs(likes_count - like_rows) + abs(dislikes_count - dislike_rows),
+        }
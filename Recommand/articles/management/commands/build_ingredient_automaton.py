@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from articles.ingredient_extractor import IngredientExtractor
+
+class Command(BaseCommand):
+    help = 'Deduplicate the ingredient vocabulary and compile it into an Aho-Corasick automaton'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vocabulary', default=settings.INGREDIENT_VOCABULARY_PATH,
+                            help='Text file with one ingredient name per line')
+        parser.add_argument('--output', default=settings.INGREDIENT_AUTOMATON_PATH,
+                            help='Where to save the compiled automaton (.npz)')
+
+    def handle(self, *args, **options):
+        extractor = IngredientExtractor.from_vocabulary_file(options['vocabulary'])
+        extractor.save(options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Compiled {len(extractor)} ingredients ({len(extractor.surfaces)} surface forms) into {options["output"]}'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from articles.search import rebuild_search_index, search_supported
+
+class Command(BaseCommand):
+    help = 'Rewrite the full-text search documents of every article and recipe'
+
+    def handle(self, *args, **options):
+        if not search_supported():
+            self.stdout.write(self.style.WARNING('This database has no full-text index; ?search= uses icontains'))
+            return
+        counts = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {counts["article"]} articles and {counts["recipe"]} recipes'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from articles.reactions import fold_counter_shards, recount_reactions
+
+class Command(BaseCommand):
+    help = 'Move the like/dislike counts of sharded articles back into the article rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--article', type=int, action='append', default=None,
+                            help='Only this article id (repeatable)')
+        parser.add_argument('--recount', action='store_true',
+                            help='Recompute the counts from the Like/Dislike rows instead')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            count = recount_reactions(options['article'])
+            self.stdout.write(self.style.SUCCESS(f'Recounted reactions of {count} articles'))
+        else:
+            count = fold_counter_shards(options['article'])
+            self.stdout.write(self.style.SUCCESS(f'Folded counter shards of {count} articles'))
@@ -2,7 +2,8 @@ import csv
 import os
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from articles.models import Recipe, Category
+from articles.ingredient_extractor import get_ingredient_extractor
+from articles.models import Recipe, Category, Ingredient, RecipeIngredient
 
 class Command(BaseCommand):
     help = 'Load recipes from CSV file'
@@ -20,6 +21,13 @@ class Command(BaseCommand):
             defaults={'description': '한국 전통 요리'}
         )
 
+        # Dish kinds (CKG_KND_ACTO_NM, e.g. 밑반찬, 국/탕) become additional categories
+        kind_categories = {}
+
+        # Ingredient names are extracted from the free-text CKG_MTRL_CN column
+        extractor = get_ingredient_extractor()
+        ingredients = {}
+
         # Get the absolute path to the CSV file
         csv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))), 'RECIPE_DATA.csv')
         
@@ -39,4 +47,24 @@ class Command(BaseCommand):
                     difficulty='easy',
                     serving_size=serving_size
                 )
+
+                recipe.categories.add(category)
+                kind = (row['CKG_KND_ACTO_NM'] or '').strip()
+                if kind:
+                    if kind not in kind_categories:
+                        kind_categories[kind], _ = Category.objects.get_or_create(name=kind)
+                    recipe.categories.add(kind_categories[kind])
+
+                for name in extractor.extract(row['CKG_MTRL_CN'] or ''):
+                    if name not in ingredients:
+                        ingredients[name], _ = Ingredient.objects.get_or_create(
+                            name=name,
+                            defaults={'price': 0, 'unit': '개'}
+                        )
+                    RecipeIngredient.objects.create(
+                        recipe=recipe,
+                        ingredient=ingredients[name],
+                        quantity=1,  # Amounts are not parsed from the free text
+                        unit=''
+                    )
                 self.stdout.write(self.style.SUCCESS(f'Successfully created recipe: {recipe.name}'))
\ No newline at end of file
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_cookingtool_ingredient_recipe_recipeingredient_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Allergen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('keywords', models.TextField(blank=True, help_text='콤마로 구분된 재료명 키워드 (비어 있으면 이름 사용)')),
+                ('ingredients', models.ManyToManyField(blank=True, related_name='allergens', to='articles.ingredient')),
+                ('recipes', models.ManyToManyField(blank=True, related_name='allergens', to='articles.recipe')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_allergen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='categories',
+            field=models.ManyToManyField(blank=True, related_name='recipes', to='articles.category'),
+        ),
+    ]
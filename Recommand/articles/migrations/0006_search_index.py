@@ -0,0 +1,96 @@
+import re
+
+from django.db import migrations
+
+# A frozen copy of the articles.search code this migration needs, so later
+# changes to the search module do not change what the migration does.
+
+_WORD = re.compile(r'\w+')
+_HANGUL_OR_OTHER = re.compile(r'[가-힣]+|[^가-힣]+')
+
+CHUNK_SIZE = 500
+TABLES = {
+    'Article': 'articles_article_search',
+    'Recipe': 'articles_recipe_search',
+}
+
+
+def tokenize(text):
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        for run in _HANGUL_OR_OTHER.findall(word):
+            if '가' <= run[0] <= '힣' and len(run) > 1:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            else:
+                tokens.append(run)
+    return tokens
+
+
+def article_documents(Article, ids):
+    for article in Article.objects.filter(pk__in=ids).select_related('author', 'category').prefetch_related('tags'):
+        body = [article.content, article.author.username]
+        if article.category is not None:
+            body.append(article.category.name)
+        body.extend(tag.name for tag in article.tags.all())
+        yield article.pk, article.title, '\n'.join(body)
+
+
+def recipe_documents(Recipe, ids):
+    for recipe in Recipe.objects.filter(pk__in=ids).select_related('author'):
+        yield recipe.pk, recipe.name, '\n'.join([recipe.description, recipe.author.username])
+
+
+DOCUMENTS = {
+    'Article': article_documents,
+    'Recipe': recipe_documents,
+}
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'mysql'):
+        return
+
+    with connection.cursor() as cursor:
+        for model_name, table in TABLES.items():
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(title, body)')
+                insert = f'INSERT INTO {table} (rowid, title, body) VALUES (%s, %s, %s)'
+            else:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    'object_id BIGINT NOT NULL PRIMARY KEY, title TEXT NOT NULL, body MEDIUMTEXT NOT NULL, '
+                    f'FULLTEXT KEY {table}_text (title, body) WITH PARSER ngram'
+                    ') ENGINE=InnoDB DEFAULT CHARSET=utf8mb4'
+                )
+                insert = f'INSERT INTO {table} (object_id, title, body) VALUES (%s, %s, %s)'
+            cursor.execute(f'DELETE FROM {table}')
+
+            model = apps.get_model('articles', model_name)
+            ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(ids), CHUNK_SIZE):
+                rows = list(DOCUMENTS[model_name](model, ids[start:start + CHUNK_SIZE]))
+                if connection.vendor == 'sqlite':
+                    rows = [(pk, ' '.join(tokenize(title)), ' '.join(tokenize(body))) for pk, title, body in rows]
+                if rows:
+                    cursor.executemany(insert, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'mysql'):
+        return
+    with connection.cursor() as cursor:
+        for table in TABLES.values():
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_article_counter_shards'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -52,6 +52,8 @@ class Article(models.Model):
         views_count (int): The number of times the article has been viewed.
         likes_count (int): The number of times the article has been liked.
         dislikes_count (int): The number of times the article has been disliked.
+        counter_shards (int): Number of ArticleCounterShard rows that take the like and
+            dislike increments of a hot article instead of this row (0 = not sharded).
     """
     title = models.CharField(max_length=200)
     content = models.TextField()
@@ -63,6 +65,7 @@ class Article(models.Model):
     views_count = models.PositiveIntegerField(default=0)
     likes_count = models.PositiveIntegerField(default=0)
     dislikes_count = models.PositiveIntegerField(default=0)
+    counter_shards = models.PositiveSmallIntegerField(default=0)
 
     def __str__(self):
         return self.title
@@ -169,6 +172,32 @@ class Dislike(models.Model):
     def __str__(self):
         return f'{self.user.username} disliked {self.article.title}'
 
+class ArticleCounterShard(models.Model):
+    """
+    A slice of a hot article's like and dislike counts.
+
+    Reactions on an article with counter_shards > 0 update one randomly chosen
+    shard row instead of the article row, so concurrent reactions rarely wait on
+    the same row lock. The article's counts are its own columns plus the sum of its
+    shards until fold_counter_shards moves the shard totals back (see articles.reactions).
+
+    Attributes:
+        article (Article): The article the counts belong to.
+        shard (int): Shard number, 0 <= shard < article.counter_shards.
+        likes (int): Likes added through this shard (negative after removals).
+        dislikes (int): Dislikes added through this shard (negative after removals).
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='shards')
+    shard = models.PositiveSmallIntegerField()
+    likes = models.IntegerField(default=0)
+    dislikes = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['article', 'shard']
+
+    def __str__(self):
+        return f'{self.article.title} #{self.shard}'
+
 # New models for cooking and shopping features
 
 class CookingTool(models.Model):
@@ -221,6 +250,7 @@ class Recipe(models.Model):
         difficulty (str): The difficulty level of the recipe.
         serving_size (int): The number of servings.
         tools (CookingTool): The tools required for the recipe.
+        categories (Category): The categories the recipe belongs to.
         created_at (datetime): The timestamp when the recipe was created.
         updated_at (datetime): The timestamp when the recipe was last updated.
         image (ImageField): An optional image of the completed recipe.
@@ -238,6 +268,7 @@ class Recipe(models.Model):
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES)
     serving_size = models.PositiveIntegerField(help_text="몇 인분")
     tools = models.ManyToManyField(CookingTool, related_name='recipes')
+    categories = models.ManyToManyField(Category, related_name='recipes', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     image = models.ImageField(upload_to='recipes/', null=True, blank=True)
@@ -289,6 +320,28 @@ class RecipeIngredient(models.Model):
     def __str__(self):
         return f"{self.recipe.name} - {self.ingredient.name}"
 
+class Allergen(models.Model):
+    """
+    Represents an allergen and the precomputed sets of ingredients and recipes containing it.
+
+    Memberships are resolved when ingredients, recipe ingredients or allergens are
+    written (see articles.allergens), so excluding a user's allergies at read time is
+    a single indexed lookup on the recipe membership table.
+
+    Attributes:
+        name (str): The allergy term as users write it (e.g. "땅콩", "난류").
+        keywords (str): Comma separated ingredient name fragments; defaults to the name.
+        ingredients (ManyToManyField): Ingredients whose name contains a keyword.
+        recipes (ManyToManyField): Recipes using at least one of those ingredients.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    keywords = models.TextField(blank=True, help_text="콤마로 구분된 재료명 키워드 (비어 있으면 이름 사용)")
+    ingredients = models.ManyToManyField(Ingredient, related_name='allergens', blank=True)
+    recipes = models.ManyToManyField(Recipe, related_name='allergens', blank=True)
+
+    def __str__(self):
+        return self.name
+
 class CartItem(models.Model):
     """
     Represents a shopping cart item for purchasing ingredients.
@@ -0,0 +1,204 @@
+"""
+In-memory inverted index from ingredients to the recipes that use them.
+
+Answers "which recipes can I make with what I have" without grouping the whole
+RecipeIngredient table per request: each ingredient id maps to a sorted NumPy
+array of recipe ids (its posting list), and each recipe keeps its set of
+ingredient ids. Scoring a pantry is a merge of the pantry's posting lists,
+counting how many of each recipe's ingredients are covered.
+
+The index is built once per process on first use and then patched from
+RecipeIngredient signals after each commit (see articles.signals). Every
+process keeps its own index, so each change also bumps a version number in the
+shared cache; a process whose index was built at an older version rebuilds it
+on next use. The process that made the change patches its index and moves it
+to the new version instead, unless another change was published in between.
+"""
+
+import threading
+
+import numpy as np
+from django.core.cache import cache
+
+VERSION_KEY = 'pantry-index:version'
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class PantryIndex:
+    """
+    Ingredient → recipe posting lists.
+
+    Attributes:
+        postings (dict): Ingredient id -> sorted int64 array of recipe ids.
+        recipe_ingredients (dict): Recipe id -> frozenset of ingredient ids.
+        version (int): Shared change version the index reflects.
+    """
+
+    def __init__(self, postings, recipe_ingredients, version=0):
+        self.postings = postings
+        self.recipe_ingredients = recipe_ingredients
+        self.version = version
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, version=0):
+        from articles.models import RecipeIngredient
+
+        pairs = RecipeIngredient.objects.order_by(
+            'ingredient_id', 'recipe_id'
+        ).values_list('ingredient_id', 'recipe_id').distinct()
+
+        grouped = {}
+        recipe_ingredients = {}
+        for ingredient_id, recipe_id in pairs.iterator():
+            grouped.setdefault(ingredient_id, []).append(recipe_id)
+            recipe_ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+
+        return cls(
+            postings={
+                ingredient_id: np.array(recipe_ids, dtype=np.int64)
+                for ingredient_id, recipe_ids in grouped.items()
+            },
+            recipe_ingredients={
+                recipe_id: frozenset(ingredient_ids)
+                for recipe_id, ingredient_ids in recipe_ingredients.items()
+            },
+            version=version,
+        )
+
+    def __len__(self):
+        return len(self.recipe_ingredients)
+
+    def _add_posting(self, ingredient_id, recipe_id):
+        posting = self.postings.get(ingredient_id)
+        if posting is None:
+            self.postings[ingredient_id] = np.array([recipe_id], dtype=np.int64)
+            return
+        position = np.searchsorted(posting, recipe_id)
+        if position == len(posting) or posting[position] != recipe_id:
+            self.postings[ingredient_id] = np.insert(posting, position, recipe_id)
+
+    def _remove_posting(self, ingredient_id, recipe_id):
+        posting = self.postings.get(ingredient_id)
+        if posting is None:
+            return
+        position = np.searchsorted(posting, recipe_id)
+        if position < len(posting) and posting[position] == recipe_id:
+            posting = np.delete(posting, position)
+            if len(posting):
+                self.postings[ingredient_id] = posting
+            else:
+                del self.postings[ingredient_id]
+
+    def update_recipe(self, recipe_id, ingredient_ids):
+        """Replace a recipe's ingredient set (an empty set removes the recipe)."""
+        ingredient_ids = frozenset(ingredient_ids)
+        with self.lock:
+            previous = self.recipe_ingredients.get(recipe_id, frozenset())
+            for ingredient_id in previous - ingredient_ids:
+                self._remove_posting(ingredient_id, recipe_id)
+            for ingredient_id in ingredient_ids - previous:
+                self._add_posting(ingredient_id, recipe_id)
+            if ingredient_ids:
+                self.recipe_ingredients[recipe_id] = ingredient_ids
+            else:
+                self.recipe_ingredients.pop(recipe_id, None)
+
+    def refresh_recipes(self, recipe_ids):
+        """Reload the ingredient sets of the given recipes from the database."""
+        from articles.models import RecipeIngredient
+
+        recipe_ids = set(recipe_ids)
+        ingredient_ids = {recipe_id: set() for recipe_id in recipe_ids}
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            ingredient_ids[recipe_id].add(ingredient_id)
+
+        for recipe_id, ingredients in ingredient_ids.items():
+            self.update_recipe(recipe_id, ingredients)
+
+    def coverage(self, ingredient_ids, min_coverage=0.0):
+        """
+        Rank recipes by how much of their ingredient list the pantry covers.
+
+        Parameters:
+            ingredient_ids: Ingredient ids the user has.
+            min_coverage: Drop recipes covering less than this fraction (0-1).
+
+        Returns:
+            (recipe_id, matched, total) tuples ordered by coverage, then by
+            matched ingredient count, then by recipe id.
+        """
+        with self.lock:
+            postings = [self.postings[i] for i in set(ingredient_ids) if i in self.postings]
+            if not postings:
+                return []
+            recipe_ids, matched = np.unique(np.concatenate(postings), return_counts=True)
+            totals = np.fromiter(
+                (len(self.recipe_ingredients[recipe_id]) for recipe_id in recipe_ids.tolist()),
+                dtype=np.int64, count=len(recipe_ids)
+            )
+
+        coverage = matched / totals
+        keep = coverage >= min_coverage
+        recipe_ids, matched, totals, coverage = recipe_ids[keep], matched[keep], totals[keep], coverage[keep]
+
+        # lexsort sorts by the last key first
+        order = np.lexsort((recipe_ids, -matched, -coverage))
+        return [
+            (int(recipe_ids[row]), int(matched[row]), int(totals[row]))
+            for row in order
+        ]
+
+
+def current_version():
+    """Latest pantry change version published in the cache (0 if none)."""
+    return cache.get(VERSION_KEY, 0)
+
+
+def publish_change():
+    """Bump the shared change version (returns the new version)."""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        return cache.incr(VERSION_KEY)
+
+
+def get_pantry_index():
+    """Return the process-wide pantry index, (re)building it when the shared version moved on."""
+    global _index
+    # Read before building: a change committed during the build triggers another rebuild
+    version = current_version()
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = PantryIndex.build(version=version)
+    return _index
+
+
+def loaded_pantry_index():
+    """Return the pantry index if this process has built one, otherwise None."""
+    return _index
+
+
+def refresh_pantry_recipes(recipe_ids):
+    """Publish a committed change to the given recipes and patch this process's index."""
+    version = publish_change()
+    index = _index
+    if index is None:
+        return
+    index.refresh_recipes(recipe_ids)
+    with index.lock:
+        # Any other change published meanwhile is not in this index; leave it to rebuild
+        if index.version == version - 1:
+            index.version = version
+
+
+def reset_pantry_index():
+    global _index
+    with _index_lock:
+        _index = None
@@ -0,0 +1,138 @@
+"""
+Atomic, idempotent like/dislike writes.
+
+A reaction is one transaction: insert the Like (or Dislike) row, delete the
+user's opposite reaction and adjust both counters with F() expressions in a
+single UPDATE. The unique (article, user) constraint makes a repeated reaction
+a no-op instead of a double count, and no count is ever computed in Python, so
+concurrent reactions cannot overwrite each other.
+
+Every reaction on an article still takes the lock of the row holding its
+counters. For hot articles, set Article.counter_shards to N: each reaction then
+updates one of N ArticleCounterShard rows chosen at random, and readers add the
+shard sums to the article's own columns (see annotate_shard_counts).
+fold_counter_shards moves the shard sums back into the article row (saving an
+article with counter_shards set back to 0 does this too), and
+recount_reactions recomputes the counts from the reaction rows.
+"""
+
+import random
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Article, ArticleCounterShard, Dislike, Like
+
+# reaction -> (model to insert, opposite model to remove)
+REACTIONS = {
+    'like': (Like, Dislike),
+    'dislike': (Dislike, Like),
+}
+
+
+def react(article, user, reaction):
+    """
+    Record that user likes or dislikes article, replacing the opposite reaction.
+
+    Returns False (and writes nothing) when the user had already reacted this way.
+    """
+    model, opposite = REACTIONS[reaction]
+    with transaction.atomic():
+        try:
+            # The insert comes first so the transaction takes its write lock
+            # before reading anything (SQLite would otherwise fail to upgrade it)
+            with transaction.atomic():
+                model.objects.create(article=article, user=user)
+        except IntegrityError:
+            return False
+        removed, _ = opposite.objects.filter(article=article, user=user).delete()
+
+        if reaction == 'like':
+            adjust_counts(article, likes=1, dislikes=-removed)
+        else:
+            adjust_counts(article, likes=-removed, dislikes=1)
+    return True
+
+
+def adjust_counts(article, likes=0, dislikes=0):
+    """Add to the article's like/dislike counts, on a random shard row if the article is sharded."""
+    if not likes and not dislikes:
+        return
+
+    if not article.counter_shards:
+        # Shards not yet folded may hold the reaction being removed; never go below zero
+        Article.objects.filter(pk=article.pk).update(
+            likes_count=Greatest(F('likes_count') + likes, 0),
+            dislikes_count=Greatest(F('dislikes_count') + dislikes, 0),
+        )
+        return
+
+    shard = random.randrange(article.counter_shards)
+    shard_rows = ArticleCounterShard.objects.filter(article=article, shard=shard)
+    increments = {'likes': F('likes') + likes, 'dislikes': F('dislikes') + dislikes}
+    if shard_rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            ArticleCounterShard.objects.create(article=article, shard=shard, likes=likes, dislikes=dislikes)
+    except IntegrityError:
+        # Another reaction created the shard first
+        shard_rows.update(**increments)
+
+
+def annotate_shard_counts(queryset):
+    """Annotate shard_likes and shard_dislikes, the counts not yet folded into the article row."""
+    shards = ArticleCounterShard.objects.filter(article=OuterRef('pk')).order_by().values('article')
+    return queryset.annotate(**{
+        f'shard_{field}': Coalesce(
+            Subquery(shards.annotate(total=Sum(field)).values('total'), output_field=IntegerField()), 0
+        )
+        for field in ['likes', 'dislikes']
+    })
+
+
+def fold_counter_shards(article_ids=None):
+    """Add each article's shard sums to its own counts and delete the shards (returns the articles folded)."""
+    shards = ArticleCounterShard.objects.all()
+    if article_ids is not None:
+        shards = shards.filter(article_id__in=article_ids)
+
+    with transaction.atomic():
+        # Only the locked rows are folded and deleted; a shard created meanwhile stays
+        rows = list(shards.select_for_update().values_list('pk', 'article_id', 'likes', 'dislikes'))
+        totals = defaultdict(lambda: [0, 0])
+        for _, article_id, likes, dislikes in rows:
+            totals[article_id][0] += likes
+            totals[article_id][1] += dislikes
+        for article_id, (likes, dislikes) in totals.items():
+            Article.objects.filter(pk=article_id).update(
+                likes_count=F('likes_count') + likes,
+                dislikes_count=F('dislikes_count') + dislikes,
+            )
+        ArticleCounterShard.objects.filter(pk__in=[row[0] for row in rows]).delete()
+    return len(totals)
+
+
+def recount_reactions(article_ids=None):
+    """Recompute like/dislike counts from the reaction rows and drop the shards (returns the articles updated)."""
+    articles = Article.objects.all()
+    if article_ids is not None:
+        articles = articles.filter(pk__in=article_ids)
+
+    with transaction.atomic():
+        updated = articles.update(
+            likes_count=Coalesce(Subquery(
+                Like.objects.filter(article=OuterRef('pk')).order_by().values('article')
+                .annotate(count=Count('pk')).values('count'),
+                output_field=IntegerField(),
+            ), 0),
+            dislikes_count=Coalesce(Subquery(
+                Dislike.objects.filter(article=OuterRef('pk')).order_by().values('article')
+                .annotate(count=Count('pk')).values('count'),
+                output_field=IntegerField(),
+            ), 0),
+        )
+        ArticleCounterShard.objects.filter(article__in=articles).delete()
+    return updated
@@ -0,0 +1,282 @@
+"""
+Full-text search index for articles and recipes.
+
+SearchFilter answers ?search= with one leading-wildcard `icontains` per field
+and joined relation, which scans every row. Each searchable model instead gets
+a full-text table with one document (title, body) per row:
+
+- SQLite: an FTS5 virtual table. Text is stored pre-tokenized: Hangul runs are
+  split into overlapping syllable bigrams ("김치찌개" -> "김치 치찌 찌개") because
+  Korean words carry particles and compounds that a whitespace tokenizer would
+  never match, other words are kept whole. Each query word is matched as the
+  phrase of its bigrams.
+- MySQL: a table with a FULLTEXT index using the built-in ngram parser, which
+  does the bigram split itself (ngram_token_size=2, the server default).
+
+Documents are written in the same transaction as the row they index (see
+articles.signals). FullTextSearchFilter narrows the queryset with a subquery on
+the full-text table, so every match is returned and combines with the other
+filters, and ranks only the rows left with bm25 (title weighted above body) on
+SQLite or MATCH ... AGAINST relevance on MySQL. Other database backends have no
+index and FullTextSearchFilter falls back to SearchFilter.
+
+The indexing functions take an optional app registry so they can run against
+historical models.
+"""
+
+import re
+
+from django.apps import apps as global_apps
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+_WORD = re.compile(r'\w+')
+_HANGUL_OR_OTHER = re.compile(r'[가-힣]+|[^가-힣]+')
+
+# Rows indexed per query when rebuilding
+INDEX_CHUNK_SIZE = 500
+
+
+def _article_document(article):
+    body = [article.content, article.author.username]
+    if article.category is not None:
+        body.append(article.category.name)
+    body.extend(tag.name for tag in article.tags.all())
+    return article.title, '\n'.join(body)
+
+
+def _recipe_document(recipe):
+    return recipe.name, '\n'.join([recipe.description, recipe.author.username])
+
+
+# kind -> (model, full-text table, related fields to load, document builder)
+SEARCH_DOCUMENTS = {
+    'article': ('Article', 'articles_article_search', (['author', 'category'], ['tags']), _article_document),
+    'recipe': ('Recipe', 'articles_recipe_search', (['author'], []), _recipe_document),
+}
+
+
+def search_kind(model):
+    """Search document kind of a model (or None if it is not indexed)."""
+    for kind, (model_name, *_) in SEARCH_DOCUMENTS.items():
+        if model._meta.app_label == 'articles' and model._meta.object_name == model_name:
+            return kind
+    return None
+
+
+def search_supported(using=None):
+    return (using or connection).vendor in ('sqlite', 'mysql')
+
+
+def _runs(text):
+    """Lowercased Hangul and non-Hangul runs of each word."""
+    for word in _WORD.findall(text.lower()):
+        yield from _HANGUL_OR_OTHER.findall(word)
+
+
+def _is_hangul(run):
+    return '가' <= run[0] <= '힣'
+
+
+def _bigrams(run):
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text):
+    """Lowercased tokens: syllable bigrams for Hangul runs, whole words otherwise."""
+    tokens = []
+    for run in _runs(text):
+        if _is_hangul(run) and len(run) > 1:
+            tokens.extend(_bigrams(run))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def fts5_query(text):
+    """
+    FTS5 MATCH expression requiring every query word (None if there are none).
+
+    A Hangul word becomes the phrase of its bigrams, so "김치찌개" only matches
+    where 김치, 치찌 and 찌개 are adjacent. Single syllables and non-Hangul words
+    match as prefixes, so "밥" finds "밥솥" and "kimchi" finds "kimchijeon".
+    """
+    terms = []
+    for run in dict.fromkeys(_runs(text)):
+        if _is_hangul(run) and len(run) > 1:
+            terms.append('"{}"'.format(' '.join(_bigrams(run))))
+        else:
+            terms.append(f'"{run}"*')
+    return ' AND '.join(terms) or None
+
+
+def mysql_boolean_query(text):
+    """MATCH ... AGAINST boolean-mode query requiring every word (None if there are none)."""
+    words = list(dict.fromkeys(_WORD.findall(text.lower())))
+    # Words shorter than the ngram size only match as a prefix
+    return ' '.join(f'+"{word}"' if len(word) > 1 else f'+{word}*' for word in words) or None
+
+
+def create_search_tables(using=None):
+    using = using or connection
+    with using.cursor() as cursor:
+        for _, table, _, _ in SEARCH_DOCUMENTS.values():
+            if using.vendor == 'sqlite':
+                cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(title, body)')
+            elif using.vendor == 'mysql':
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    'object_id BIGINT NOT NULL PRIMARY KEY, title TEXT NOT NULL, body MEDIUMTEXT NOT NULL, '
+                    f'FULLTEXT KEY {table}_text (title, body) WITH PARSER ngram'
+                    ') ENGINE=InnoDB DEFAULT CHARSET=utf8mb4'
+                )
+
+
+def drop_search_tables(using=None):
+    using = using or connection
+    if not search_supported(using):
+        return
+    with using.cursor() as cursor:
+        for _, table, _, _ in SEARCH_DOCUMENTS.values():
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def index_documents(kind, ids, apps=global_apps, using=None):
+    """(Re)write the search documents of the given rows; ids that no longer exist are removed."""
+    using = using or connection
+    if not search_supported(using):
+        return 0
+    model_name, table, (select, prefetch), build = SEARCH_DOCUMENTS[kind]
+    model = apps.get_model('articles', model_name)
+    ids = list(ids)
+
+    rows = [
+        (obj.pk, *build(obj))
+        for obj in model.objects.filter(pk__in=ids).select_related(*select).prefetch_related(*prefetch)
+    ]
+    remove_documents(kind, ids, using=using)
+    if not rows:
+        return 0
+    with using.cursor() as cursor:
+        if using.vendor == 'sqlite':
+            cursor.executemany(
+                f'INSERT INTO {table} (rowid, title, body) VALUES (%s, %s, %s)',
+                [(pk, ' '.join(tokenize(title)), ' '.join(tokenize(body))) for pk, title, body in rows],
+            )
+        else:
+            cursor.executemany(f'INSERT INTO {table} (object_id, title, body) VALUES (%s, %s, %s)', rows)
+    return len(rows)
+
+
+def remove_documents(kind, ids, using=None):
+    using = using or connection
+    ids = list(ids)
+    if not ids or not search_supported(using):
+        return
+    table = SEARCH_DOCUMENTS[kind][1]
+    key = 'rowid' if using.vendor == 'sqlite' else 'object_id'
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {key} IN ({", ".join(["%s"] * len(ids))})', ids)
+
+
+def rebuild_search_index(apps=global_apps, using=None):
+    """Rewrite every search document (returns {kind: documents written})."""
+    using = using or connection
+    counts = {}
+    if not search_supported(using):
+        return counts
+    for kind, (model_name, table, _, _) in SEARCH_DOCUMENTS.items():
+        with using.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+        ids = list(apps.get_model('articles', model_name).objects.order_by('pk').values_list('pk', flat=True))
+        counts[kind] = sum(
+            index_documents(kind, ids[start:start + INDEX_CHUNK_SIZE], apps=apps, using=using)
+            for start in range(0, len(ids), INDEX_CHUNK_SIZE)
+        )
+    return counts
+
+
+def _match(kind, query, using):
+    """
+    Full-text lookup of query in the table of kind (None if the query has no searchable words).
+
+    Returns (table, id column, match condition, rank expression, expression):
+    lower ranks are better and every %s placeholder takes the expression.
+    """
+    table = SEARCH_DOCUMENTS[kind][1]
+    if using.vendor == 'sqlite':
+        expression = fts5_query(query)
+        key, condition, rank = 'rowid', f'{table} MATCH %s', f'bm25({table}, 5.0, 1.0)'
+    else:
+        expression = mysql_boolean_query(query)
+        key, condition = 'object_id', 'MATCH (title, body) AGAINST (%s IN BOOLEAN MODE)'
+        rank = f'-{condition}'
+    if expression is None:
+        return None
+    return table, key, condition, rank, expression
+
+
+def search(kind, query, limit=None, using=None):
+    """
+    Ids of the rows matching query, best first (all of them unless limit is given).
+
+    Returns None when the query has no searchable words.
+    """
+    using = using or connection
+    match = _match(kind, query, using)
+    if match is None:
+        return None
+    table, key, condition, rank, expression = match
+    sql = f'SELECT {key} FROM {table} WHERE {condition} ORDER BY {rank}'
+    params = [expression] * sql.count('%s')
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with using.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_queryset(queryset, kind, query):
+    """
+    queryset narrowed to the rows matching query and ordered by relevance.
+
+    The matches are a subquery of the same statement, so there is no cap on them
+    and the rank is only computed for rows that also pass the other filters.
+    Returns None when the query has no searchable words.
+    """
+    match = _match(kind, query, connection)
+    if match is None:
+        return None
+    table, key, condition, rank, expression = match
+    quote = connection.ops.quote_name
+    outer_pk = f'{quote(queryset.model._meta.db_table)}.{quote(queryset.model._meta.pk.column)}'
+    rank_sql = f'SELECT {rank} FROM {table} WHERE {condition} AND {key} = {outer_pk}'
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT {key} FROM {table} WHERE {condition}', [expression])
+    ).annotate(
+        search_rank=RawSQL(rank_sql, [expression] * rank_sql.count('%s'), output_field=FloatField())
+    ).order_by('search_rank', 'pk')
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by the full-text index, ranked by relevance.
+
+    Models without a search index, databases without full-text support and
+    queries without searchable words use SearchFilter's `search_fields` lookup.
+    An explicit ?ordering= (OrderingFilter runs after this filter) replaces the ranking.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        kind = search_kind(queryset.model)
+        if not query.strip() or kind is None or not search_supported():
+            return super().filter_queryset(request, queryset, view)
+
+        matches = search_queryset(queryset, kind, query)
+        if matches is None:
+            return super().filter_queryset(request, queryset, view)
+        return matches
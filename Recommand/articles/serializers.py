@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from .models import (
     Category, Tag, Article, Comment, Rating, Like, Dislike,
     CookingTool, Ingredient, Recipe, RecipeStep, RecipeIngredient, CartItem
@@ -18,16 +19,21 @@ Classes:
 - RatingSerializer: 평가(Rating) 모델 데이터를 직렬화하며, 사용자(user) 정보를 포함합니다.
 - LikeSerializer: 좋아요(Like) 모델 데이터를 직렬화하며, 사용자(user) 정보를 포함합니다.
 - DislikeSerializer: 싫어요(Dislike) 모델 데이터를 직렬화하며, 사용자(user) 정보를 포함합니다.
-- ArticleSerializer: 게시글(Article) 모델 데이터를 직렬화하며, 댓글, 평가, 좋아요, 싫어요 등 관련 데이터를 포함합니다.
+- ArticleSerializer: 게시글(Article) 모델 데이터를 직렬화하며, 댓글 수, 평가 수, 평균 평점을 포함합니다 (쿼리셋에서 집계).
 - CookingToolSerializer: 요리 도구(Cooking Tool) 모델 데이터를 직렬화합니다.
 - IngredientSerializer: 재료(Ingredient) 모델 데이터를 직렬화합니다.
 - RecipeStepSerializer: 레시피 단계(Recipe Step) 데이터를 직렬화합니다.
 - RecipeIngredientSerializer: 레시피 재료(Recipe Ingredient) 데이터를 직렬화하며, 재료 세부 정보를 포함합니다.
+- SparseFieldsetMixin: fields 인자로 받은 필드만 직렬화합니다 (?fields= 파라미터 지원).
 - RecipeSerializer: 레시피(Recipe) 모델 데이터를 직렬화하며, 작성자(author), 단계(steps), 재료(ingredients), 도구(tools) 등 관련 데이터를 포함합니다.
+- RecipeListSerializer: 레시피 목록용 요약 직렬화 (단계 설명과 재료 상세 정보 제외, 재료 수만 포함).
+- PantryRecipeSerializer: 보유 재료로 만들 수 있는 레시피와 재료 보유율(coverage)을 직렬화합니다.
 - CartItemSerializer: 장바구니 항목(Cart Item) 데이터를 직렬화하며, 총 가격(total_price) 계산 및 재고 검증 기능을 포함합니다.
 
+Functions:
+- prefetch_recipe_relations: 직렬화할 레시피 필드가 읽는 관계만 한 번에 불러오도록 쿼리셋을 설정합니다.
+
 Methods:
-- get_average_rating: ArticleSerializer에서 각 게시글의 평균 평가 점수를 계산합니다.
 - validate_quantity: CartItemSerializer에서 수량(quantity)이 1 이상인지 검증합니다.
 - validate: CartItemSerializer에서 재고(stock) 검증을 수행합니다.
 """
@@ -83,27 +89,27 @@ class ArticleSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    ratings = RatingSerializer(many=True, read_only=True)
-    likes = LikeSerializer(many=True, read_only=True)
-    dislikes = DislikeSerializer(many=True, read_only=True)
-    average_rating = serializers.SerializerMethodField()
+    # Annotated by ArticleViewSet.get_queryset; the defaults apply to newly created articles.
+    # Comments, ratings, likes and dislikes are paginated under /api/articles/{id}/<relation>/
+    average_rating = serializers.FloatField(read_only=True, default=None)
+    rating_count = serializers.IntegerField(read_only=True, default=0)
+    comment_count = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = Article
         fields = [
             'id', 'title', 'content', 'author', 'category', 'tags',
             'created_at', 'updated_at', 'views_count', 'likes_count',
-            'dislikes_count', 'comments', 'ratings', 'likes', 'dislikes',
-            'average_rating'
+            'dislikes_count', 'comment_count', 'rating_count', 'average_rating'
         ]
         read_only_fields = ['author', 'views_count', 'likes_count', 'dislikes_count']
 
-    def get_average_rating(self, obj):
-        ratings = obj.ratings.all()
-        if not ratings:
-            return None
-        return sum(r.value for r in ratings) / len(ratings)
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Reactions on sharded articles not yet folded into the article row (see articles.reactions)
+        data['likes_count'] += getattr(instance, 'shard_likes', 0)
+        data['dislikes_count'] += getattr(instance, 'shard_dislikes', 0)
+        return data
 
 # New serializers for cooking and shopping features
 
@@ -131,7 +137,14 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ['id', 'recipe', 'ingredient', 'ingredient_details', 'quantity', 'unit']
         read_only_fields = ['recipe']
 
-class RecipeSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class RecipeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     steps = RecipeStepSerializer(many=True, read_only=True)
     ingredients = RecipeIngredientSerializer(many=True, read_only=True)
@@ -141,7 +154,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = [
             'id', 'name', 'author', 'description', 'cooking_time',
-            'difficulty', 'serving_size', 'tools', 'ingredients',
+            'difficulty', 'serving_size', 'categories', 'tools', 'ingredients',
             'steps', 'created_at', 'updated_at', 'image'
         ]
         read_only_fields = ['author']
@@ -150,14 +163,16 @@ class RecipeSerializer(serializers.ModelSerializer):
         tools_data = self.context['request'].data.get('tools', [])
         ingredients_data = self.context['request'].data.get('ingredients', [])
         steps_data = self.context['request'].data.get('steps', [])
+        categories = validated_data.pop('categories', [])
 
         recipe = Recipe.objects.create(
             author=self.context['request'].user,
             **validated_data
         )
 
-        # Add tools
+        # Add tools and categories
         recipe.tools.set(tools_data)
+        recipe.categories.set(categories)
 
         # Add ingredients
         for ingredient_data in ingredients_data:
@@ -179,6 +194,43 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+class RecipeListSerializer(serializers.ModelSerializer):
+    author = UserSerializer(read_only=True)
+    # Annotated by the queryset (see RecipeViewSet.get_queryset)
+    ingredient_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Recipe
+        fields = [
+            'id', 'name', 'author', 'cooking_time', 'difficulty', 'serving_size',
+            'categories', 'ingredient_count', 'created_at', 'image'
+        ]
+
+# Relations read by each recipe field: select_related for the author,
+# one prefetch query per relation otherwise (ingredients come with their details)
+RECIPE_SELECT_RELATED = {'author': 'author'}
+RECIPE_PREFETCHES = {
+    'steps': 'steps',
+    'tools': 'tools',
+    'categories': 'categories',
+    'ingredients': Prefetch('ingredients', queryset=RecipeIngredient.objects.select_related('ingredient')),
+}
+
+def prefetch_recipe_relations(queryset, fields=None):
+    """Load the relations the given recipe fields serialize (every RecipeSerializer field by default)."""
+    fields = RecipeSerializer.Meta.fields if fields is None else fields
+    select_related = [RECIPE_SELECT_RELATED[name] for name in fields if name in RECIPE_SELECT_RELATED]
+    prefetches = [RECIPE_PREFETCHES[name] for name in fields if name in RECIPE_PREFETCHES]
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    return queryset.prefetch_related(*prefetches)
+
+class PantryRecipeSerializer(serializers.Serializer):
+    recipe = RecipeSerializer(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+    matched_ingredients = serializers.IntegerField(read_only=True)
+    total_ingredients = serializers.IntegerField(read_only=True)
+
 class CartItemSerializer(serializers.ModelSerializer):
     ingredient_details = IngredientSerializer(source='ingredient', read_only=True)
     total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
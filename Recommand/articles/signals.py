@@ -0,0 +1,104 @@
+"""
+Keeps the precomputed allergen memberships (articles.allergens), the
+in-memory pantry index (articles.pantry_index) and the full-text search
+documents (articles.search) in sync with writes, marks a recipe as updated
+when its ingredients change and folds an article's counter shards back into the
+article row when its sharding is turned off.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .allergens import index_allergen, index_ingredient, refresh_recipe_allergens
+from .models import Allergen, Article, Category, Ingredient, Recipe, RecipeIngredient, Tag
+from .pantry_index import refresh_pantry_recipes
+from .reactions import fold_counter_shards
+from .search import index_documents, remove_documents
+
+
+@receiver(post_save, sender=Allergen)
+def index_saved_allergen(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_allergen(instance)
+
+
+@receiver(post_save, sender=Ingredient)
+def index_saved_ingredient(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_ingredient(instance)
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def refresh_recipe_allergens_on_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_recipe_allergens([instance.recipe_id])
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def touch_recipe(sender, instance, raw=False, **kwargs):
+    # build_recipe_similarity --incremental finds changed recipes by updated_at;
+    # update() skips Recipe's own post_save receivers
+    if not raw:
+        Recipe.objects.filter(pk=instance.recipe_id).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def refresh_pantry_index(sender, instance, raw=False, **kwargs):
+    # Other processes see the new version and rebuild their index on next use
+    if not raw:
+        recipe_id = instance.recipe_id
+        transaction.on_commit(lambda: refresh_pantry_recipes([recipe_id]))
+
+
+@receiver(post_save, sender=Article)
+def index_saved_article(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_documents('article', [instance.pk])
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def index_article_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # tag.articles.clear() does not report the articles; they keep the tag name until saved again
+    if not reverse:
+        index_documents('article', [instance.pk])
+    elif pk_set:
+        index_documents('article', pk_set)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def index_renamed_labels(sender, instance, created, raw=False, **kwargs):
+    # Category and tag names are part of the article documents
+    if not created and not raw:
+        index_documents('article', instance.articles.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def index_saved_recipe(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_documents('recipe', [instance.pk])
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Recipe)
+def remove_search_document(sender, instance, **kwargs):
+    remove_documents('article' if sender is Article else 'recipe', [instance.pk])
+
+
+@receiver(post_init, sender=Article)
+def remember_counter_shards(sender, instance, **kwargs):
+    # Deferred fields are left alone (reading them would run a query)
+    instance._loaded_counter_shards = instance.__dict__.get('counter_shards') if instance.pk else None
+
+
+@receiver(post_save, sender=Article)
+def fold_shards_when_unsharded(sender, instance, created, raw=False, **kwargs):
+    # Reactions on an unsharded article update its row directly, which could take
+    # the counts below zero while shards still hold part of them
+    if not created and not raw and not instance.counter_shards and instance._loaded_counter_shards:
+        fold_counter_shards([instance.pk])
+    instance._loaded_counter_shards = instance.counter_shards
@@ -1,3 +1,610 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from articles.allergens import ensure_allergens, rebuild_allergen_index
+from articles.ingredient_extractor import IngredientExtractor, canonical_name
+from articles.models import (
+    Article, ArticleCounterShard, CartItem, Category, Comment, CookingTool, Dislike, Ingredient, Like, Rating,
+    Recipe, RecipeIngredient, RecipeStep, Tag
+)
+from articles.pantry_index import current_version, get_pantry_index, publish_change, reset_pantry_index
+from articles.reactions import fold_counter_shards, recount_reactions
+from articles.search import fts5_query, mysql_boolean_query, rebuild_search_index, search, tokenize
+from articles.view_counter import ViewCounter, get_view_counter, reset_view_counter
+from articles.serializers import RecipeSerializer
+from Recommand.sql_instrumentation import enforce_query_budgets
+
+
+class IngredientExtractorTest(SimpleTestCase):
+    VOCABULARY = ['깐마늘(국산)', '마늘', '파', '대파', '파프리카', '무', '소고기', '소고기', '간장', '국간장']
+
+    def setUp(self):
+        self.extractor = IngredientExtractor.compile(self.VOCABULARY)
+
+    def test_vocabulary_is_deduplicated_and_canonicalised(self):
+        self.assertEqual(canonical_name('깐마늘(국산)'), '깐마늘')
+        self.assertEqual(len(self.extractor), 9)
+        self.assertIn('깐마늘', self.extractor.names)
+
+    def test_extract_from_sentence(self):
+        self.assertEqual(
+            self.extractor.extract('소고기200g을 깐마늘(국산)과 볶다가 국간장, 대파 넣기'),
+            ['소고기', '깐마늘', '국간장', '대파']
+        )
+
+    def test_leftmost_longest_match_wins(self):
+        self.assertEqual(self.extractor.extract('파프리카 1개'), ['파프리카'])
+        self.assertEqual(self.extractor.extract('국간장'), ['국간장'])
+
+    def test_single_character_names_need_a_word_boundary(self):
+        self.assertEqual(self.extractor.extract('무 1개, 무를 썰어'), ['무'])
+        self.assertEqual(self.extractor.extract('무엇을 만들까'), [])
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'automaton.npz')
+            self.extractor.save(path)
+            loaded = IngredientExtractor.load(path)
+
+        text = '대파와 깐마늘, 파프리카, 무를 준비'
+        self.assertEqual(loaded.find(text), self.extractor.find(text))
+
+
+class AllergenIndexTest(TestCase):
+    def setUp(self):
+        author = User.objects.create_user('cook', password='pw')
+        self.shrimp = Ingredient.objects.create(name='칵테일새우', price=1000, unit='g')
+        self.egg = Ingredient.objects.create(name='계란', price=1000, unit='개')
+        self.recipe = Recipe.objects.create(
+            name='새우볶음밥', author=author, description='', cooking_time=20,
+            difficulty='easy', serving_size=1
+        )
+        for ingredient in [self.shrimp, self.egg]:
+            RecipeIngredient.objects.create(recipe=self.recipe, ingredient=ingredient, quantity=1, unit='개')
+
+    def allergens_of(self, recipe):
+        return set(recipe.allergens.values_list('name', flat=True))
+
+    def test_recipe_allergens_follow_ingredient_changes(self):
+        self.assertEqual(self.allergens_of(self.recipe), {'새우', '난류'})
+
+        RecipeIngredient.objects.filter(ingredient=self.egg).delete()
+        self.assertEqual(self.allergens_of(self.recipe), {'새우'})
+
+        self.shrimp.name = '오징어'
+        self.shrimp.save()
+        self.assertEqual(self.allergens_of(self.recipe), {'오징어'})
+
+    def test_new_terms_are_resolved_when_created(self):
+        ensure_allergens(['새우볶음', '칵테일'])
+        self.assertEqual(self.allergens_of(self.recipe), {'새우', '난류', '칵테일'})
+
+    def test_rebuild_matches_incremental_index(self):
+        before = self.allergens_of(self.recipe)
+        rebuild_allergen_index(['칵테일'])
+        self.assertEqual(self.allergens_of(self.recipe), before | {'칵테일'})
+
+
+@enforce_query_budgets
+@override_settings(RECIPE_INDEX_BACKGROUND=False)
+class PantrySearchTest(TestCase):
+    def setUp(self):
+        reset_pantry_index()
+        self.addCleanup(reset_pantry_index)
+        self.user = User.objects.create_user('cook', password='pw')
+        self.egg, self.rice, self.scallion, self.kimchi = [
+            Ingredient.objects.create(name=name, price=1000, unit='개', stock=10)
+            for name in ['계란', '밥', '대파', '김치']
+        ]
+        self.fried_rice = self.create_recipe('계란볶음밥', [self.egg, self.rice, self.scallion])
+        self.kimchi_rice = self.create_recipe('김치볶음밥', [self.kimchi, self.rice, self.egg, self.scallion])
+        self.omelette = self.create_recipe('계란말이', [self.egg, self.scallion], difficulty='medium')
+        self.client = APIClient()
+        self.url = reverse('recipe-pantry')
+
+    def create_recipe(self, name, ingredients, difficulty='easy'):
+        recipe = Recipe.objects.create(
+            name=name, author=self.user, description='', cooking_time=20,
+            difficulty=difficulty, serving_size=1
+        )
+        for ingredient in ingredients:
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=1, unit='개')
+        return recipe
+
+    def results(self, response):
+        return [(item['recipe']['id'], item['matched_ingredients'], item['total_ingredients']) for item in response.data]
+
+    def test_ranks_by_coverage(self):
+        response = self.client.get(self.url, {'ingredients': f'{self.egg.id},{self.scallion.id}'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.results(response), [
+            (self.omelette.id, 2, 2),
+            (self.fried_rice.id, 2, 3),
+            (self.kimchi_rice.id, 2, 4),
+        ])
+        self.assertEqual(response.data[0]['coverage'], 1.0)
+
+    def test_uses_cart_and_list_filters(self):
+        CartItem.objects.create(user=self.user, ingredient=self.kimchi, quantity=1)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(self.url, {
+            'ingredients': f'{self.rice.id}', 'difficulty': 'easy', 'min_coverage': 0.5
+        })
+        self.assertEqual(self.results(response), [(self.kimchi_rice.id, 2, 4)])
+
+    def test_index_follows_recipe_ingredient_changes(self):
+        get_pantry_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.filter(recipe=self.kimchi_rice, ingredient=self.kimchi).delete()
+            self.create_recipe('김치', [self.kimchi])
+
+        response = self.client.get(self.url, {'ingredients': f'{self.kimchi.id},{self.rice.id}'})
+        self.assertEqual(
+            [recipe_id for recipe_id, _, _ in self.results(response)],
+            [Recipe.objects.get(name='김치').id, self.fried_rice.id, self.kimchi_rice.id]
+        )
+
+    def test_index_follows_changes_made_by_other_processes(self):
+        index = get_pantry_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_recipe('계란국', [self.egg])
+        # This process patched its own index instead of rebuilding it
+        self.assertIs(get_pantry_index(), index)
+
+        # Another process committed a change and published a new version
+        self.create_recipe('김치', [self.kimchi])
+        publish_change()
+
+        rebuilt = get_pantry_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(rebuilt.version, current_version())
+        self.assertIn(Recipe.objects.get(name='김치').id, rebuilt.recipe_ingredients)
+
+    def test_requires_ingredients(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'ingredients': 'egg'}).status_code, 400)
+        for limit in ['0', '-1']:
+            response = self.client.get(self.url, {'ingredients': f'{self.egg.id}', 'limit': limit})
+            self.assertEqual(response.status_code, 400)
+
+    def test_filters_reach_low_ranked_recipes(self):
+        for i in range(12):
+            self.create_recipe(f'계란 {i}', [self.egg])
+
+        # The old code only filtered the top MAX_PANTRY_RESULTS * 10 recipes by coverage
+        with mock.patch('articles.views.MAX_PANTRY_RESULTS', 1):
+            response = self.client.get(self.url, {'ingredients': f'{self.egg.id}', 'difficulty': 'medium'})
+            self.assertEqual(self.results(response), [(self.omelette.id, 1, 2)])
+
+            response = self.client.get(self.url, {'ingredients': f'{self.egg.id}', 'limit': 5})
+            self.assertEqual(len(response.data), 1)
+
+
+@enforce_query_budgets
+class CartQueryBudgetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('shopper', password='pw')
+        self.egg = Ingredient.objects.create(name='계란', price=1000, unit='개', stock=10)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cart_actions_stay_within_budget(self):
+        url = reverse('ingredient-add-to-cart', args=[self.egg.id])
+        for _ in range(2):
+            response = self.client.post(url, {'quantity': 2}, format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-DB-Query-Budget'], '5')
+        self.assertEqual(CartItem.objects.get(user=self.user).quantity, 4)
+
+        response = self.client.post(reverse('cart-clear'))
+        self.assertEqual(response['X-DB-Queries'], '1')
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_catalog_lists_do_not_grow_with_rows(self):
+        for name in ['대파', '마늘', '양파']:
+            Ingredient.objects.create(name=name, price=500, unit='개')
+
+        response = self.client.get(reverse('ingredient-list'))
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(response['X-DB-Duplicate-Queries'], '0')
+
+
+@enforce_query_budgets
+class RecipeListTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cook', password='pw')
+        self.korean = Category.objects.create(name='한식')
+        self.pan = CookingTool.objects.create(name='프라이팬', description='팬')
+        self.ingredients = [
+            Ingredient.objects.create(name=name, price=1000, unit='개')
+            for name in ['계란', '밥', '대파']
+        ]
+        self.client = APIClient()
+        self.recipe = self.create_recipe('계란볶음밥')
+
+    def create_recipe(self, name):
+        recipe = Recipe.objects.create(
+            name=name, author=self.user, description='설명', cooking_time=20,
+            difficulty='easy', serving_size=1
+        )
+        recipe.categories.add(self.korean)
+        recipe.tools.add(self.pan)
+        for number, ingredient in enumerate(self.ingredients, start=1):
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=1, unit='개')
+            RecipeStep.objects.create(recipe=recipe, step_number=number, description=f'{number}단계')
+        return recipe
+
+    def list(self, **params):
+        response = self.client.get(reverse('recipe-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_is_compact(self):
+        item = self.list().data['results'][0]
+
+        self.assertEqual(item['ingredient_count'], 3)
+        self.assertEqual(item['categories'], [self.korean.id])
+        self.assertEqual(item['author']['username'], 'cook')
+        self.assertNotIn('steps', item)
+        self.assertNotIn('ingredients', item)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        single = int(self.list()['X-DB-Queries'])
+        full_single = int(self.list(fields=','.join(RecipeSerializer.Meta.fields))['X-DB-Queries'])
+        for i in range(5):
+            self.create_recipe(f'레시피 {i}')
+
+        self.assertEqual(int(self.list()['X-DB-Queries']), single)
+        response = self.list(fields=','.join(RecipeSerializer.Meta.fields))
+        self.assertEqual(int(response['X-DB-Queries']), full_single)
+        self.assertEqual(len(response.data['results'][0]['steps']), 3)
+
+    def test_sparse_fieldsets(self):
+        item = self.list(fields='id,name,ingredients').data['results'][0]
+        self.assertEqual(set(item), {'id', 'name', 'ingredients'})
+        self.assertEqual(item['ingredients'][0]['ingredient_details']['name'], '계란')
+
+        response = self.client.get(reverse('recipe-detail', args=[self.recipe.id]), {'fields': 'name,steps'})
+        self.assertEqual(set(response.data), {'name', 'steps'})
+
+        response = self.client.get(reverse('recipe-list'), {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.data['fields'])
+
+    def test_retrieve_returns_every_field_by_default(self):
+        response = self.client.get(reverse('recipe-detail', args=[self.recipe.id]))
+        self.assertEqual(list(response.data), RecipeSerializer.Meta.fields)
+        self.assertEqual([tool['name'] for tool in response.data['tools']], ['프라이팬'])
+
+
+@enforce_query_budgets
+@override_settings(ARTICLE_VIEW_COUNT_BACKGROUND=False)
+class ArticleQueryBudgetTest(TestCase):
+    def setUp(self):
+        reset_view_counter()
+        self.addCleanup(reset_view_counter)
+        self.author = User.objects.create_user('writer', password='pw')
+        self.readers = [User.objects.create_user(f'reader{i}', password='pw') for i in range(3)]
+        self.category = Category.objects.create(name='한식')
+        self.tag = Tag.objects.create(name='간단')
+        self.client = APIClient()
+        self.article = self.create_article('김치찌개 후기', ratings=[5, 4, 3], comments=12)
+
+    def create_article(self, title, ratings=(), comments=0):
+        article = Article.objects.create(title=title, content='...', author=self.author, category=self.category)
+        article.tags.add(self.tag)
+        for reader, value in zip(self.readers, ratings):
+            Rating.objects.create(article=article, user=reader, value=value)
+            Like.objects.create(article=article, user=reader)
+        for i in range(comments):
+            Comment.objects.create(article=article, author=self.readers[i % len(self.readers)], content=f'댓글 {i}')
+        return article
+
+    def test_aggregates_replace_embedded_relations(self):
+        response = self.client.get(reverse('article-detail', args=[self.article.id]))
+
+        self.assertEqual(response.data['average_rating'], 4.0)
+        self.assertEqual(response.data['rating_count'], 3)
+        self.assertEqual(response.data['comment_count'], 12)
+        for relation in ['comments', 'ratings', 'likes', 'dislikes']:
+            self.assertNotIn(relation, response.data)
+
+        # The tag join must not multiply the counts
+        response = self.client.get(reverse('article-list'), {'tag': '간단'})
+        self.assertEqual(response.data['results'][0]['rating_count'], 3)
+        self.assertEqual(response.data['results'][0]['comment_count'], 12)
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        single = int(self.client.get(reverse('article-list'))['X-DB-Queries'])
+        for i in range(4):
+            self.create_article(f'글 {i}', ratings=[5, 1], comments=3)
+
+        response = self.client.get(reverse('article-list'))
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(int(response['X-DB-Queries']), single)
+        empty = next(item for item in response.data['results'] if item['id'] != self.article.id)
+        self.assertEqual(empty['average_rating'], 3.0)
+
+    def test_relations_are_paginated(self):
+        url = reverse('article-comments', args=[self.article.id])
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['content'], '댓글 11')
+        self.assertEqual(len(self.client.get(url, {'page': 2}).data['results']), 2)
+
+        response = self.client.get(reverse('article-likes', args=[self.article.id]))
+        self.assertEqual({like['user']['username'] for like in response.data['results']},
+                         {'reader0', 'reader1', 'reader2'})
+        self.assertEqual(self.client.get(reverse('article-dislikes', args=[self.article.id])).data['count'], 0)
+        self.assertEqual(self.client.get(reverse('article-comments', args=[0])).status_code, 404)
+
+
+@override_settings(ARTICLE_VIEW_COUNT_BACKGROUND=False, ARTICLE_VIEW_COUNT_MAX_PENDING=5)
+class ArticleViewCounterTest(TestCase):
+    def setUp(self):
+        reset_view_counter()
+        self.addCleanup(reset_view_counter)
+        author = User.objects.create_user('writer', password='pw')
+        self.articles = [
+            Article.objects.create(title=f'글 {i}', content='...', author=author) for i in range(2)
+        ]
+        self.client = APIClient()
+
+    @enforce_query_budgets
+    def test_detail_reads_do_not_write(self):
+        article = self.articles[0]
+        url = reverse('article-detail', args=[article.id])
+        for expected in [1, 2, 3]:
+            response = self.client.get(url)
+            self.assertEqual(response.data['views_count'], expected)
+            self.assertEqual(response['X-DB-Queries'], '2')
+
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 0)
+        updated_at = article.updated_at
+
+        self.assertEqual(get_view_counter().flush(), 3)
+        article.refresh_from_db()
+        self.assertEqual(article.views_count, 3)
+        self.assertEqual(article.updated_at, updated_at)
+        self.assertEqual(self.client.get(url).data['views_count'], 4)
+
+    def test_unwritten_views_are_bounded(self):
+        for i in range(12):
+            self.client.get(reverse('article-detail', args=[self.articles[i % 2].id]))
+
+        # Every fifth read flushes from the request thread, so crashing now would lose
+        # at most MAX_PENDING views
+        counter = get_view_counter()
+        self.assertEqual(counter.stats(), {'pending': 2, 'written': 10, 'failed': 0, 'dropped': 0})
+        self.assertEqual(sum(Article.objects.values_list('views_count', flat=True)), 10)
+
+        counter.close()
+        self.assertEqual([a.views_count for a in Article.objects.order_by('id')], [6, 6])
+
+    def test_failed_flush_keeps_views_for_the_next_one(self):
+        counter = ViewCounter(flush_interval_ms=60000, max_pending=5)
+        article_id = self.articles[0].id
+        for _ in range(3):
+            counter.increment(article_id, background=False)
+
+        with mock.patch.object(QuerySet, 'update', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('articles.view_counter', 'ERROR'):
+                self.assertEqual(counter.flush(), 0)
+        self.assertEqual(counter.stats(), {'pending': 3, 'written': 0, 'failed': 1, 'dropped': 0})
+
+        # Until the retry, reads neither force a flush nor grow the buffer past max_pending
+        for _ in range(4):
+            counter.increment(article_id, background=False)
+        self.assertEqual(counter.stats(), {'pending': 5, 'written': 0, 'failed': 1, 'dropped': 2})
+
+        self.assertEqual(counter.flush(), 5)
+        self.articles[0].refresh_from_db()
+        self.assertEqual(self.articles[0].views_count, 5)
+
+    def test_concurrent_increments_are_not_lost(self):
+        counter = ViewCounter(flush_interval_ms=1000, max_pending=10 ** 6)
+        article_ids = [article.id for article in self.articles]
+
+        def read():
+            for i in range(500):
+                counter.increment(article_ids[i % 2], background=False)
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.flush(), 2000)
+        self.assertEqual([a.views_count for a in Article.objects.order_by('id')], [1000, 1000])
+
+
+@enforce_query_budgets
+@override_settings(ARTICLE_VIEW_COUNT_BACKGROUND=False)
+class ArticleReactionTest(TestCase):
+    def setUp(self):
+        reset_view_counter()
+        self.addCleanup(reset_view_counter)
+        author = User.objects.create_user('writer', password='pw')
+        self.users = [User.objects.create_user(f'reader{i}', password='pw') for i in range(6)]
+        self.article = Article.objects.create(title='김치찌개 후기', content='...', author=author)
+        self.client = APIClient()
+
+    def react(self, user, reaction, article=None):
+        self.client.force_authenticate(user)
+        response = self.client.post(reverse(f'article-{reaction}', args=[(article or self.article).id]))
+        self.assertEqual(response.status_code, 200)
+        return response.data['status']
+
+    def counts(self, article=None):
+        response = self.client.get(reverse('article-detail', args=[(article or self.article).id]))
+        return response.data['likes_count'], response.data['dislikes_count']
+
+    def test_reactions_are_idempotent_and_replace_each_other(self):
+        self.assertEqual(self.react(self.users[0], 'like'), 'liked')
+        self.assertEqual(self.react(self.users[0], 'like'), 'already liked')
+        self.assertEqual(self.react(self.users[1], 'dislike'), 'disliked')
+        self.assertEqual(self.counts(), (1, 1))
+
+        self.assertEqual(self.react(self.users[0], 'dislike'), 'disliked')
+        self.assertEqual(self.counts(), (0, 2))
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(Dislike.objects.count(), 2)
+
+        updated_at = self.article.updated_at
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.updated_at, updated_at)
+
+    def test_sharded_counts(self):
+        hot = Article.objects.create(title='인기 글', content='...', author=self.users[0], counter_shards=4)
+        for user in self.users:
+            self.react(user, 'like', hot)
+        self.react(self.users[0], 'dislike', hot)
+
+        hot.refresh_from_db()
+        self.assertEqual((hot.likes_count, hot.dislikes_count), (0, 0))
+        self.assertTrue(ArticleCounterShard.objects.filter(article=hot).exists())
+        self.assertEqual(self.counts(hot), (5, 1))
+
+        self.assertEqual(fold_counter_shards(), 1)
+        hot.refresh_from_db()
+        self.assertEqual((hot.likes_count, hot.dislikes_count), (5, 1))
+        self.assertFalse(ArticleCounterShard.objects.exists())
+        self.assertEqual(self.counts(hot), (5, 1))
+
+    def test_turning_sharding_off_folds_the_shards(self):
+        hot = Article.objects.create(title='인기 글', content='...', author=self.users[0], counter_shards=4)
+        self.react(self.users[1], 'like', hot)
+
+        hot = Article.objects.get(pk=hot.pk)
+        hot.counter_shards = 0
+        hot.save()
+        self.assertFalse(ArticleCounterShard.objects.exists())
+        self.assertEqual(self.counts(hot), (1, 0))
+
+        self.react(self.users[1], 'dislike', hot)
+        self.assertEqual(self.counts(hot), (0, 1))
+
+    def test_unfolded_shards_never_take_counts_below_zero(self):
+        hot = Article.objects.create(title='인기 글', content='...', author=self.users[0], counter_shards=4)
+        self.react(self.users[1], 'like', hot)
+        # A bulk update skips the fold, leaving the like on a shard
+        Article.objects.filter(pk=hot.pk).update(counter_shards=0)
+
+        self.react(self.users[1], 'dislike', hot)
+        hot.refresh_from_db()
+        self.assertEqual((hot.likes_count, hot.dislikes_count), (0, 1))
+
+    def test_recount_repairs_drifted_counters(self):
+        self.react(self.users[0], 'like')
+        Article.objects.filter(pk=self.article.pk).update(likes_count=7, dislikes_count=3)
+
+        recount_reactions([self.article.pk])
+        self.assertEqual(self.counts(), (1, 0))
+
+
+class TokenizeTest(SimpleTestCase):
+    def test_hangul_bigrams(self):
+        self.assertEqual(tokenize('김치찌개를 Kimchi 밥!'), ['김치', '치찌', '찌개', '개를', 'kimchi', '밥'])
+        self.assertEqual(tokenize('3분카레'), ['3', '분카', '카레'])
+
+    def test_queries(self):
+        self.assertEqual(fts5_query('김치찌개 밥'), '"김치 치찌 찌개" AND "밥"*')
+        self.assertEqual(fts5_query('"OR" *'), '"or"*')
+        self.assertIsNone(fts5_query('?!'))
+        self.assertEqual(mysql_boolean_query('김치찌개 밥'), '+"김치찌개" +밥*')
+
+
+@enforce_query_budgets
+class FullTextSearchTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('writer', password='pw')
+        self.stew = Category.objects.create(name='찌개')
+        self.quick = Tag.objects.create(name='초간단')
+        self.kimchi = self.create_article('김치찌개 끓이는 법', '돼지고기와 신김치를 볶아요', category=self.stew)
+        self.doenjang = self.create_article('된장찌개', '애호박과 두부를 넣어요')
+        self.mention = self.create_article('오늘 저녁', '김치찌개 대신 계란말이를 했어요')
+        self.client = APIClient()
+
+    def create_article(self, title, content, category=None):
+        return Article.objects.create(title=title, content=content, author=self.author, category=category)
+
+    def search(self, query, url='article-list', **params):
+        response = self.client.get(reverse(url), {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_korean_substrings_are_found_and_ranked(self):
+        self.assertEqual(self.search('김치찌개'), [self.kimchi.id, self.mention.id])
+        self.assertEqual(set(self.search('찌개')), {self.kimchi.id, self.doenjang.id, self.mention.id})
+        self.assertEqual(self.search('두부 애호박'), [self.doenjang.id])
+        self.assertEqual(self.search('없는말'), [])
+
+        ordered = self.search('찌개', ordering='-created_at')
+        self.assertEqual(ordered, [self.mention.id, self.doenjang.id, self.kimchi.id])
+
+    def test_index_follows_writes(self):
+        self.doenjang.tags.add(self.quick)
+        self.assertEqual(self.search('초간단'), [self.doenjang.id])
+
+        self.quick.name = '30분'
+        self.quick.save()
+        self.assertEqual(self.search('초간단'), [])
+        self.assertEqual(self.search('30분'), [self.doenjang.id])
+
+        self.kimchi.title = '참치찌개'
+        self.kimchi.save()
+        self.assertEqual(self.search('참치'), [self.kimchi.id])
+        # "참치찌개 ... 신김치" has every bigram of 김치찌개, but not in a row
+        self.assertEqual(self.search('김치찌개'), [self.mention.id])
+
+        self.mention.delete()
+        self.assertEqual(search('article', '계란말이'), [])
+
+    def test_filters_apply_to_every_match(self):
+        def create_recipe(name, description, difficulty='easy'):
+            return Recipe.objects.create(
+                name=name, author=self.author, description=description, cooking_time=10,
+                difficulty=difficulty, serving_size=1
+            )
+        for i in range(5):
+            create_recipe(f'볶음밥 {i}', '볶음밥 볶음밥')
+        hard = create_recipe('오늘 저녁', '볶음밥은 불 조절이 어려워요', difficulty='hard')
+        best_hard = create_recipe('볶음밥 정석', '볶음밥', difficulty='hard')
+
+        response = self.client.get(reverse('recipe-list'), {'search': '볶음밥', 'difficulty': 'hard'})
+        self.assertEqual(response.data['count'], 2)
+        # Ranked within the filtered rows: the title match comes first
+        self.assertEqual([item['id'] for item in response.data['results']], [best_hard.id, hard.id])
+
+        response = self.client.get(reverse('recipe-list'), {'search': '볶음밥'})
+        self.assertEqual(response.data['count'], 7)
+
+    def test_recipes_and_rebuild(self):
+        recipe = Recipe.objects.create(
+            name='계란볶음밥', author=self.author, description='남은 밥으로', cooking_time=10,
+            difficulty='easy', serving_size=1
+        )
+        self.assertEqual(self.search('볶음밥', url='recipe-list'), [recipe.id])
+        self.assertEqual(self.search('밥', url='recipe-list'), [recipe.id])
+
+        # bulk_create skips the signals; the rebuild picks the rows up
+        Recipe.objects.bulk_create([Recipe(
+            name='김치볶음밥', author=self.author, description='', cooking_time=15, difficulty='easy', serving_size=1
+        )])
+        self.assertEqual(len(self.search('볶음밥', url='recipe-list')), 1)
+        self.assertEqual(rebuild_search_index(), {'article': 3, 'recipe': 2})
+        self.assertEqual(len(self.search('볶음밥', url='recipe-list')), 2)
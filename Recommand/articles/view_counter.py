@@ -0,0 +1,190 @@
+"""
+Buffered article view counts.
+
+ArticleViewSet.retrieve used to save the whole article on every read, which
+rewrote every column (including updated_at) and lost increments when two
+readers saved the same row. Reads now only add to a process-local buffer of
+article id -> pending views; a background thread applies the buffer every
+ARTICLE_VIEW_COUNT_FLUSH_INTERVAL_MS as
+
+    UPDATE articles_article SET views_count = views_count + n WHERE id IN (...)
+
+with one statement per distinct n, so concurrent flushes from several worker
+processes add up instead of overwriting each other.
+
+Views that are still buffered when a process dies are lost. The buffer is
+flushed from the request thread as soon as it holds
+ARTICLE_VIEW_COUNT_MAX_PENDING views, so at most that many are lost per
+process; atexit flushes the rest on a normal shutdown.
+
+A flush that fails (a lock timeout, a lost connection) puts its views back into
+the buffer and the next tick retries them. Until then request threads stop
+forcing flushes, and views that would grow the buffer past MAX_PENDING are
+dropped and counted, so the buffer stays within the same bound.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+class ViewCounter:
+    """
+    Per-process buffer of article views.
+
+    Attributes:
+        flush_interval (float): Seconds between background flushes.
+        max_pending (int): Buffered views that force a flush from the caller.
+        written (int): Views applied to the database.
+        failed (int): Flushes that failed (their views were put back).
+        dropped (int): Views discarded because the buffer was full while the database failed.
+    """
+
+    def __init__(self, flush_interval_ms, max_pending):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.pending = Counter()
+        self.pending_total = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        # Request threads do not force a flush before this time (set after a failure)
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='article-view-counter', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def increment(self, article_id, background=True):
+        """Buffer one view and return the views of this article not yet written."""
+        with self._lock:
+            retrying = time.monotonic() < self._retry_at
+            if retrying and self.pending_total >= self.max_pending:
+                self.dropped += 1
+            else:
+                self.pending[article_id] += 1
+                self.pending_total += 1
+            article_pending = self.pending[article_id]
+            full = self.pending_total >= self.max_pending and not retrying
+
+        if background:
+            self.start()
+        if full:
+            self.flush()
+        return article_pending
+
+    def pending_views(self, article_id):
+        with self._lock:
+            return self.pending.get(article_id, 0)
+
+    def flush(self):
+        """Apply the buffered views (returns the number of views written)."""
+        from .models import Article
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self.pending = self.pending, Counter()
+                self.pending_total = 0
+            if not pending:
+                return 0
+
+            # Articles with the same number of new views share one UPDATE
+            by_count = defaultdict(list)
+            for article_id, count in pending.items():
+                by_count[count].append(article_id)
+
+            total = sum(pending.values())
+            try:
+                with transaction.atomic():
+                    for count, article_ids in by_count.items():
+                        Article.objects.filter(pk__in=article_ids).update(views_count=F('views_count') + count)
+            except DatabaseError:
+                logger.exception('Failed to write %d article views, retrying on the next flush', total)
+                self._restore(pending)
+                return 0
+            self.written += total
+            return total
+
+    def _restore(self, pending):
+        # Put the views of a failed flush back, keeping the buffer within max_pending
+        with self._lock:
+            self.failed += 1
+            self._retry_at = time.monotonic() + self.flush_interval
+            room = max(self.max_pending - self.pending_total, 0)
+            for article_id, count in pending.items():
+                restored = min(count, room)
+                if restored:
+                    self.pending[article_id] += restored
+                    self.pending_total += restored
+                    room -= restored
+                self.dropped += count - restored
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+        connections.close_all()
+
+    def close(self):
+        """Stop the background thread and write the remaining views."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=max(self.flush_interval, 1) * 5)
+        self.flush()
+
+    def stats(self):
+        return {
+            'pending': self.pending_total,
+            'written': self.written,
+            'failed': self.failed,
+            'dropped': self.dropped,
+        }
+
+
+def get_view_counter():
+    """Process-wide view counter built from the settings."""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = ViewCounter(
+                    flush_interval_ms=settings.ARTICLE_VIEW_COUNT_FLUSH_INTERVAL_MS,
+                    max_pending=settings.ARTICLE_VIEW_COUNT_MAX_PENDING,
+                )
+    return _counter
+
+
+def reset_view_counter():
+    """Drop buffered views and build a new counter on next use (for tests)."""
+    global _counter
+    with _counter_lock:
+        if _counter is not None:
+            _counter._stopped.set()
+            _counter._wake.set()
+        _counter = None
+
+
+def record_article_view(article_id):
+    """Buffer a view of the article; returns its views not yet written to the database."""
+    return get_view_counter().increment(article_id, background=settings.ARTICLE_VIEW_COUNT_BACKGROUND)
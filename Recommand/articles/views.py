@@ -1,9 +1,11 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Avg, Q, Sum
+from django.db.models import Count, Avg, Q, Sum, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from .models import (
     Category, Tag, Article, Comment, Rating, Like, Dislike,
@@ -13,13 +15,27 @@ from .serializers import (
     CategorySerializer, TagSerializer, ArticleSerializer,
     CommentSerializer, RatingSerializer, LikeSerializer, DislikeSerializer,
     CookingToolSerializer, IngredientSerializer, RecipeSerializer,
-    RecipeStepSerializer, RecipeIngredientSerializer, CartItemSerializer
+    RecipeListSerializer, RecipeStepSerializer, RecipeIngredientSerializer,
+    PantryRecipeSerializer, CartItemSerializer, prefetch_recipe_relations
 )
+from .pantry_index import get_pantry_index
+from .reactions import annotate_shard_counts, react
+from .search import FullTextSearchFilter
+from .view_counter import record_article_view
+
+# Upper bound for ?limit= on the pantry search
+MAX_PANTRY_RESULTS = 50
+# Query parameters that narrow the pantry search (the list filters and ?search=)
+PANTRY_FILTER_PARAMS = ['difficulty', 'max_time', 'tool', 'search']
+
+# Query budgets per action (see Recommand.sql_instrumentation): list = count + page
+CATALOG_QUERY_BUDGET = {'list': 2, 'retrieve': 1}
 
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = CATALOG_QUERY_BUDGET
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
 
@@ -27,16 +43,53 @@ class TagViewSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = CATALOG_QUERY_BUDGET
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
 
+def article_aggregates(queryset):
+    """
+    Annotate average_rating, rating_count and comment_count.
+
+    Each aggregate is a correlated subquery, so the ratings and comments joins
+    cannot multiply each other's rows (or the tag filter's).
+    """
+    ratings = Rating.objects.filter(article=OuterRef('pk')).order_by().values('article')
+    comments = Comment.objects.filter(article=OuterRef('pk')).order_by().values('article')
+    return queryset.annotate(
+        average_rating=Subquery(ratings.annotate(value=Avg('value')).values('value')),
+        rating_count=Coalesce(
+            Subquery(ratings.annotate(count=Count('pk')).values('count'), output_field=IntegerField()), 0
+        ),
+        comment_count=Coalesce(
+            Subquery(comments.annotate(count=Count('pk')).values('count'), output_field=IntegerField()), 0
+        ),
+    )
+
 class ArticleViewSet(viewsets.ModelViewSet):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'content', 'author__username', 'category__name', 'tags__name']
     ordering_fields = ['created_at', 'updated_at', 'views_count', 'likes_count']
+    # list: count + page + tags (?search= is a subquery of both), retrieve: article + tags,
+    # sub-resources (comments, ratings, likes, dislikes): article + count + page,
+    # like/dislike: article + transaction and savepoint + insert + delete + counter update,
+    # and a savepoint + insert when the reaction creates a counter shard
+    query_budget = {
+        'list': 3, 'retrieve': 2,
+        'comments': 3, 'ratings': 3, 'likes': 3, 'dislikes': 3,
+        'like': 11, 'dislike': 11,
+    }
+
+    # Paginated sub-resources: action -> (queryset, serializer)
+    RELATIONS = {
+        'comments': (lambda: Comment.objects.select_related('author'), CommentSerializer),
+        'ratings': (lambda: Rating.objects.select_related('user'), RatingSerializer),
+        'likes': (lambda: Like.objects.select_related('user'), LikeSerializer),
+        'dislikes': (lambda: Dislike.objects.select_related('user'), DislikeSerializer),
+    }
 
     def get_queryset(self):
         queryset = Article.objects.all()
@@ -51,47 +104,60 @@ class ArticleViewSet(viewsets.ModelViewSet):
         if author:
             queryset = queryset.filter(author__username=author)
 
-        return queryset.distinct()
+        queryset = queryset.distinct()
+        if self.action in self.RELATIONS or self.action in ['like', 'dislike']:
+            # Only the article itself is needed
+            return queryset
+        return article_aggregates(annotate_shard_counts(queryset)).select_related('author', 'category').prefetch_related('tags')
+
+    def relation_page(self, relation):
+        article = self.get_object()
+        queryset, serializer_class = self.RELATIONS[relation]
+        page = self.paginate_queryset(queryset().filter(article=article).order_by('-created_at', '-id'))
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
+        return self.relation_page('comments')
+
+    @action(detail=True, methods=['get'])
+    def ratings(self, request, pk=None):
+        return self.relation_page('ratings')
+
+    @action(detail=True, methods=['get'])
+    def likes(self, request, pk=None):
+        return self.relation_page('likes')
+
+    @action(detail=True, methods=['get'])
+    def dislikes(self, request, pk=None):
+        return self.relation_page('dislikes')
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.views_count += 1
-        instance.save()
+        # Buffered and written in batches (see articles.view_counter); show the count including it
+        instance.views_count += record_article_view(instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def like(self, request, pk=None):
-        article = self.get_object()
-        like, created = Like.objects.get_or_create(
-            article=article,
-            user=request.user
-        )
-        if created:
-            article.likes_count += 1
-            article.save()
-            Dislike.objects.filter(article=article, user=request.user).delete()
+        # Insert, opposite reaction removal and counter updates in one transaction
+        if react(self.get_object(), request.user, 'like'):
             return Response({'status': 'liked'})
         return Response({'status': 'already liked'})
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def dislike(self, request, pk=None):
-        article = self.get_object()
-        dislike, created = Dislike.objects.get_or_create(
-            article=article,
-            user=request.user
-        )
-        if created:
-            article.dislikes_count += 1
-            article.save()
-            Like.objects.filter(article=article, user=request.user).delete()
+        if react(self.get_object(), request.user, 'dislike'):
             return Response({'status': 'disliked'})
         return Response({'status': 'already disliked'})
 
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = CATALOG_QUERY_BUDGET
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['content', 'author__username']
     ordering_fields = ['created_at', 'updated_at']
@@ -105,6 +171,7 @@ class CookingToolViewSet(viewsets.ModelViewSet):
     queryset = CookingTool.objects.all()
     serializer_class = CookingToolSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = CATALOG_QUERY_BUDGET
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
 
@@ -112,6 +179,8 @@ class IngredientViewSet(viewsets.ModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    # add_to_cart: ingredient + get_or_create (select, savepoint, insert, release)
+    query_budget = {**CATALOG_QUERY_BUDGET, 'add_to_cart': 5}
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['price', 'name']
@@ -148,11 +217,57 @@ class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    # list: count + page + one query per prefetched relation (the full ?fields= set prefetches 4)
+    # retrieve: recipe + 4 prefetches
+    # pantry: cart + recipes + 4 prefetches, plus building the pantry index on first use
+    # and the filtered id set with list filters or ?search=
+    query_budget = {'list': 6, 'retrieve': 5, 'pantry': 8}
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description', 'author__username']
     ordering_fields = ['created_at', 'cooking_time', 'difficulty']
 
+    def requested_fields(self):
+        """Field names from ?fields=id,name,... (None when not given)."""
+        value = self.request.query_params.get('fields', '')
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        if not fields:
+            return None
+        unknown = [name for name in fields if name not in RecipeSerializer.Meta.fields]
+        if unknown:
+            raise ValidationError({
+                'fields': f'알 수 없는 필드입니다: {", ".join(unknown)} '
+                          f'(사용 가능: {", ".join(RecipeSerializer.Meta.fields)})'
+            })
+        return fields
+
+    def get_serializer_class(self):
+        # Lists are compact unless the client picks the fields it needs
+        if self.action == 'list' and self.requested_fields() is None:
+            return RecipeListSerializer
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ('list', 'retrieve'):
+            fields = self.requested_fields()
+            if fields is not None:
+                kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
     def get_queryset(self):
+        queryset = self.filtered_queryset()
+        if self.action == 'list':
+            fields = self.requested_fields()
+            if fields is None:
+                fields = RecipeListSerializer.Meta.fields
+                queryset = queryset.annotate(ingredient_count=Count('ingredients', distinct=True))
+            return prefetch_recipe_relations(queryset, fields)
+        if self.action == 'retrieve':
+            return prefetch_recipe_relations(queryset, self.requested_fields())
+        if self.action == 'add_ingredients_to_cart':
+            return queryset.prefetch_related('ingredients__ingredient')
+        return queryset
+
+    def filtered_queryset(self):
         queryset = Recipe.objects.all()
         difficulty = self.request.query_params.get('difficulty', None)
         max_time = self.request.query_params.get('max_time', None)
@@ -167,6 +282,69 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return queryset.distinct()
 
+    @action(detail=False, methods=['get'])
+    def pantry(self, request):
+        """
+        Recipes ranked by how much of their ingredient list the user already has.
+
+        Query parameters:
+            ingredients: Comma separated ingredient ids (e.g. what is in the fridge).
+            cart: Include the ingredients in the user's cart (default: true when logged in).
+            min_coverage: Minimum fraction of a recipe's ingredients that must be covered (0-1).
+            limit: Number of recipes to return (default 10, at most MAX_PANTRY_RESULTS).
+        The difficulty, max_time and tool filters of the list endpoint also apply.
+        """
+        try:
+            ingredient_ids = {
+                int(value) for value in request.query_params.get('ingredients', '').split(',') if value.strip()
+            }
+            min_coverage = float(request.query_params.get('min_coverage', 0))
+            limit = min(int(request.query_params.get('limit', 10)), MAX_PANTRY_RESULTS)
+            if limit < 1:
+                raise ValueError(limit)
+        except ValueError:
+            return Response(
+                {'error': 'ingredients는 재료 id 목록, min_coverage는 숫자, limit은 1 이상의 숫자여야 합니다.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        use_cart = request.query_params.get('cart', 'true').lower() != 'false'
+        if use_cart and request.user.is_authenticated:
+            ingredient_ids.update(
+                CartItem.objects.filter(user=request.user).values_list('ingredient_id', flat=True)
+            )
+
+        if not ingredient_ids:
+            return Response(
+                {'error': '재료(ingredients)를 지정하거나 장바구니에 재료를 담아주세요.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ranked = get_pantry_index().coverage(ingredient_ids, min_coverage=min_coverage)
+
+        # Resolve the list filters over every recipe before ranking, so a restrictive
+        # filter still finds matches that are far down the coverage order
+        if any(request.query_params.get(name) for name in PANTRY_FILTER_PARAMS):
+            allowed = set(self.filter_queryset(self.get_queryset()).values_list('id', flat=True))
+            ranked = [row for row in ranked if row[0] in allowed]
+        ranked = ranked[:limit]
+
+        recipes = prefetch_recipe_relations(Recipe.objects.filter(id__in=[row[0] for row in ranked]))
+        recipe_map = {recipe.id: recipe for recipe in recipes}
+        results = [
+            {
+                'recipe': recipe_map[recipe_id],
+                'coverage': matched / total,
+                'matched_ingredients': matched,
+                'total_ingredients': total,
+            }
+            for recipe_id, matched, total in ranked
+            if recipe_id in recipe_map
+        ]
+
+        serializer = PantryRecipeSerializer(results, many=True, context={'request': request})
+        return Response(serializer.data)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def add_ingredients_to_cart(self, request, pk=None):
         recipe = self.get_object()
@@ -220,6 +398,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
 class CartItemViewSet(viewsets.ModelViewSet):
     serializer_class = CartItemSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'clear': 1}
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at']
 
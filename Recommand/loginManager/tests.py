@@ -1,3 +1,33 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from Recommand.sql_instrumentation import enforce_query_budgets
+from .models import UserProfile
+
+
+@enforce_query_budgets
+class UserQueryBudgetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('member', password='pw123456!')
+        UserProfile.objects.create(user=self.user, nickname='멤버')
+        self.client = APIClient()
+
+    def test_login_and_logout_stay_within_budget(self):
+        response = self.client.post(
+            reverse('user-login'), {'username': 'member', 'password': 'pw123456!'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-DB-Query-Budget'], '9')
+
+        response = self.client.post(reverse('user-logout'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_list_is_scoped_to_the_user(self):
+        other = User.objects.create_user('other', password='pw')
+        UserProfile.objects.create(user=other)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(reverse('userprofile-list'))
+        self.assertEqual([profile['nickname'] for profile in response.data['results']], ['멤버'])
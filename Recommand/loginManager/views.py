@@ -23,6 +23,9 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    # 쿼리 예산 (Recommand.sql_instrumentation 참고)
+    # 로그인: 사용자 조회 + last_login 갱신 + 세션 생성, 로그아웃: 세션/사용자 조회 + 세션 삭제
+    query_budget = {'list': 2, 'retrieve': 1, 'login': 9, 'logout': 4}
 
     def get_permissions(self):
         if self.action in ['create', 'login', 'oauth_login']:
@@ -85,6 +88,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 2}
 
     def get_queryset(self):
         return UserProfile.objects.filter(user=self.request.user)
@@ -4,7 +4,9 @@
 이 모듈은 다음과 같은 모델들의 관리자 인터페이스를 제공합니다:
 - 사용자 선호도 (UserPreference)
 - 레시피 상호작용 (UserRecipeInteraction)
+- 레시피 통계 (RecipeStats)
 - 레시피 유사도 (RecipeSimilarity)
+- 유사도 빌드 기록 (RecipeSimilarityBuild)
 - 추천 이력 (RecommendationHistory)
 
 각 모델별로 적절한 필터링, 검색, 정렬 기능을 제공합니다.
@@ -12,8 +14,8 @@
 
 from django.contrib import admin
 from .models import (
-    UserPreference, UserRecipeInteraction,
-    RecipeSimilarity, RecommendationHistory
+    UserPreference, UserRecipeInteraction, RecipeStats,
+    RecipeSimilarity, RecipeSimilarityBuild, RecommendationHistory
 )
 
 @admin.register(UserPreference)
@@ -30,12 +32,24 @@ class UserRecipeInteractionAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'recipe__name']
     date_hierarchy = 'created_at'
 
+@admin.register(RecipeStats)
+class RecipeStatsAdmin(admin.ModelAdmin):
+    list_display = ['recipe', 'avg_rating', 'rating_count', 'cook_count', 'save_count', 'updated_at']
+    search_fields = ['recipe__name']
+    readonly_fields = ['rating_count', 'rating_sum', 'avg_rating', 'cook_count', 'save_count']
+
 @admin.register(RecipeSimilarity)
 class RecipeSimilarityAdmin(admin.ModelAdmin):
     list_display = ['recipe1', 'recipe2', 'similarity_score']
     list_filter = ['similarity_score']
     search_fields = ['recipe1__name', 'recipe2__name']
 
+@admin.register(RecipeSimilarityBuild)
+class RecipeSimilarityBuildAdmin(admin.ModelAdmin):
+    list_display = ['mode', 'recipe_count', 'pair_count', 'started_at', 'finished_at']
+    list_filter = ['mode']
+    date_hierarchy = 'started_at'
+
 @admin.register(RecommendationHistory)
 class RecommendationHistoryAdmin(admin.ModelAdmin):
     list_display = ['user', 'recipe', 'score', 'interacted', 'created_at']
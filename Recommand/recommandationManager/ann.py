@@ -0,0 +1,215 @@
+"""
+레시피 벡터용 근사 최근접 이웃(ANN) 인덱스 (IVF)
+
+정확한 top-k는 질의마다 모든 레시피 벡터와 내적해야 하므로 레시피 수에 비례합니다.
+IVF 인덱스는 벡터를 구면 k-means로 n_lists개 묶음으로 나누고, 질의와 가장 가까운
+n_probe개 묶음의 레시피만 정확히 점수를 매깁니다.
+
+- n_lists: 묶음 수 (기본값 √N), 클수록 묶음이 작아져 빠르지만 재현율이 떨어짐
+- n_probe: 질의당 확인할 묶음 수, 클수록 재현율이 오르고 느려짐 (n_probe = n_lists이면 정확한 검색)
+
+이 모듈은 Django ORM에 의존하지 않으며 벡터 자체는 저장하지 않습니다.
+행이 L2 정규화된 CSR 행렬(RecipeIndex.matrix 등)의 행 번호만 묶음별로 보관합니다.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from .similarity import DEFAULT_MAX_MEMORY_MB, block_size_for
+
+DEFAULT_PROBES = 8
+
+# k-means는 표본으로만 학습 (묶음당 표본 수)
+SAMPLES_PER_LIST = 64
+KMEANS_ITERATIONS = 10
+
+
+def default_list_count(n_rows):
+    return max(1, int(np.sqrt(n_rows)))
+
+
+def _assign(matrix, centroids, max_memory_mb=DEFAULT_MAX_MEMORY_MB):
+    """각 행을 내적이 가장 큰 중심에 배정 (메모리 상한에 맞춰 블록 단위로 계산)"""
+    assignments = np.empty(matrix.shape[0], dtype=np.int32)
+    block_size = block_size_for(len(centroids), max_memory_mb)
+    for start in range(0, matrix.shape[0], block_size):
+        products = matrix[start:start + block_size] @ centroids.T
+        assignments[start:start + block_size] = np.asarray(products).argmax(axis=1)
+    return assignments
+
+
+def _normalize_rows(array):
+    norms = np.linalg.norm(array, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return array / norms
+
+
+class IVFIndex:
+    """
+    묶음(inverted list)별 행 번호 목록
+
+    Attributes:
+        centroids: (n_lists, 차원) float32 배열, 행은 L2 정규화된 묶음 중심
+        lists: 묶음별 행 번호 int64 배열 목록
+    """
+
+    def __init__(self, centroids, lists):
+        self.centroids = centroids
+        self.lists = lists
+
+    @classmethod
+    def build(cls, matrix, n_lists=None, n_iter=KMEANS_ITERATIONS, seed=0,
+              max_memory_mb=DEFAULT_MAX_MEMORY_MB):
+        """
+        행이 L2 정규화된 CSR 행렬로 인덱스 생성
+
+        Parameters:
+            matrix: 레시피 × 특징 CSR 행렬
+            n_lists: 묶음 수 (None이면 √N)
+            n_iter: 구면 k-means 반복 횟수
+            seed: 중심 초기화/표본 추출용 시드 (같은 입력이면 같은 인덱스)
+        """
+        matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+
+        # 비어 있는(벡터가 0인) 행은 어느 묶음과도 유사하지 않으므로 학습에서 제외
+        filled = np.flatnonzero(np.diff(matrix.indptr))
+        n_lists = min(n_lists or default_list_count(len(filled)), max(len(filled), 1))
+
+        sample_size = min(len(filled), n_lists * SAMPLES_PER_LIST)
+        sample = matrix[rng.choice(filled, size=sample_size, replace=False)] if sample_size else matrix[:0]
+        centroids = sample[:n_lists].toarray() if sample_size else np.zeros((1, matrix.shape[1]), dtype=np.float32)
+
+        for _ in range(n_iter if sample_size else 0):
+            labels = np.asarray((sample @ centroids.T).argmax(axis=1)).ravel()
+            membership = sparse.csr_matrix(
+                (np.ones(sample_size, dtype=np.float32), (labels, np.arange(sample_size))),
+                shape=(len(centroids), sample_size),
+            )
+            sums = np.asarray((membership @ sample).todense())
+            # 빈 묶음은 임의의 표본으로 다시 시작
+            empty = np.flatnonzero(np.asarray(membership.sum(axis=1)).ravel() == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(sample_size, size=len(empty))].toarray()
+            centroids = _normalize_rows(sums)
+
+        centroids = centroids.astype(np.float32)
+        assignments = _assign(matrix, centroids, max_memory_mb)
+        assignments[np.diff(matrix.indptr) == 0] = -1
+        return cls(centroids, cls._group(assignments, len(centroids)))
+
+    @staticmethod
+    def _group(assignments, n_lists):
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        return [order[bounds[i]:bounds[i + 1]].astype(np.int64) for i in range(n_lists)]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_arrays(data['centroids'], data['offsets'], data['rows'])
+
+    @classmethod
+    def from_arrays(cls, centroids, offsets, rows):
+        return cls(centroids, [rows[offsets[i]:offsets[i + 1]] for i in range(len(centroids))])
+
+    def to_arrays(self):
+        """(centroids, offsets, rows) - 묶음 i의 행 번호는 rows[offsets[i]:offsets[i + 1]]"""
+        offsets = np.zeros(len(self.lists) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(rows) for rows in self.lists])
+        rows = np.concatenate(self.lists) if self.lists else np.zeros(0, dtype=np.int64)
+        return self.centroids, offsets, rows
+
+    def save(self, path):
+        centroids, offsets, rows = self.to_arrays()
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, centroids=centroids, offsets=offsets, rows=rows)
+
+    @property
+    def n_lists(self):
+        return len(self.lists)
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.lists)
+
+    def add(self, first_row, vectors):
+        """행 번호 first_row부터 시작하는 새 벡터를 가장 가까운 묶음에 추가"""
+        vectors = sparse.csr_matrix(vectors, dtype=np.float32)
+        filled = np.diff(vectors.indptr) > 0
+        if not filled.any():
+            return
+        rows = np.arange(first_row, first_row + vectors.shape[0], dtype=np.int64)[filled]
+        assignments = _assign(vectors[filled], self.centroids)
+        for list_id in np.unique(assignments):
+            # 묶음 배열을 통째로 바꿔 동시에 읽는 검색이 반쯤 바뀐 배열을 보지 않게 함
+            self.lists[list_id] = np.concatenate([self.lists[list_id], rows[assignments == list_id]])
+
+    def candidates(self, query_vectors, n_probe=DEFAULT_PROBES):
+        """질의별로 가까운 n_probe개 묶음의 행 번호 (질의 수만큼의 배열 목록)"""
+        n_probe = min(n_probe, self.n_lists)
+        products = np.asarray(sparse.csr_matrix(query_vectors) @ self.centroids.T)
+        if n_probe < self.n_lists:
+            probes = np.argpartition(-products, n_probe - 1, axis=1)[:, :n_probe]
+        else:
+            probes = np.broadcast_to(np.arange(self.n_lists), products.shape)
+        return [
+            np.concatenate([self.lists[list_id] for list_id in row_probes])
+            for row_probes in probes
+        ]
+
+    def search(self, matrix, query_vectors, k=20, n_probe=DEFAULT_PROBES, threshold=0.0, exclude_rows=None):
+        """
+        질의별 상위 k개 행을 근사 검색
+
+        Parameters:
+            matrix: 인덱스를 만든 CSR 행렬 (이후 덧붙인 행 포함)
+            query_vectors: 질의 CSR 행렬 (행은 L2 정규화)
+            exclude_rows: 질의별로 결과에서 뺄 행 번호 (자기 자신 제외용)
+
+        Returns:
+            (indices, scores) - similarity.top_k_similarity와 같은 (질의 수, k) 배열
+        """
+        query_vectors = sparse.csr_matrix(query_vectors, dtype=np.float32)
+        indices = np.full((query_vectors.shape[0], k), -1, dtype=np.int32)
+        scores = np.zeros((query_vectors.shape[0], k), dtype=np.float32)
+
+        for i, rows in enumerate(self.candidates(query_vectors, n_probe)):
+            # 검색 도중 덧붙은 행은 행렬 스냅샷에 없으므로 제외
+            rows = rows[rows < matrix.shape[0]]
+            if exclude_rows is not None:
+                rows = rows[rows != exclude_rows[i]]
+            if not len(rows):
+                continue
+
+            row_scores = (matrix[rows] @ query_vectors[i].T).toarray().ravel()
+            keep = (row_scores > 0) & (row_scores >= threshold)
+            rows, row_scores = rows[keep], row_scores[keep]
+            if len(rows) > k:
+                top = np.argpartition(-row_scores, k - 1)[:k]
+                rows, row_scores = rows[top], row_scores[top]
+            order = np.argsort(-row_scores, kind='stable')
+            indices[i, :len(order)] = rows[order]
+            scores[i, :len(order)] = row_scores[order]
+        return indices, scores
+
+
+def approximate_top_k_neighbours(matrix, k=20, threshold=0.1, rows=None,
+                                 n_lists=None, n_probe=DEFAULT_PROBES, batch_size=1000):
+    """
+    similarity.top_k_neighbours의 근사 버전 (행렬 전체로 IVF 인덱스를 만든 뒤 행별로 검색)
+
+    Yields:
+        (row, neighbour_rows, scores) - 점수 내림차순으로 정렬된 배열
+    """
+    matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+    index = IVFIndex.build(matrix, n_lists=n_lists)
+    rows = np.arange(matrix.shape[0]) if rows is None else np.asarray(rows, dtype=np.int64)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        indices, scores = index.search(
+            matrix, matrix[batch], k=k, n_probe=n_probe, threshold=threshold, exclude_rows=batch
+        )
+        for row, row_indices, row_scores in zip(batch, indices, scores):
+            keep = row_indices >= 0
+            yield int(row), row_indices[keep], row_scores[keep]
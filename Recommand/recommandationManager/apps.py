@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RecommandationmanagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recommandationManager'
+
+    def ready(self):
+        # 추천 캐시 무효화 시그널 등록
+        import recommandationManager.signals
@@ -0,0 +1,291 @@
+"""
+API 엔드포인트 지연 시간/쿼리 수 벤치마크 모듈 (benchmark_endpoints 명령에서 사용)
+
+1. seed_benchmark_data: 설정한 수의 레시피, 사용자, 상호작용을 bulk_create로 생성
+   - 재료와 레시피 인기도는 일부 항목에 몰리도록(Zipf 분포와 비슷하게) 뽑음
+   - 같은 seed면 같은 데이터가 만들어지므로 실행 간 결과를 비교할 수 있음
+2. run_benchmark: Django 테스트 클라이언트로 엔드포인트별 요청을 반복하고
+   요청마다 지연 시간과 SQL 쿼리 수를 기록
+3. compare_results: 이전 실행 결과(JSON)와 비교해 p95 지연 시간이나 쿼리 수가 늘어난 엔드포인트를 찾음
+
+쿼리 수는 CaptureQueriesContext로 요청 스레드의 쿼리만 셉니다
+(백그라운드 이력 저장 스레드의 쿼리는 포함되지 않음).
+"""
+
+import random
+import time
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from articles.models import Category, Ingredient, Recipe, RecipeIngredient, RecipeStep
+from . import cache as recommendation_cache
+from .models import UserPreference, UserRecipeInteraction
+
+BATCH_SIZE = 1000
+
+# 로그인한 클라이언트를 이 수만큼 만들어 요청마다 돌아가며 사용
+MAX_CLIENTS = 20
+
+
+def _skewed_weights(n, rng):
+    """앞쪽 몇 개 항목에 몰리는 선택 가중치 (순서는 섞음)"""
+    weights = [1 / (rank + 1) for rank in range(n)]
+    rng.shuffle(weights)
+    return weights
+
+
+def _skewed_sample(population, weights, size, rng):
+    """가중치에 따라 중복 없이 size개 선택"""
+    size = min(size, len(population))
+    chosen = set()
+    while len(chosen) < size:
+        chosen.update(rng.choices(population, weights=weights, k=size - len(chosen)))
+    return list(chosen)
+
+
+def seed_benchmark_data(recipes=2000, users=200, interactions=20000, ingredients=300, categories=12, seed=0):
+    """
+    벤치마크용 데이터 생성
+
+    bulk_create는 시그널을 보내지 않으므로 유사도, 통계, 협업 필터링 모델은
+    호출한 쪽에서 따로 만들어야 합니다 (benchmark_endpoints 명령 참고).
+
+    Returns:
+        생성한 행 수 dict
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+
+    Category.objects.bulk_create(
+        [Category(name=f'벤치마크 카테고리 {i}') for i in range(categories)], batch_size=BATCH_SIZE
+    )
+    category_ids = list(Category.objects.filter(name__startswith='벤치마크 카테고리').values_list('id', flat=True))
+
+    Ingredient.objects.bulk_create([
+        Ingredient(name=f'벤치마크재료{i}', price=rng.randint(5, 200) * 100, unit='개', stock=10 ** 6)
+        for i in range(ingredients)
+    ], batch_size=BATCH_SIZE)
+    ingredient_ids = list(Ingredient.objects.filter(name__startswith='벤치마크재료').values_list('id', flat=True))
+    ingredient_weights = _skewed_weights(len(ingredient_ids), rng)
+
+    author = User.objects.create(username='benchmark-author', password=password)
+    User.objects.bulk_create(
+        [User(username=f'benchmark-user-{i}', password=password) for i in range(users)], batch_size=BATCH_SIZE
+    )
+    user_ids = list(User.objects.filter(username__startswith='benchmark-user-').values_list('id', flat=True))
+
+    difficulties = [choice for choice, _ in Recipe.DIFFICULTY_CHOICES]
+    Recipe.objects.bulk_create([
+        Recipe(
+            name=f'벤치마크 레시피 {i}',
+            author=author,
+            description=f'벤치마크 레시피 {i} 설명',
+            cooking_time=rng.randint(2, 24) * 5,
+            difficulty=rng.choice(difficulties),
+            serving_size=rng.randint(1, 4),
+        ) for i in range(recipes)
+    ], batch_size=BATCH_SIZE)
+    recipe_ids = list(Recipe.objects.filter(author=author).order_by('id').values_list('id', flat=True))
+
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id, quantity=rng.randint(1, 3), unit='개')
+        for recipe_id in recipe_ids
+        for ingredient_id in _skewed_sample(ingredient_ids, ingredient_weights, rng.randint(3, 10), rng)
+    ], batch_size=BATCH_SIZE)
+    RecipeStep.objects.bulk_create([
+        RecipeStep(recipe_id=recipe_id, step_number=step, description=f'{step}단계')
+        for recipe_id in recipe_ids
+        for step in range(1, 4)
+    ], batch_size=BATCH_SIZE)
+    Recipe.categories.through.objects.bulk_create([
+        Recipe.categories.through(recipe_id=recipe_id, category_id=category_id)
+        for recipe_id in recipe_ids
+        for category_id in rng.sample(category_ids, min(2, len(category_ids)))
+    ], batch_size=BATCH_SIZE)
+
+    skill_levels = [choice for choice, _ in UserPreference.SKILL_LEVEL_CHOICES]
+    UserPreference.objects.bulk_create([
+        UserPreference(user_id=user_id, preferred_difficulty=rng.choice(skill_levels))
+        for user_id in user_ids
+    ], batch_size=BATCH_SIZE)
+    preference_ids = UserPreference.objects.filter(user_id__in=user_ids).values_list('id', flat=True)
+    UserPreference.favorite_categories.through.objects.bulk_create([
+        UserPreference.favorite_categories.through(userpreference_id=preference_id, category_id=category_id)
+        for preference_id in preference_ids
+        for category_id in rng.sample(category_ids, min(2, len(category_ids)))
+    ], batch_size=BATCH_SIZE)
+
+    # (사용자, 레시피, 유형)은 유일해야 하므로 가능한 조합 수까지만 생성
+    interaction_types = [choice for choice, _ in UserRecipeInteraction.INTERACTION_TYPES]
+    interactions = min(interactions, len(user_ids) * len(recipe_ids) * len(interaction_types))
+    recipe_weights = _skewed_weights(len(recipe_ids), rng)
+    seen = set()
+    while len(seen) < interactions:
+        batch = zip(
+            rng.choices(user_ids, k=interactions - len(seen)),
+            rng.choices(recipe_ids, weights=recipe_weights, k=interactions - len(seen)),
+            rng.choices(interaction_types, k=interactions - len(seen)),
+        )
+        seen.update(batch)
+    UserRecipeInteraction.objects.bulk_create([
+        UserRecipeInteraction(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            interaction_type=interaction_type,
+            rating=rng.randint(1, 5) if interaction_type == 'rate' else None,
+        ) for user_id, recipe_id, interaction_type in sorted(seen)
+    ], batch_size=BATCH_SIZE)
+
+    return {
+        'recipes': len(recipe_ids),
+        'users': len(user_ids),
+        'interactions': len(seen),
+        'ingredients': len(ingredient_ids),
+        'categories': len(category_ids),
+    }
+
+
+class Endpoint:
+    """
+    벤치마크할 요청 하나
+
+    Attributes:
+        name: 결과에 쓰이는 이름
+        method: 'get' 또는 'post'
+        url: (요청 정보 dict) -> URL 함수
+        data: POST 본문
+        before: 요청 전에 호출할 함수 (측정 시간에 포함하지 않음)
+    """
+
+    def __init__(self, name, method, url, data=None, before=None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data
+        self.before = before
+
+
+ENDPOINTS = [
+    # 캐시된 추천 순위 (응답마다 직렬화와 이력 저장은 수행)
+    Endpoint('recommendations', 'get', lambda request: reverse('recipe-recommendations')),
+    # 매번 사용자 캐시를 무효화해 추천 순위 계산 경로를 측정
+    Endpoint(
+        'recommendations_uncached', 'get', lambda request: reverse('recipe-recommendations'),
+        before=lambda request: recommendation_cache.bump_user_version(request['user'].id),
+    ),
+    Endpoint('recipe_list', 'get', lambda request: reverse('recipe-list')),
+    Endpoint('recipe_detail', 'get', lambda request: reverse('recipe-detail', args=[request['recipe_id']])),
+    Endpoint(
+        'cart_add_ingredient', 'post',
+        lambda request: reverse('ingredient-add-to-cart', args=[request['ingredient_id']]),
+        data={'quantity': 1},
+    ),
+    Endpoint(
+        'cart_add_recipe', 'post',
+        lambda request: reverse('recipe-add-ingredients-to-cart', args=[request['recipe_id']]),
+        data={'serving_size': 1},
+    ),
+    Endpoint('cart_summary', 'get', lambda request: reverse('cart-summary')),
+    Endpoint('cart_clear', 'post', lambda request: reverse('cart-clear')),
+]
+
+
+def summarize(latencies, query_counts, errors):
+    """요청별 측정값을 p50/p95/p99 지연 시간(ms)과 쿼리 수 요약으로 변환"""
+    latencies = np.asarray(latencies) * 1000
+    query_counts = np.asarray(query_counts)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'queries_mean': round(float(query_counts.mean()), 2),
+        'queries_max': int(query_counts.max()),
+    }
+
+
+def run_benchmark(iterations=200, warmup=10, endpoints=None, seed=0):
+    """
+    엔드포인트별로 iterations번 요청해 지연 시간과 쿼리 수를 측정
+
+    요청마다 사용자, 레시피, 재료를 무작위로 바꾸며, 처음 warmup번의 요청
+    (인덱스 로드 등 첫 요청 비용)은 결과에서 뺍니다.
+
+    Parameters:
+        endpoints: 측정할 엔드포인트 이름 목록 (기본값: ENDPOINTS 전체)
+
+    Returns:
+        {엔드포인트 이름: summarize 결과}
+    """
+    selected = [endpoint for endpoint in ENDPOINTS if endpoints is None or endpoint.name in endpoints]
+
+    users = list(User.objects.filter(preferences__isnull=False).order_by('id')[:MAX_CLIENTS])
+    recipe_ids = list(Recipe.objects.filter(ingredients__isnull=False).distinct().values_list('id', flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    if not users or not recipe_ids or not ingredient_ids:
+        raise ValueError('선호도가 있는 사용자, 재료가 있는 레시피, 재료가 필요합니다 (seed_benchmark_data 참고).')
+
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        clients.append((user, client))
+
+    results = {}
+    for endpoint in selected:
+        # 엔드포인트별 난수열을 따로 두어 일부만 측정해도 같은 요청 순서가 나오게 함
+        rng = random.Random(f'{seed}-{endpoint.name}')
+        latencies, query_counts, errors = [], [], 0
+        for i in range(warmup + iterations):
+            user, client = clients[i % len(clients)]
+            request = {
+                'user': user,
+                'recipe_id': rng.choice(recipe_ids),
+                'ingredient_id': rng.choice(ingredient_ids),
+            }
+            if endpoint.before is not None:
+                endpoint.before(request)
+            url = endpoint.url(request)
+
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                if endpoint.method == 'post':
+                    response = client.post(url, endpoint.data or {}, content_type='application/json')
+                else:
+                    response = client.get(url)
+                elapsed = time.perf_counter() - start
+
+            if i < warmup:
+                continue
+            latencies.append(elapsed)
+            query_counts.append(len(queries))
+            errors += response.status_code >= 400
+        results[endpoint.name] = summarize(latencies, query_counts, errors)
+    return results
+
+
+def compare_results(baseline, current, tolerance=0.2):
+    """
+    이전 실행 결과와 비교해 느려진 엔드포인트 목록을 반환
+
+    p95 지연 시간이 tolerance(비율) 넘게 늘었거나 평균 쿼리 수가 늘어난 엔드포인트를
+    (이름, 설명) 튜플로 반환합니다. 한쪽에만 있는 엔드포인트는 비교하지 않습니다.
+    """
+    regressions = []
+    for name, result in current.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['queries_mean'] > previous['queries_mean']:
+            regressions.append((name, f'queries {previous["queries_mean"]} -> {result["queries_mean"]}'))
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append((name, f'p95 {previous["p95_ms"]}ms -> {result["p95_ms"]}ms'))
+    return regressions
@@ -0,0 +1,121 @@
+"""
+사용자별 추천 결과 캐시
+
+추천 결과(레시피 id, 점수, 이유 목록)를 버전 스탬프가 포함된 키로 캐시합니다.
+- 전역 버전: 레시피, 레시피 재료, 레시피 카테고리, 레시피 유사도가 바뀌면 증가
+- 사용자 버전: 해당 사용자의 선호도나 레시피 상호작용이 바뀌면 증가
+
+카테고리별 레시피 id 배열도 전역 버전이 포함된 키로 캐시합니다 (category_sampler 참조).
+
+버전이 바뀌면 키가 달라지므로 이전 결과는 따로 지우지 않아도 다시 읽히지 않고,
+TTL(RECOMMENDATION_CACHE_TIMEOUT)이 지나면 만료됩니다. 다른 사용자의 평가로 인한
+인기 레시피 변화도 TTL 안에서 반영됩니다.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+GLOBAL_VERSION_KEY = 'recommendations:version:global'
+USER_VERSION_KEY = 'recommendations:version:user:{user_id}'
+RESULT_KEY = 'recommendations:result:{user_id}:{global_version}:{user_version}'
+CATEGORY_RECIPES_KEY = 'recommendations:category:{category_id}:{global_version}'
+HITS_KEY = 'recommendations:stats:hits'
+MISSES_KEY = 'recommendations:stats:misses'
+
+
+def _new_version():
+    # 캐시에서 버전이 밀려나도 예전 결과 키와 겹치지 않도록 시각 기반으로 시작
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def _versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def _result_key(user_id):
+    user_version_key = USER_VERSION_KEY.format(user_id=user_id)
+    versions = _versions([GLOBAL_VERSION_KEY, user_version_key])
+
+    return RESULT_KEY.format(
+        user_id=user_id,
+        global_version=versions[GLOBAL_VERSION_KEY],
+        user_version=versions[user_version_key]
+    )
+
+
+def _category_keys(category_ids):
+    global_version = _versions([GLOBAL_VERSION_KEY])[GLOBAL_VERSION_KEY]
+    return {
+        category_id: CATEGORY_RECIPES_KEY.format(category_id=category_id, global_version=global_version)
+        for category_id in category_ids
+    }
+
+
+def get_category_recipe_ids(category_ids):
+    """캐시된 카테고리별 레시피 id 배열을 {category_id: 배열}로 반환 (없는 카테고리는 제외)"""
+    keys = _category_keys(category_ids)
+    cached = cache.get_many(keys.values())
+    return {category_id: cached[key] for category_id, key in keys.items() if key in cached}
+
+
+def set_category_recipe_ids(recipe_ids_by_category):
+    keys = _category_keys(recipe_ids_by_category)
+    cache.set_many(
+        {keys[category_id]: recipe_ids for category_id, recipe_ids in recipe_ids_by_category.items()},
+        timeout=settings.RECOMMENDATION_CACHE_TIMEOUT
+    )
+
+
+def get_recommendations(user_id):
+    """캐시된 추천 후보 목록을 반환 (없으면 None)"""
+    candidates = cache.get(_result_key(user_id))
+    _count(HITS_KEY if candidates is not None else MISSES_KEY)
+    return candidates
+
+
+def set_recommendations(user_id, candidates):
+    """(recipe_id, score, reason) 목록을 현재 버전 키로 저장"""
+    cache.set(_result_key(user_id), candidates, timeout=settings.RECOMMENDATION_CACHE_TIMEOUT)
+
+
+def bump_user_version(user_id):
+    _bump(USER_VERSION_KEY.format(user_id=user_id))
+
+
+def bump_global_version():
+    _bump(GLOBAL_VERSION_KEY)
+
+
+def get_stats():
+    """모니터링용 캐시 적중/미스 카운터"""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else None,
+    }
@@ -0,0 +1,94 @@
+"""
+선호 카테고리에서 레시피를 무작위로 뽑는 모듈
+
+order_by('?')는 조건에 맞는 모든 행에 난수를 붙여 정렬하므로 요청마다 전체를
+훑습니다. 대신 카테고리별 레시피 id를 정렬된 배열로 캐시해 두고(전역 버전 키),
+배열에서 k개의 위치를 뽑은 뒤 사용자 필터는 뽑힌 id에만 적용합니다.
+
+- category_recipe_ids: 카테고리별 레시피 id 배열 (캐시 미스는 한 번의 쿼리로 채움)
+- sample_category_recipes: 필터를 통과하는 레시피 k개를 무작위로 선택
+"""
+
+import numpy as np
+
+from articles.models import Recipe
+from . import cache as recommendation_cache
+
+# 필터에 걸러질 것을 감안해 처음에 뽑는 배수, 부족하면 라운드마다 늘림
+OVERSAMPLE = 2
+MAX_ROUNDS = 3
+
+
+def category_recipe_ids(category_ids):
+    """{category_id: 정렬된 레시피 id 배열} (레시피가 없는 카테고리는 빈 배열)"""
+    category_ids = list(category_ids)
+    arrays = recommendation_cache.get_category_recipe_ids(category_ids)
+
+    missing = [category_id for category_id in category_ids if category_id not in arrays]
+    if missing:
+        grouped = {category_id: [] for category_id in missing}
+        memberships = Recipe.categories.through.objects.filter(
+            category_id__in=missing
+        ).order_by('category_id', 'recipe_id').values_list('category_id', 'recipe_id')
+        for category_id, recipe_id in memberships:
+            grouped[category_id].append(recipe_id)
+
+        loaded = {
+            category_id: np.array(recipe_ids, dtype=np.int64)
+            for category_id, recipe_ids in grouped.items()
+        }
+        recommendation_cache.set_category_recipe_ids(loaded)
+        arrays.update(loaded)
+
+    return arrays
+
+
+def _draw(arrays, size, rng):
+    """카테고리 크기에 비례해 카테고리를 고르고 그 배열에서 임의 위치를 뽑음 (중복 허용, O(size))"""
+    sizes = np.array([len(array) for array in arrays])
+    categories = rng.choice(len(arrays), size=size, p=sizes / sizes.sum())
+    offsets = rng.integers(0, sizes[categories])
+    return [int(arrays[category][offset]) for category, offset in zip(categories, offsets)]
+
+
+def sample_category_recipes(category_ids, recipes, k, exclude=(), rng=None):
+    """
+    선호 카테고리의 레시피 중 필터를 통과하는 레시피를 최대 k개 무작위로 선택
+
+    Parameters:
+        category_ids: 선호 카테고리 id 목록
+        recipes: 사용자 필터가 적용된 레시피 쿼리셋
+        k: 뽑을 레시피 수
+        exclude: 이미 추천 후보에 있는 레시피 id
+
+    Returns:
+        레시피 id 목록
+    """
+    rng = rng or np.random.default_rng()
+    arrays = [array for array in category_recipe_ids(category_ids).values() if len(array)]
+    if not arrays or k <= 0:
+        return []
+
+    total = sum(len(array) for array in arrays)
+    exclude = set(exclude)
+    picked = []
+    size = k * OVERSAMPLE
+    for _ in range(MAX_ROUNDS):
+        if size >= total:
+            # 카테고리가 작으면 전체를 섞어 한 번에 확인
+            drawn = rng.permutation(np.unique(np.concatenate(arrays))).tolist()
+        else:
+            drawn = _draw(arrays, size, rng)
+
+        drawn = [recipe_id for recipe_id in dict.fromkeys(drawn) if recipe_id not in exclude]
+        allowed = set(recipes.filter(id__in=drawn).values_list('id', flat=True)) if drawn else set()
+        for recipe_id in drawn:
+            if recipe_id in allowed:
+                picked.append(recipe_id)
+                exclude.add(recipe_id)
+
+        if len(picked) >= k or size >= total:
+            break
+        size *= 4
+
+    return picked[:k]
@@ -0,0 +1,248 @@
+"""
+사용자 상호작용 기반 아이템-아이템 협업 필터링 모듈
+
+학습(오프라인, train_item_cf 명령):
+1. UserRecipeInteraction을 (사용자, 레시피, 가중치) 배열로 읽어 사용자 × 레시피 희소 행렬 생성
+   - 상호작용 유형별 가중치(조회, 저장, 요리완료, 평가)는 설정 가능, 평가는 점수/5를 곱함
+2. 레시피 벡터(열)를 L2 정규화하고 similarity.iter_top_k_blocks로 레시피별 상위 k개 이웃만 계산
+   (레시피 × 레시피 전체 행렬은 만들지 않으므로 메모리 상한 안에서 동작)
+3. 이웃 행렬을 CSR 배열로 .npz에 저장 (pickle 미사용)
+
+추천(온라인):
+사용자의 상호작용 가중치 벡터 u와 이웃 행렬 S의 희소 곱 u·S가 레시피별 점수입니다.
+"""
+
+import itertools
+import threading
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from .similarity import DEFAULT_MAX_MEMORY_MB, iter_top_k_blocks
+
+# 상호작용 유형별 기본 가중치 ('rate'는 평가 점수/5를 곱해서 사용)
+DEFAULT_INTERACTION_WEIGHTS = {
+    'view': 1.0,
+    'save': 3.0,
+    'cook': 4.0,
+    'rate': 5.0,
+}
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def interaction_weights(interaction_types, ratings, weights=None):
+    """
+    상호작용 유형/평가 점수 배열을 가중치 배열로 변환
+
+    Parameters:
+        interaction_types: 상호작용 유형 문자열 배열
+        ratings: 평가 점수 배열 (없으면 NaN)
+        weights: 유형별 가중치 dict (기본값: DEFAULT_INTERACTION_WEIGHTS)
+    """
+    weights = {**DEFAULT_INTERACTION_WEIGHTS, **(weights or {})}
+    interaction_types = np.asarray(interaction_types)
+    ratings = np.asarray(ratings, dtype=np.float32)
+
+    values = np.zeros(len(interaction_types), dtype=np.float32)
+    for interaction_type, weight in weights.items():
+        values[interaction_types == interaction_type] = weight
+
+    rated = (interaction_types == 'rate') & ~np.isnan(ratings)
+    values[rated] *= ratings[rated] / 5
+    return values
+
+
+def interaction_arrays(rows, chunk_size=10000):
+    """
+    (user_id, recipe_id, interaction_type, rating) 튜플의 iterable을 열별 배열로 변환
+
+    행을 chunk_size개씩 읽어 바로 배열로 옮기므로 파이썬 객체는 한 묶음만큼만 메모리에 남습니다.
+    평가 점수가 없는(None) 행은 NaN으로 채웁니다.
+    """
+    rows = iter(rows)
+    user_ids, recipe_ids, interaction_types, ratings = [], [], [], []
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        count = len(chunk)
+        user_ids.append(np.fromiter((row[0] for row in chunk), dtype=np.int64, count=count))
+        recipe_ids.append(np.fromiter((row[1] for row in chunk), dtype=np.int64, count=count))
+        interaction_types.append(np.array([row[2] for row in chunk], dtype=str))
+        ratings.append(np.fromiter(
+            (np.nan if row[3] is None else row[3] for row in chunk), dtype=np.float32, count=count
+        ))
+    return (
+        np.concatenate(user_ids) if user_ids else np.array([], dtype=np.int64),
+        np.concatenate(recipe_ids) if recipe_ids else np.array([], dtype=np.int64),
+        np.concatenate(interaction_types) if interaction_types else np.array([], dtype=str),
+        np.concatenate(ratings) if ratings else np.array([], dtype=np.float32),
+    )
+
+
+def build_interaction_matrix(user_ids, recipe_ids, values):
+    """
+    (사용자, 레시피, 가중치) 배열로 사용자 × 레시피 CSR 행렬 생성
+
+    같은 사용자-레시피 쌍의 가중치는 합산됩니다.
+
+    Returns:
+        (matrix, recipe_index) - recipe_index는 열 번호별 레시피 id (정렬됨)
+    """
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+    _, rows = np.unique(user_ids, return_inverse=True)
+    recipe_index, columns = np.unique(recipe_ids, return_inverse=True)
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(values, dtype=np.float32), (rows, columns)),
+        shape=(rows.max() + 1 if len(rows) else 0, len(recipe_index)),
+    )
+    matrix.sum_duplicates()
+    matrix.eliminate_zeros()
+    return matrix, recipe_index
+
+
+class ItemItemModel:
+    """
+    레시피별 상위 k개 이웃 행렬
+
+    Attributes:
+        recipe_ids: 행/열 번호별 레시피 id (정렬된 int64 배열)
+        neighbours: 레시피 × 레시피 CSR 행렬, 행마다 상위 k개 코사인 유사도
+        weights: 학습에 사용한 상호작용 유형별 가중치
+    """
+
+    def __init__(self, recipe_ids, neighbours, weights):
+        self.recipe_ids = recipe_ids
+        self.neighbours = neighbours
+        self.weights = weights
+
+    @classmethod
+    def train(cls, user_ids, recipe_ids, interaction_types, ratings, weights=None,
+              k=50, threshold=0.0, max_memory_mb=DEFAULT_MAX_MEMORY_MB, n_jobs=None):
+        """상호작용 배열로 모델 학습"""
+        weights = {**DEFAULT_INTERACTION_WEIGHTS, **(weights or {})}
+        values = interaction_weights(interaction_types, ratings, weights)
+        matrix, recipe_index = build_interaction_matrix(user_ids, recipe_ids, values)
+
+        # 레시피 벡터(사용자 축)를 정규화하면 행 간 내적이 코사인 유사도
+        item_vectors = normalize(matrix.T.tocsr(), norm='l2', axis=1)
+
+        rows, columns, scores = [], [], []
+        for block_rows, indices, block_scores in iter_top_k_blocks(
+            item_vectors, k=k, threshold=threshold, max_memory_mb=max_memory_mb, n_jobs=n_jobs
+        ):
+            keep = indices >= 0
+            rows.append(np.repeat(block_rows, keep.sum(axis=1)))
+            columns.append(indices[keep])
+            scores.append(block_scores[keep])
+
+        n = len(recipe_index)
+        neighbours = sparse.csr_matrix(
+            (
+                np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32),
+                (
+                    np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64),
+                    np.concatenate(columns) if columns else np.zeros(0, dtype=np.int32),
+                ),
+            ),
+            shape=(n, n), dtype=np.float32,
+        )
+        return cls(recipe_index, neighbours, weights)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            n = len(data['recipe_ids'])
+            return cls(
+                recipe_ids=data['recipe_ids'],
+                neighbours=sparse.csr_matrix(
+                    (data['data'], data['indices'], data['indptr']), shape=(n, n)
+                ),
+                weights=dict(zip(data['weight_names'].tolist(), data['weight_values'].tolist())),
+            )
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            np.savez_compressed(
+                file,
+                recipe_ids=self.recipe_ids.astype(np.int64),
+                data=self.neighbours.data.astype(np.float32),
+                indices=self.neighbours.indices.astype(np.int32),
+                indptr=self.neighbours.indptr.astype(np.int64),
+                weight_names=np.array(list(self.weights), dtype=str),
+                weight_values=np.array(list(self.weights.values()), dtype=np.float32),
+            )
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def score(self, recipe_ids, interaction_types, ratings, top_n=10, exclude_seen=True):
+        """
+        사용자의 상호작용 이력으로 레시피 점수를 계산
+
+        Parameters:
+            recipe_ids / interaction_types / ratings: 사용자의 상호작용 배열
+            top_n: 반환할 최대 레시피 수
+            exclude_seen: 이미 상호작용한 레시피 제외 여부
+
+        Returns:
+            (recipe_id, score) 튜플의 목록, 점수 내림차순
+        """
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        if len(recipe_ids) == 0 or len(self.recipe_ids) == 0:
+            return []
+
+        # 모델 학습 이후 생긴 레시피는 이웃이 없으므로 무시
+        columns = np.searchsorted(self.recipe_ids, recipe_ids)
+        columns = np.minimum(columns, len(self.recipe_ids) - 1)
+        known = self.recipe_ids[columns] == recipe_ids
+        if not known.any():
+            return []
+
+        values = interaction_weights(np.asarray(interaction_types)[known], np.asarray(ratings)[known], self.weights)
+        history = sparse.csr_matrix(
+            (values, (np.zeros(known.sum(), dtype=np.int64), columns[known])),
+            shape=(1, len(self.recipe_ids)),
+        )
+        scores = (history @ self.neighbours).toarray()[0]
+        if exclude_seen:
+            scores[columns[known]] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-scores[candidates], top_n - 1)[:top_n]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(self.recipe_ids[column]), float(scores[column])) for column in candidates]
+
+
+def get_item_cf_model():
+    """
+    프로세스 전역 협업 필터링 모델을 반환
+
+    ITEM_CF_MODEL_PATH 파일이 없으면 None (학습은 train_item_cf 명령으로만 수행)
+    """
+    global _model, _model_loaded
+    if not _model_loaded:
+        with _model_lock:
+            if not _model_loaded:
+                import os
+                from django.conf import settings
+
+                path = getattr(settings, 'ITEM_CF_MODEL_PATH', None)
+                _model = ItemItemModel.load(path) if path and os.path.exists(path) else None
+                _model_loaded = True
+    return _model
+
+
+def reset_item_cf_model():
+    """다음 사용 시 모델 파일을 다시 읽도록 초기화"""
+    global _model, _model_loaded
+    with _model_lock:
+        _model = None
+        _model_loaded = False
@@ -0,0 +1,150 @@
+"""
+추천 이력(RecommendationHistory)을 요청 밖에서 모아서 저장하는 모듈
+
+추천 응답마다 INSERT를 기다리지 않도록 이력을 프로세스 내 큐에 넣고,
+백그라운드 스레드가 RECOMMENDATION_HISTORY_BATCH_SIZE개가 모이거나
+RECOMMENDATION_HISTORY_FLUSH_INTERVAL_MS가 지날 때마다 bulk_create로 저장합니다.
+
+- 큐가 RECOMMENDATION_HISTORY_MAX_BUFFER개를 넘으면 새 이력은 버리고 dropped로 셉니다.
+- 프로세스 종료 시(atexit) 남은 이력을 저장합니다.
+- recommendation_id는 큐에 넣기 전에 정해지므로 저장 전에도 응답에 사용할 수 있습니다.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class HistoryWriter:
+    """
+    RecommendationHistory 배치 저장기
+
+    Attributes:
+        batch_size: 한 번에 저장할 최대 이력 수 (이만큼 쌓이면 바로 저장)
+        flush_interval: 백그라운드 저장 주기(초)
+        written / dropped / failed: 저장, 버림, 저장 실패한 이력 수
+    """
+
+    def __init__(self, batch_size, flush_interval_ms, max_buffer):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.queue = queue.Queue(maxsize=max_buffer)
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='recommendation-history-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def enqueue(self, histories, background=True):
+        """
+        저장할 이력을 큐에 추가
+
+        background가 False이면 스레드 없이 호출한 스레드에서 배치 단위로 저장합니다.
+        """
+        for history in histories:
+            try:
+                self.queue.put_nowait(history)
+            except queue.Full:
+                self.dropped += 1
+
+        if background:
+            self.start()
+            if self.queue.qsize() >= self.batch_size:
+                self._wake.set()
+        elif self.queue.qsize() >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """큐에 쌓인 이력을 모두 저장 (저장한 수 반환)"""
+        from .models import RecommendationHistory
+
+        total = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return total
+
+                try:
+                    RecommendationHistory.objects.bulk_create(batch)
+                    self.written += len(batch)
+                    total += len(batch)
+                except DatabaseError:
+                    self.failed += len(batch)
+                    logger.exception('Failed to write %d recommendation history records', len(batch))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            # 오래 쉬는 동안 끊긴 DB 연결은 버리고 다시 연결
+            close_old_connections()
+            self.flush()
+        connections.close_all()
+
+    def close(self):
+        """백그라운드 스레드를 멈추고 남은 이력을 저장"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=max(self.flush_interval, 1) * 5)
+        self.flush()
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+def get_history_writer():
+    """설정값으로 만든 프로세스 전역 이력 저장기를 반환"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = HistoryWriter(
+                    batch_size=settings.RECOMMENDATION_HISTORY_BATCH_SIZE,
+                    flush_interval_ms=settings.RECOMMENDATION_HISTORY_FLUSH_INTERVAL_MS,
+                    max_buffer=settings.RECOMMENDATION_HISTORY_MAX_BUFFER,
+                )
+    return _writer
+
+
+def reset_history_writer():
+    """저장하지 않은 이력을 버리고 다음 사용 시 새 저장기를 만들도록 초기화 (테스트용)"""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer._stopped.set()
+            _writer._wake.set()
+        _writer = None
+
+
+def record_recommendations(histories):
+    """추천 이력을 저장 큐에 추가 (RECOMMENDATION_HISTORY_BACKGROUND 설정에 따라 저장 방식 결정)"""
+    get_history_writer().enqueue(histories, background=settings.RECOMMENDATION_HISTORY_BACKGROUND)
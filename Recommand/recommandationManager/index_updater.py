@@ -0,0 +1,286 @@
+"""
+레시피가 바뀔 때 재료 인덱스(RecipeIndex)와 유사도(RecipeSimilarity)를 부분 갱신하는 모듈
+
+레시피나 재료 구성이 커밋되면 해당 레시피 id만 모아 두었다가, 백그라운드 스레드가
+RECIPE_INDEX_UPDATE_DELAY_MS 동안 모인 레시피를 한 번에 처리합니다.
+
+1. 기존 어휘로 레시피를 벡터화해 인덱스 행을 교체 (RecipeIndex.refresh_recipes)
+2. 바뀐 레시피와 그 이웃의 상위 k개 이웃을 다시 계산해 RecipeSimilarity를 교체
+   (build_recipe_similarity --incremental과 같은 재료 id TF-IDF 점수, neighbours 모듈)
+3. RECIPE_INDEX_COMPACT_INTERVAL초마다 갱신된 레시피가 있으면 인덱스를 처음부터 다시 만들어
+   IDF 가중치와 어휘를 새로 반영하고 비워진 행을 정리 (재구축 중에 바뀐 레시피는 교체 후 다시 반영)
+
+인덱스는 워커 프로세스마다 따로 있으므로, 모인 레시피 id는 캐시에 버전 번호와 함께
+발행합니다 (publish_recipe_changes). 작업기는 RECIPE_INDEX_SYNC_INTERVAL_MS마다 캐시의
+버전을 확인해 처음 보는 버전의 레시피를 자기 인덱스에 반영하고, 유사도 행은 그 버전을
+먼저 가져간 워커 한 곳만 DB에서 다시 계산합니다. 변경 기록이 캐시에서 사라졌으면 인덱스를
+재구축합니다. 인덱스를 불러오지 않은 워커도 유사도 행은 계산하지만 인덱스는 만들지 않습니다
+(나중에 만들 때 DB를 읽음).
+
+RECIPE_INDEX_BACKGROUND가 꺼져 있으면 요청 스레드에서 바로 처리하되,
+이 프로세스가 이미 불러온 인덱스만 갱신합니다 (요청 중에 인덱스 전체를 만들지 않음).
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections, connections
+
+from .neighbours import update_recipe_neighbours
+from .recipe_index import RecipeIndex, get_recipe_index, loaded_recipe_index, replace_recipe_index
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'recipe-index:version'
+CHANGES_KEY = 'recipe-index:changes:{version}'
+NEIGHBOURS_KEY = 'recipe-index:neighbours:{version}'
+# 변경 기록 보관 시간(초)과 한 번에 따라잡을 최대 버전 수 (넘으면 재구축)
+CHANGES_TIMEOUT = 24 * 60 * 60
+MAX_CHANGES = 1000
+
+_updater = None
+_updater_lock = threading.Lock()
+
+
+def current_version():
+    """캐시에 발행된 마지막 변경 버전 (없으면 0)"""
+    return cache.get(VERSION_KEY, 0)
+
+
+def publish_recipe_changes(recipe_ids):
+    """바뀐 레시피 id를 새 버전으로 발행해 모든 워커가 반영하도록 함 (발행한 버전 반환)"""
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.incr(VERSION_KEY)
+    cache.set(CHANGES_KEY.format(version=version), sorted(recipe_ids), timeout=CHANGES_TIMEOUT)
+    return version
+
+
+class RecipeIndexUpdater:
+    """
+    바뀐 레시피를 모아 인덱스와 유사도를 갱신하는 작업기
+
+    Attributes:
+        delay: 갱신 요청을 모으는 시간(초)
+        sync_interval: 다른 워커가 발행한 변경을 확인하는 주기(초)
+        compact_interval: 재구축 주기(초), 0이면 재구축하지 않음
+        seen_version: 이 프로세스가 반영한 마지막 변경 버전
+        refreshed / compactions / failed: 갱신한 레시피 수, 재구축 횟수, 실패한 갱신 수
+    """
+
+    def __init__(self, delay_ms, compact_interval, sync_interval_ms=5000):
+        self.delay = delay_ms / 1000
+        self.sync_interval = sync_interval_ms / 1000
+        self.compact_interval = compact_interval
+        self.seen_version = current_version()
+        self.pending = set()
+        self.refreshed = 0
+        self.compactions = 0
+        self.failed = 0
+        self.last_compacted = time.monotonic()
+        self._pending_lock = threading.Lock()
+        self._work_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='recipe-index-updater', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def schedule(self, recipe_ids, background=True):
+        """갱신할 레시피 id를 추가"""
+        with self._pending_lock:
+            self.pending.update(recipe_ids)
+
+        if background:
+            self.start()
+            self._wake.set()
+        else:
+            self.flush()
+
+    def _take_pending(self):
+        with self._pending_lock:
+            recipe_ids, self.pending = self.pending, set()
+        return recipe_ids
+
+    def flush(self):
+        """모인 레시피를 발행하고 이 프로세스의 인덱스에 반영 (반영한 레시피 수 반환)"""
+        recipe_ids = self._take_pending()
+        if recipe_ids:
+            publish_recipe_changes(recipe_ids)
+        return self.sync()
+
+    def sync(self, rebuilt_through=0):
+        """
+        처음 보는 버전의 변경을 이 프로세스가 불러온 인덱스와 유사도에 반영
+
+        유사도는 인덱스를 불러오지 않았어도 계산합니다.
+
+        Parameters:
+            rebuilt_through: 이 버전까지의 변경은 방금 재구축한 인덱스에 이미 들어 있음
+
+        Returns:
+            반영한 레시피 수
+        """
+        with self._work_lock:
+            version = current_version()
+            if version == self.seen_version:
+                return 0
+            index = loaded_recipe_index()
+
+            # 캐시가 비워져 버전이 되돌아갔거나 너무 뒤처졌으면 재구축
+            versions = list(range(self.seen_version + 1, version + 1))
+            rebuild = not versions or len(versions) > MAX_CHANGES
+            if rebuild:
+                versions = []
+            changes = cache.get_many([CHANGES_KEY.format(version=v) for v in versions])
+
+            recipe_ids, refresh_ids, neighbour_ids, claimed = set(), set(), set(), []
+            for v in versions:
+                ids = changes.get(CHANGES_KEY.format(version=v))
+                if ids is None:
+                    if v == version:
+                        # 버전만 올라가고 아직 기록되지 않은 발행은 다음 확인 때 반영
+                        version -= 1
+                    else:
+                        # 만료된 변경 기록
+                        rebuild = True
+                    continue
+                recipe_ids.update(ids)
+                if v > rebuilt_through:
+                    refresh_ids.update(ids)
+                # 유사도 행은 버전마다 한 워커만 다시 계산
+                if cache.add(NEIGHBOURS_KEY.format(version=v), True, timeout=CHANGES_TIMEOUT):
+                    claimed.append(v)
+                    neighbour_ids.update(ids)
+
+            try:
+                # 인덱스를 불러오지 않았으면 나중에 만들 때 DB에서 읽으므로 건너뜀
+                if index is not None:
+                    if rebuild or not index.fitted:
+                        # 빈 인덱스에는 어휘가 없으므로 처음부터 다시 만듦
+                        self._compact()
+                    elif refresh_ids:
+                        index.refresh_recipes(refresh_ids)
+                if neighbour_ids:
+                    update_recipe_neighbours(neighbour_ids)
+            except DatabaseError:
+                # 다른 워커나 다음 확인에서 다시 가져가도록 유사도 계산을 반납
+                cache.delete_many([NEIGHBOURS_KEY.format(version=v) for v in claimed])
+                self.failed += len(recipe_ids)
+                logger.exception('Failed to refresh the recipe index for %d recipes', len(recipe_ids))
+                return 0
+
+            self.seen_version = version
+            self.refreshed += len(recipe_ids)
+            return len(recipe_ids)
+
+    def _compact(self):
+        # 근사 인덱스 사용 여부와 probe 수는 기존 인덱스 설정을 유지
+        current = loaded_recipe_index()
+        replace_recipe_index(RecipeIndex.build(
+            approximate=True if current is not None and current.ann is not None else None,
+            n_probe=current.n_probe if current is not None else None,
+        ))
+        self.compactions += 1
+        self.last_compacted = time.monotonic()
+
+    def compact(self):
+        """인덱스를 처음부터 다시 만들어 교체하고, 그동안 바뀐 레시피를 반영"""
+        with self._work_lock:
+            # 발행은 커밋 뒤에 하므로 지금까지 발행된 변경은 재구축이 DB에서 읽음
+            rebuilt_through = current_version()
+            try:
+                self._compact()
+            except DatabaseError:
+                logger.exception('Failed to rebuild the recipe index')
+                return False
+        # 재구축 중에 발행된 변경과 아직 계산하지 않은 유사도를 반영
+        self.sync(rebuilt_through=rebuilt_through)
+        return True
+
+    def _compaction_due(self):
+        index = loaded_recipe_index()
+        return (
+            self.compact_interval > 0
+            and index is not None
+            and index.updates > 0
+            and time.monotonic() - self.last_compacted >= self.compact_interval
+        )
+
+    def _run(self):
+        while not self._stopped.is_set():
+            woken = self._wake.wait(self.sync_interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                if woken:
+                    # 짧은 시간에 몰린 변경(레시피 + 재료 여러 건)을 한 번에 처리
+                    time.sleep(self.delay)
+                close_old_connections()
+                self.flush()
+                if self._compaction_due():
+                    self.compact()
+            except Exception:
+                # DB 오류가 아닌 예외로 스레드가 조용히 멈추지 않도록 기록하고 계속
+                logger.exception('Recipe index update failed')
+        connections.close_all()
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def stats(self):
+        index = loaded_recipe_index()
+        return {
+            'pending': len(self.pending),
+            'refreshed': self.refreshed,
+            'compactions': self.compactions,
+            'failed': self.failed,
+            'version': self.seen_version,
+            'updates_since_compaction': index.updates if index is not None else 0,
+        }
+
+
+def get_recipe_index_updater():
+    """설정값으로 만든 프로세스 전역 인덱스 갱신기를 반환"""
+    global _updater
+    if _updater is None:
+        with _updater_lock:
+            if _updater is None:
+                _updater = RecipeIndexUpdater(
+                    delay_ms=settings.RECIPE_INDEX_UPDATE_DELAY_MS,
+                    compact_interval=settings.RECIPE_INDEX_COMPACT_INTERVAL,
+                    sync_interval_ms=settings.RECIPE_INDEX_SYNC_INTERVAL_MS,
+                )
+    return _updater
+
+
+def reset_recipe_index_updater():
+    """처리하지 않은 갱신을 버리고 다음 사용 시 새 갱신기를 만들도록 초기화 (테스트용)"""
+    global _updater
+    with _updater_lock:
+        if _updater is not None:
+            _updater.close()
+        _updater = None
+
+
+def schedule_recipe_refresh(recipe_ids):
+    """레시피 인덱스 갱신을 예약 (RECIPE_INDEX_BACKGROUND 설정에 따라 처리 방식 결정)"""
+    get_recipe_index_updater().schedule(recipe_ids, background=settings.RECIPE_INDEX_BACKGROUND)
+
+
+def watch_recipe_index():
+    """인덱스를 불러온 워커가 다른 워커의 변경을 따라가도록 작업기를 시작 (백그라운드 설정일 때만)"""
+    if settings.RECIPE_INDEX_BACKGROUND:
+        get_recipe_index_updater().start()
@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from articles.pantry_index import reset_pantry_index
+from recommandationManager.benchmark import ENDPOINTS, compare_results, run_benchmark, seed_benchmark_data
+from recommandationManager.collaborative import reset_item_cf_model
+from recommandationManager.history_writer import get_history_writer, reset_history_writer
+from recommandationManager.index_updater import reset_recipe_index_updater
+from recommandationManager.recipe_index import reset_recipe_index
+from recommandationManager.recipe_stats import rebuild_recipe_stats
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database and report p50/p95/p99 latency and SQL query counts '
+            'for the recommendation, recipe and cart endpoints')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--interactions', type=int, default=20000)
+        parser.add_argument('--ingredients', type=int, default=300)
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Measured requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Unmeasured requests per endpoint sent first')
+        parser.add_argument('--endpoint', action='append', default=None,
+                            choices=[endpoint.name for endpoint in ENDPOINTS],
+                            help='Only measure this endpoint (repeatable)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed for the data and the request mix')
+        parser.add_argument('--output', default=None,
+                            help='Write the results as JSON to this file')
+        parser.add_argument('--compare', default=None,
+                            help='Fail if p95 latency or query counts regressed against this JSON file')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed relative p95 increase for --compare (default: 0.2)')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)['endpoints']
+
+        with tempfile.TemporaryDirectory() as workdir:
+            results = self.run_in_test_database(workdir, options)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+
+        self.stdout.write(f'{results["data"]["recipes"]} recipes, {results["data"]["users"]} users, '
+                          f'{results["data"]["interactions"]} interactions ({results["database"]})')
+        for name, result in results['endpoints'].items():
+            self.stdout.write(
+                f'{name:<26} p50 {result["p50_ms"]:>8}ms  p95 {result["p95_ms"]:>8}ms  '
+                f'p99 {result["p99_ms"]:>8}ms  queries {result["queries_mean"]:>6} (max {result["queries_max"]})'
+                + (f'  errors {result["errors"]}' if result['errors'] else '')
+            )
+
+        if baseline is not None:
+            regressions = compare_results(baseline, results['endpoints'], tolerance=options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against {}:\n{}'.format(
+                    options['compare'], '\n'.join(f'  {name}: {detail}' for name, detail in regressions)
+                ))
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {options["compare"]}'))
+
+    def run_in_test_database(self, workdir, options):
+        # Never touch the configured database: seed a fresh test database
+        # (a file in workdir on SQLite so the background writer threads can share it)
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'benchmark.sqlite3')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        # Models and caches built from the real data must not leak into the run
+        # (the shared cache backend would also hand out other users' entries)
+        isolated = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                'LOCATION': 'benchmark'}},
+            ITEM_CF_MODEL_PATH=os.path.join(workdir, 'item_cf_model.npz'),
+            RECIPE_INDEX_PATH=os.path.join(workdir, 'recipe_index.joblib'),
+        )
+        isolated.enable()
+        self.reset_process_state()
+        try:
+            started = time.perf_counter()
+            data = seed_benchmark_data(
+                recipes=options['recipes'],
+                users=options['users'],
+                interactions=options['interactions'],
+                ingredients=options['ingredients'],
+                seed=options['seed'],
+            )
+            # bulk_create skips the signals that maintain these
+            rebuild_recipe_stats()
+            call_command('build_recipe_similarity', stdout=StringIO())
+            call_command('train_item_cf', stdout=StringIO())
+            seed_seconds = time.perf_counter() - started
+
+            endpoints = run_benchmark(
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                endpoints=options['endpoint'],
+                seed=options['seed'],
+            )
+            get_history_writer().flush()
+        finally:
+            self.reset_process_state()
+            isolated.disable()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        return {
+            'database': connection.vendor,
+            'seed': options['seed'],
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'seed_seconds': round(seed_seconds, 3),
+            'data': data,
+            'endpoints': endpoints,
+        }
+
+    def reset_process_state(self):
+        reset_history_writer()
+        reset_recipe_index_updater()
+        reset_recipe_index()
+        reset_item_cf_model()
+        reset_pantry_index()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from articles.allergens import allergy_terms, rebuild_allergen_index
+from recommandationManager.models import UserPreference
+
+class Command(BaseCommand):
+    help = 'Recompute which ingredients and recipes contain each allergen'
+
+    def handle(self, *args, **options):
+        # Every allergy users have listed gets an allergen, in addition to the standard ones
+        terms = []
+        for allergies in UserPreference.objects.exclude(allergies='').values_list('allergies', flat=True):
+            terms.extend(allergy_terms(allergies))
+
+        allergens, ingredient_links, recipe_links = rebuild_allergen_index(terms)
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {allergens} allergens: {ingredient_links} ingredient and {recipe_links} recipe memberships'
+        ))
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recommandationManager.recipe_index import RecipeIndex
+
+class Command(BaseCommand):
+    help = 'Build the ingredient search index used by /api/recommendations/by-ingredients/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.RECIPE_INDEX_PATH,
+                            help='Where to save the index (default: RECIPE_INDEX_PATH)')
+        ann = parser.add_mutually_exclusive_group()
+        ann.add_argument('--ann', dest='approximate', action='store_true', default=None,
+                         help='Always build the IVF approximate index')
+        ann.add_argument('--exact', dest='approximate', action='store_false',
+                         help='Never build the IVF approximate index')
+        parser.add_argument('--ann-lists', type=int, default=None,
+                            help='Number of IVF clusters (default: RECIPE_INDEX_ANN_LISTS, or sqrt(N))')
+        parser.add_argument('--ann-probes', type=int, default=None,
+                            help='Clusters scanned per query, saved with the index '
+                                 '(default: RECIPE_INDEX_ANN_PROBES at query time)')
+
+    def handle(self, *args, **options):
+        index = RecipeIndex.build(
+            approximate=options['approximate'],
+            ann_lists=options['ann_lists'],
+            n_probe=options['ann_probes'],
+        )
+        index.save(options['output'])
+
+        mode = f'IVF with {index.ann.n_lists} clusters' if index.ann is not None else 'exact'
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {len(index)} recipes into {options["output"]} ({mode})'
+        ))
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from articles.models import Recipe
+from recommandationManager.ann import approximate_top_k_neighbours
+from recommandationManager.models import RecipeSimilarityBuild
+from recommandationManager.neighbours import (
+    all_neighbours, changed_neighbours, load_ingredient_matrix, save_neighbours,
+)
+from recommandationManager.similarity import top_k_neighbours
+
+class Command(BaseCommand):
+    help = 'Populate RecipeSimilarity with the top-k most similar recipes per recipe'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=20,
+                            help='Maximum number of neighbours stored per recipe')
+        parser.add_argument('--threshold', type=float, default=0.1,
+                            help='Minimum similarity score to store')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of rows per bulk_create / delete batch')
+        parser.add_argument('--max-memory-mb', type=int, default=256,
+                            help='Memory cap for the similarity blocks computed at once')
+        parser.add_argument('--jobs', type=int, default=None,
+                            help='Number of threads used for the similarity blocks (default: all cores)')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only recompute recipes changed since the last successful build')
+        parser.add_argument('--ann-probes', type=int, default=None,
+                            help='Use an IVF approximate index scanning this many clusters per recipe '
+                                 'instead of the exact blockwise scan (for very large recipe sets)')
+        parser.add_argument('--ann-lists', type=int, default=None,
+                            help='Number of IVF clusters when --ann-probes is set (default: sqrt(N))')
+
+    def handle(self, *args, **options):
+        top_k = options['top_k']
+        threshold = options['threshold']
+        batch_size = options['batch_size']
+        if options['ann_probes']:
+            neighbours_of = approximate_top_k_neighbours
+            kernel_options = {'n_lists': options['ann_lists'], 'n_probe': options['ann_probes']}
+        else:
+            neighbours_of = top_k_neighbours
+            kernel_options = {
+                'max_memory_mb': options['max_memory_mb'],
+                'n_jobs': options['jobs'],
+            }
+        started_at = timezone.now()
+
+        # Vectorize every recipe; the matrix is needed even for incremental runs
+        recipe_ids, matrix = load_ingredient_matrix()
+
+        last_build = None
+        if options['incremental']:
+            last_build = RecipeSimilarityBuild.objects.filter(
+                finished_at__isnull=False
+            ).order_by('-started_at').first()
+            if last_build is None:
+                self.stdout.write('No previous build found, running a full build.')
+
+        if last_build is None:
+            mode = 'full'
+            results = all_neighbours(matrix, top_k, threshold, neighbours_of, **kernel_options)
+        else:
+            mode = 'incremental'
+            changed_ids = Recipe.objects.filter(
+                updated_at__gte=last_build.started_at
+            ).values_list('id', flat=True)
+            # Recipes created after the matrix snapshot are picked up by the next build
+            results = changed_neighbours(
+                matrix, recipe_ids, changed_ids, top_k, threshold, neighbours_of, **kernel_options
+            )
+
+        with transaction.atomic():
+            pair_count = save_neighbours(recipe_ids, results, replace_all=mode == 'full', batch_size=batch_size)
+            RecipeSimilarityBuild.objects.create(
+                mode=mode,
+                recipe_count=len(results),
+                pair_count=pair_count,
+                started_at=started_at,
+                finished_at=timezone.now()
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {pair_count} similarities for {len(results)} recipes ({mode} build)'
+        ))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from recommandationManager.recipe_stats import rebuild_recipe_stats
+
+class Command(BaseCommand):
+    help = 'Recompute RecipeStats (rating count/sum/average, cook and save counts) from all interactions'
+
+    def handle(self, *args, **options):
+        count = rebuild_recipe_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {count} recipes'))
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recommandationManager import cache as recommendation_cache
+from recommandationManager.collaborative import (
+    DEFAULT_INTERACTION_WEIGHTS, ItemItemModel, interaction_arrays, reset_item_cf_model,
+)
+from recommandationManager.models import UserRecipeInteraction
+
+class Command(BaseCommand):
+    help = 'Train the item-item collaborative filtering model from UserRecipeInteraction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.ITEM_CF_MODEL_PATH,
+                            help='Where to save the model (default: ITEM_CF_MODEL_PATH)')
+        parser.add_argument('--top-k', type=int, default=50,
+                            help='Maximum number of neighbours stored per recipe')
+        parser.add_argument('--threshold', type=float, default=0.0,
+                            help='Minimum similarity score to store')
+        parser.add_argument('--weight', action='append', default=[], metavar='TYPE=VALUE',
+                            help='Override an interaction weight, e.g. --weight cook=5 (repeatable)')
+        parser.add_argument('--max-memory-mb', type=int, default=256,
+                            help='Memory cap for the similarity blocks computed at once')
+        parser.add_argument('--jobs', type=int, default=None,
+                            help='Number of threads used for the similarity blocks (default: all cores)')
+
+    def parse_weights(self, values):
+        weights = {}
+        for value in values:
+            interaction_type, _, weight = value.partition('=')
+            if interaction_type not in DEFAULT_INTERACTION_WEIGHTS:
+                raise CommandError(f'Unknown interaction type in --weight {value!r}')
+            try:
+                weights[interaction_type] = float(weight)
+            except ValueError:
+                raise CommandError(f'Invalid weight in --weight {value!r}')
+        return weights
+
+    def handle(self, *args, **options):
+        weights = self.parse_weights(options['weight'])
+
+        # Stream the interaction table into arrays one chunk at a time
+        chunk_size = 10000
+        rows = UserRecipeInteraction.objects.values_list(
+            'user_id', 'recipe_id', 'interaction_type', 'rating'
+        ).iterator(chunk_size=chunk_size)
+        user_ids, recipe_ids, interaction_types, ratings = interaction_arrays(rows, chunk_size=chunk_size)
+
+        model = ItemItemModel.train(
+            user_ids, recipe_ids, interaction_types, ratings,
+            weights=weights,
+            k=options['top_k'],
+            threshold=options['threshold'],
+            max_memory_mb=options['max_memory_mb'],
+            n_jobs=options['jobs'],
+        )
+        model.save(options['output'])
+
+        # This process may serve requests too (e.g. the test runner); workers
+        # pick up the new file on restart.
+        reset_item_cf_model()
+        recommendation_cache.bump_global_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Trained on {len(user_ids)} interactions: {model.neighbours.nnz} neighbours '
+            f'for {len(model)} recipes saved to {options["output"]}'
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommandationManager', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSimilarityBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('full', '전체'), ('incremental', '증분')], max_length=20)),
+                ('recipe_count', models.PositiveIntegerField(default=0)),
+                ('pair_count', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'get_latest_by': 'started_at',
+            },
+        ),
+    ]
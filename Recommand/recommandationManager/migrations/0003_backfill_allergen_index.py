@@ -0,0 +1,87 @@
+from django.db import migrations
+
+# 마이그레이션 시점의 articles.allergens 코드를 복사해 둔 것 (이후 모듈이 바뀌어도 동작이 변하지 않도록)
+STANDARD_ALLERGENS = {
+    '난류': ['계란', '달걀', '메추리알'],
+    '우유': ['우유', '치즈', '버터', '생크림', '요거트', '요구르트', '연유'],
+    '메밀': ['메밀'],
+    '땅콩': ['땅콩'],
+    '대두': ['대두', '두부', '두유', '간장', '된장'],
+    '밀': ['밀가루', '부침가루', '튀김가루', '빵가루', '국수', '파스타', '라면'],
+    '고등어': ['고등어'],
+    '게': ['꽃게', '게살', '대게'],
+    '새우': ['새우'],
+    '돼지고기': ['돼지고기', '삼겹살', '목살', '베이컨', '햄', '소시지'],
+    '복숭아': ['복숭아'],
+    '토마토': ['토마토'],
+    '호두': ['호두'],
+    '닭고기': ['닭'],
+    '쇠고기': ['쇠고기', '소고기'],
+    '오징어': ['오징어'],
+    '조개류': ['조개', '굴', '전복', '홍합', '바지락', '가리비'],
+    '잣': ['잣'],
+}
+
+BATCH_SIZE = 1000
+
+
+def allergy_terms(text):
+    return list(dict.fromkeys(term.strip() for term in text.split(',') if term.strip()))
+
+
+def allergen_keywords(allergen):
+    return [keyword.lower() for keyword in allergy_terms(allergen.keywords)] or [allergen.name.lower()]
+
+
+def backfill_allergen_index(apps, schema_editor):
+    # 기존 사용자들이 입력한 알레르기마다 알레르기 항목을 만들고 레시피 소속을 계산
+    UserPreference = apps.get_model('recommandationManager', 'UserPreference')
+    Allergen = apps.get_model('articles', 'Allergen')
+    Ingredient = apps.get_model('articles', 'Ingredient')
+    RecipeIngredient = apps.get_model('articles', 'RecipeIngredient')
+    IngredientAllergen = Allergen.ingredients.through
+    RecipeAllergen = Allergen.recipes.through
+
+    terms = []
+    for allergies in UserPreference.objects.exclude(allergies='').values_list('allergies', flat=True):
+        terms.extend(allergy_terms(allergies))
+
+    existing = set(Allergen.objects.values_list('name', flat=True))
+    new_allergens = [
+        Allergen(name=name, keywords=', '.join(keywords))
+        for name, keywords in STANDARD_ALLERGENS.items() if name not in existing
+    ]
+    new_allergens += [
+        Allergen(name=term) for term in dict.fromkeys(terms)
+        if term not in existing and term not in STANDARD_ALLERGENS
+    ]
+    Allergen.objects.bulk_create(new_allergens)
+    allergens = [(allergen.id, allergen_keywords(allergen)) for allergen in Allergen.objects.all()]
+
+    IngredientAllergen.objects.all().delete()
+    IngredientAllergen.objects.bulk_create([
+        IngredientAllergen(ingredient_id=ingredient_id, allergen_id=allergen_id)
+        for ingredient_id, name in Ingredient.objects.values_list('id', 'name').iterator()
+        for allergen_id, keywords in allergens
+        if any(keyword in name.lower() for keyword in keywords)
+    ], batch_size=BATCH_SIZE)
+
+    RecipeAllergen.objects.all().delete()
+    RecipeAllergen.objects.bulk_create([
+        RecipeAllergen(recipe_id=recipe_id, allergen_id=allergen_id)
+        for recipe_id, allergen_id in RecipeIngredient.objects.filter(
+            ingredient__allergens__isnull=False
+        ).values_list('recipe_id', 'ingredient__allergens').distinct().iterator()
+    ], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommandationManager', '0002_recipesimilaritybuild'),
+        ('articles', '0003_allergen'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_allergen_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_recipe_stats(apps, schema_editor):
+    # 마이그레이션 시점의 recipe_stats.rebuild_recipe_stats를 복사해 둔 것
+    RecipeStats = apps.get_model('recommandationManager', 'RecipeStats')
+    UserRecipeInteraction = apps.get_model('recommandationManager', 'UserRecipeInteraction')
+
+    aggregated = UserRecipeInteraction.objects.values('recipe_id').annotate(
+        rating_count=Count('rating'),
+        rating_sum=Sum('rating', default=0),
+        cook_count=Count('id', filter=Q(interaction_type='cook')),
+        save_count=Count('id', filter=Q(interaction_type='save')),
+    ).order_by()
+
+    RecipeStats.objects.bulk_create([
+        RecipeStats(
+            recipe_id=row['recipe_id'],
+            rating_count=row['rating_count'],
+            rating_sum=row['rating_sum'],
+            avg_rating=row['rating_sum'] / row['rating_count'] if row['rating_count'] else None,
+            cook_count=row['cook_count'],
+            save_count=row['save_count'],
+        )
+        for row in aggregated.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_allergen'),
+        ('recommandationManager', '0003_backfill_allergen_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='articles.recipe')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('avg_rating', models.FloatField(blank=True, null=True)),
+                ('cook_count', models.PositiveIntegerField(default=0)),
+                ('save_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'recipe stats',
+                'indexes': [models.Index(fields=['avg_rating'], name='recommandat_avg_rat_cf45c4_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_recipe_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def generate_recommendation_ids(apps, schema_editor):
+    RecommendationHistory = apps.get_model('recommandationManager', 'RecommendationHistory')
+    histories = list(RecommendationHistory.objects.only('id'))
+    for history in histories:
+        history.recommendation_id = uuid.uuid4()
+    RecommendationHistory.objects.bulk_update(histories, ['recommendation_id'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommandationManager', '0004_recipestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationhistory',
+            name='recommendation_id',
+            field=models.UUIDField(null=True, editable=False),
+        ),
+        migrations.RunPython(generate_recommendation_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='recommendationhistory',
+            name='recommendation_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='recommendationhistory',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -4,12 +4,17 @@
 이 모듈은 다음과 같은 주요 기능을 위한 모델들을 포함합니다:
 - 사용자 선호도 관리 (UserPreference)
 - 레시피 상호작용 추적 (UserRecipeInteraction)
+- 레시피별 상호작용 통계 (RecipeStats)
 - 레시피 간 유사도 계산 (RecipeSimilarity)
+- 유사도 빌드 실행 기록 (RecipeSimilarityBuild)
 - 추천 이력 관리 (RecommendationHistory)
 """
 
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from articles.models import Recipe
 
@@ -89,6 +94,38 @@ class UserRecipeInteraction(models.Model):
     def __str__(self):
         return f"{self.user.username} {self.interaction_type} {self.recipe.name}"
 
+class RecipeStats(models.Model):
+    """
+    레시피별 상호작용 통계를 미리 집계해 두는 모델
+
+    UserRecipeInteraction이 생성/수정/삭제될 때마다 F() 표현식으로 갱신되므로
+    (recipe_stats 모듈 참조) 인기 레시피 조회 시 상호작용 테이블을 집계하지 않습니다.
+
+    주요 필드:
+    - recipe: 대상 레시피
+    - rating_count: 평가 점수가 있는 상호작용 수
+    - rating_sum: 평가 점수 합계
+    - avg_rating: 평균 평가 점수 (평가가 없으면 NULL, 정렬용 인덱스)
+    - cook_count: 요리완료 수
+    - save_count: 저장 수
+    """
+    recipe = models.OneToOneField('articles.Recipe', on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    avg_rating = models.FloatField(null=True, blank=True)
+    cook_count = models.PositiveIntegerField(default=0)
+    save_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "recipe stats"
+        indexes = [
+            models.Index(fields=['avg_rating']),
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.recipe.name}: {self.avg_rating} ({self.rating_count} ratings)"
+
 class RecipeSimilarity(models.Model):
     """
     레시피 간의 유사도를 저장하는 모델
@@ -112,23 +149,56 @@ class RecipeSimilarity(models.Model):
     def __str__(self):
         return f"Similarity between {self.recipe1.name} and {self.recipe2.name}: {self.similarity_score}"
 
+class RecipeSimilarityBuild(models.Model):
+    """
+    build_recipe_similarity 명령의 실행 기록을 저장하는 모델
+
+    주요 필드:
+    - mode: 빌드 방식 (전체, 증분)
+    - recipe_count: 이웃을 다시 계산한 레시피 수
+    - pair_count: 저장된 유사도 쌍의 수
+    - started_at: 빌드 시작 시간 (증분 빌드는 마지막 성공한 빌드의 시작 시간 이후 변경분만 처리)
+    - finished_at: 빌드 완료 시간
+    """
+    MODE_CHOICES = [
+        ('full', '전체'),
+        ('incremental', '증분'),
+    ]
+
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES)
+    recipe_count = models.PositiveIntegerField(default=0)
+    pair_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        get_latest_by = 'started_at'
+
+    def __str__(self):
+        return f"{self.get_mode_display()} similarity build at {self.started_at}"
+
 class RecommendationHistory(models.Model):
     """
     사용자별 레시피 추천 이력을 저장하는 모델
 
+    이력은 history_writer가 요청 밖에서 모아서 저장하므로, 클라이언트에는 저장 전에도
+    정해지는 recommendation_id를 추천 id로 제공합니다.
+
     주요 필드:
+    - recommendation_id: 클라이언트에 노출되는 추천 id (상호작용 기록 시 사용)
     - user: 추천을 받은 사용자
     - recipe: 추천된 레시피
     - score: 추천 알고리즘이 계산한 추천 점수
     - reason: 해당 레시피가 추천된 이유
     - interacted: 사용자가 추천에 반응했는지 여부
-    - created_at: 추천이 생성된 시간
+    - created_at: 추천이 생성된 시간 (저장 시각이 아닌 응답 시각)
     """
+    recommendation_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendation_history')
     recipe = models.ForeignKey('articles.Recipe', on_delete=models.CASCADE, related_name='recommendation_history')
     score = models.FloatField(help_text="추천 점수")
     reason = models.CharField(max_length=200, help_text="추천 이유")
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
     interacted = models.BooleanField(default=False, help_text="사용자가 추천에 반응했는지 여부")
 
     class Meta:
@@ -0,0 +1,125 @@
+"""
+레시피 유사도(RecipeSimilarity) 행 계산과 저장
+
+build_recipe_similarity 명령과 레시피 변경 시의 부분 갱신(index_updater)이 같은 점수를 쓰도록
+계산을 한곳에 모읍니다. 점수는 레시피 × 재료 id TF-IDF 행렬(similarity.build_ingredient_matrix)의
+코사인 유사도이고, 레시피마다 상위 k개 이웃만 저장합니다.
+
+부분 갱신은 바뀐 레시피, 바뀐 레시피를 이웃으로 두었던 레시피, 새로 이웃이 된 레시피의
+이웃 목록을 처음부터 다시 계산해 교체하므로 어느 레시피의 이웃도 k개를 넘지 않습니다.
+"""
+
+from django.db import transaction
+
+from . import cache as recommendation_cache
+from .similarity import build_ingredient_matrix, top_k_neighbours
+
+# build_recipe_similarity 명령의 기본값과 동일
+NEIGHBOUR_COUNT = 20
+NEIGHBOUR_THRESHOLD = 0.1
+
+
+def load_ingredient_matrix():
+    """
+    모든 레시피의 재료 id TF-IDF 행렬
+
+    Returns:
+        (recipe_ids, matrix) - recipe_ids는 행 번호별 레시피 id
+    """
+    from articles.models import Recipe, RecipeIngredient
+
+    recipe_ids = list(Recipe.objects.order_by('id').values_list('id', flat=True))
+    pairs = RecipeIngredient.objects.values_list('recipe_id', 'ingredient_id').iterator()
+    return recipe_ids, build_ingredient_matrix(recipe_ids, pairs)
+
+
+def all_neighbours(matrix, top_k, threshold, neighbours_of=top_k_neighbours, **kernel_options):
+    """모든 행의 상위 k개 이웃 {row: (neighbour_rows, scores)}"""
+    return {
+        row: (neighbours, scores)
+        for row, neighbours, scores in neighbours_of(matrix, top_k, threshold, **kernel_options)
+    }
+
+
+def changed_neighbours(matrix, recipe_ids, changed_ids, top_k, threshold,
+                       neighbours_of=top_k_neighbours, **kernel_options):
+    """
+    바뀐 레시피와 그 영향을 받는 레시피의 상위 k개 이웃 {row: (neighbour_rows, scores)}
+
+    행렬을 만든 뒤에 생긴 레시피(행이 없음)는 건너뜁니다.
+    """
+    from .models import RecipeSimilarity
+
+    row_of = {recipe_id: row for row, recipe_id in enumerate(recipe_ids)}
+    changed_ids = set(changed_ids)
+    changed_rows = [row_of[recipe_id] for recipe_id in changed_ids if recipe_id in row_of]
+    results = {
+        row: (neighbours, scores)
+        for row, neighbours, scores in neighbours_of(matrix, top_k, threshold, rows=changed_rows, **kernel_options)
+    }
+
+    # 유사도는 대칭이므로 바뀐 레시피를 이웃으로 두었거나 새로 이웃으로 둘 레시피도 다시 계산
+    affected_ids = set(RecipeSimilarity.objects.filter(
+        recipe2_id__in=changed_ids
+    ).values_list('recipe1_id', flat=True))
+    for neighbours, _ in results.values():
+        affected_ids.update(recipe_ids[neighbour] for neighbour in neighbours)
+    extra_rows = [row_of[recipe_id] for recipe_id in affected_ids - changed_ids if recipe_id in row_of]
+    for row, neighbours, scores in neighbours_of(matrix, top_k, threshold, rows=extra_rows, **kernel_options):
+        results[row] = (neighbours, scores)
+    return results
+
+
+def save_neighbours(recipe_ids, results, replace_all=False, batch_size=1000):
+    """
+    계산한 이웃 목록으로 RecipeSimilarity 행을 교체
+
+    replace_all이면 모든 행을, 아니면 results에 있는 레시피의 기존 행만 지웁니다.
+    bulk_create는 시그널을 보내지 않으므로 커밋 후 추천 캐시를 직접 무효화합니다.
+
+    Returns:
+        저장한 유사도 행 수
+    """
+    from .models import RecipeSimilarity
+
+    pair_count = 0
+    with transaction.atomic():
+        if replace_all:
+            RecipeSimilarity.objects.all().delete()
+        else:
+            stale_ids = [recipe_ids[row] for row in results]
+            for start in range(0, len(stale_ids), batch_size):
+                RecipeSimilarity.objects.filter(
+                    recipe1_id__in=stale_ids[start:start + batch_size]
+                ).delete()
+
+        batch = []
+        for row, (neighbours, scores) in results.items():
+            for neighbour, score in zip(neighbours, scores):
+                batch.append(RecipeSimilarity(
+                    recipe1_id=recipe_ids[row],
+                    recipe2_id=recipe_ids[neighbour],
+                    similarity_score=float(score)
+                ))
+            if len(batch) >= batch_size:
+                RecipeSimilarity.objects.bulk_create(batch, batch_size=batch_size)
+                pair_count += len(batch)
+                batch = []
+        if batch:
+            RecipeSimilarity.objects.bulk_create(batch, batch_size=batch_size)
+            pair_count += len(batch)
+
+        transaction.on_commit(recommendation_cache.bump_global_version)
+    return pair_count
+
+
+def update_recipe_neighbours(recipe_ids, k=NEIGHBOUR_COUNT, threshold=NEIGHBOUR_THRESHOLD):
+    """
+    주어진 레시피가 바뀐 뒤 관련 레시피의 유사도 행을 다시 계산 (build_recipe_similarity --incremental과 같은 방식)
+
+    Returns:
+        저장한 유사도 행 수
+    """
+    all_recipe_ids, matrix = load_ingredient_matrix()
+    results = changed_neighbours(matrix, all_recipe_ids, recipe_ids, k, threshold, n_jobs=1)
+    return save_neighbours(all_recipe_ids, results)
@@ -0,0 +1,326 @@
+"""
+재료 기반 레시피 검색을 위한 프로세스 내 TF-IDF 인덱스
+
+"대파, 마늘, 계란, 고추장으로 무엇을 만들 수 있을까?" 같은 질의를 요청마다
+벡터라이저를 다시 학습하지 않고 처리하기 위해, 워커 프로세스마다 한 번만
+인덱스를 만들고(또는 RECIPE_INDEX_PATH에서 불러오고) 재사용합니다.
+
+- RecipeIndex: 레시피 × 재료 TF-IDF 행렬과 필터링용 배열(조리 시간, 난이도)
+- get_recipe_index: 처음 사용할 때 인덱스를 만들어 프로세스 전역으로 보관
+
+레시피가 추가/수정되면 전체를 다시 학습하지 않고 기존 어휘와 IDF로 해당 레시피만
+벡터화해 행을 덧붙입니다(refresh_recipes). 이전 행은 0으로 비워 검색에서 빠지고,
+새 어휘 반영과 빈 행 정리는 주기적인 재구축(compaction, index_updater 참고)에서 합니다.
+
+레시피가 RECIPE_INDEX_ANN_MIN_RECIPES개 이상이면 IVF 근사 인덱스(ann.IVFIndex)를 함께 만들어
+검색과 이웃 계산에서 질의와 가까운 묶음의 레시피만 점수를 매깁니다.
+"""
+
+import os
+import re
+import threading
+
+import joblib
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+
+from .ann import IVFIndex
+from .similarity import top_k_similarity
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def ingredient_tokens(text):
+    """
+    콤마로 구분된 재료 목록을 토큰으로 분리
+
+    여러 단어로 된 재료명은 각 단어와 붙여 쓴 형태를 모두 토큰으로 사용합니다.
+    (예: "다진 마늘" -> ["다진", "마늘", "다진마늘"])
+    """
+    tokens = []
+    for name in re.split(r'[,|\n]', text.lower()):
+        words = name.split()
+        if not words:
+            continue
+        tokens.extend(words)
+        if len(words) > 1:
+            tokens.append(''.join(words))
+    return tokens
+
+
+def _load_rows(recipes):
+    """레시피 쿼리셋의 (id, 조리 시간, 난이도) 행과 행별 재료 문서를 id 순서로 조회"""
+    from articles.models import RecipeIngredient
+
+    rows = list(recipes.order_by('id').values_list('id', 'cooking_time', 'difficulty'))
+
+    names = {}
+    ingredient_pairs = RecipeIngredient.objects.filter(
+        recipe__in=recipes
+    ).values_list('recipe_id', 'ingredient__name')
+    for recipe_id, name in ingredient_pairs.iterator():
+        names.setdefault(recipe_id, []).append(name)
+
+    documents = [', '.join(names.get(recipe_id, [])) for recipe_id, _, _ in rows]
+    return rows, documents
+
+
+class RecipeIndex:
+    """
+    레시피 재료 TF-IDF 인덱스
+
+    Attributes:
+        vectorizer: 재료 토큰으로 학습된 TfidfVectorizer
+        matrix: 레시피 × 재료 TF-IDF 행렬 (행은 L2 정규화, 교체되거나 삭제된 레시피의 행은 0)
+        recipe_ids: 행 번호별 레시피 id
+        cooking_times: 행 번호별 조리 시간(분)
+        difficulties: 행 번호별 난이도
+        row_of: 레시피 id별 현재 행 번호
+        updates: 마지막 재구축 이후 추가/교체/삭제된 레시피 수
+        ann: 행렬 행에 대한 IVF 근사 인덱스 (작은 인덱스는 None, 정확히 검색)
+        n_probe: 근사 검색 시 질의당 확인할 묶음 수 (None이면 검색할 때의 RECIPE_INDEX_ANN_PROBES)
+    """
+
+    def __init__(self, vectorizer, matrix, recipe_ids, cooking_times, difficulties, ann=None, n_probe=None):
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.recipe_ids = recipe_ids
+        self.cooking_times = cooking_times
+        self.difficulties = difficulties
+        self.ann = ann
+        self.n_probe = n_probe
+        self.row_of = {int(recipe_id): row for row, recipe_id in enumerate(recipe_ids.tolist())}
+        self.updates = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock'], state['row_of']
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('updates', 0)
+        state.setdefault('ann', None)
+        state.setdefault('n_probe', None)
+        self.__dict__.update(state)
+        self.row_of = {int(recipe_id): row for row, recipe_id in enumerate(self.recipe_ids.tolist())}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, recipes=None, approximate=None, ann_lists=None, n_probe=None):
+        """
+        레시피 쿼리셋(기본값: 전체 레시피)으로 인덱스를 생성
+
+        Parameters:
+            approximate: IVF 근사 인덱스 생성 여부
+                (None이면 레시피가 RECIPE_INDEX_ANN_MIN_RECIPES개 이상일 때만 생성)
+            ann_lists: IVF 묶음 수 (기본값: RECIPE_INDEX_ANN_LISTS, 0이면 √N)
+            n_probe: 질의당 확인할 묶음 수 (기본값: RECIPE_INDEX_ANN_PROBES)
+        """
+        from articles.models import Recipe
+
+        if recipes is None:
+            recipes = Recipe.objects.all()
+        rows, documents = _load_rows(recipes)
+
+        vectorizer = TfidfVectorizer(analyzer=ingredient_tokens, dtype=np.float32)
+        matrix = vectorizer.fit_transform(documents).tocsr() if rows else None
+
+        if approximate is None:
+            approximate = len(rows) >= settings.RECIPE_INDEX_ANN_MIN_RECIPES
+        ann = None
+        if rows and approximate:
+            ann = IVFIndex.build(matrix, n_lists=ann_lists or settings.RECIPE_INDEX_ANN_LISTS or None)
+
+        return cls(
+            vectorizer=vectorizer,
+            matrix=matrix,
+            recipe_ids=np.array([row[0] for row in rows], dtype=np.int64),
+            cooking_times=np.array([row[1] for row in rows], dtype=np.int32),
+            difficulties=np.array([row[2] for row in rows], dtype=str),
+            ann=ann,
+            n_probe=n_probe,
+        )
+
+    @classmethod
+    def load(cls, path):
+        return joblib.load(path)
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    def __len__(self):
+        return len(self.row_of)
+
+    @property
+    def fitted(self):
+        return self.matrix is not None
+
+    @property
+    def probes(self):
+        return self.n_probe or settings.RECIPE_INDEX_ANN_PROBES
+
+    def refresh_recipes(self, recipe_ids):
+        """
+        주어진 레시피의 행을 DB에서 다시 읽어 교체 (없어진 레시피는 행을 비움)
+
+        기존 어휘와 IDF 가중치를 그대로 사용하므로 처음 보는 재료 토큰은
+        다음 재구축 전까지 무시됩니다. 한 번도 학습되지 않은(빈) 인덱스는 갱신할 수 없습니다.
+
+        Returns:
+            추가되거나 교체된 레시피 id 목록
+        """
+        from articles.models import Recipe
+
+        if not self.fitted:
+            raise ValueError('An empty index has no vocabulary; rebuild it instead')
+
+        recipe_ids = {int(recipe_id) for recipe_id in recipe_ids}
+        rows, documents = _load_rows(Recipe.objects.filter(id__in=recipe_ids))
+        vectors = self.vectorizer.transform(documents).tocsr() if rows else None
+
+        with self.lock:
+            # 이전 행은 지우지 않고 0으로 비워 행 번호를 유지
+            stale = [self.row_of.pop(recipe_id) for recipe_id in recipe_ids if recipe_id in self.row_of]
+            matrix = self.matrix
+            if stale:
+                keep = np.ones(matrix.shape[0], dtype=np.float32)
+                keep[stale] = 0
+                matrix = (sparse.diags(keep) @ matrix).tocsr()
+                matrix.eliminate_zeros()
+
+            recipe_index = self.recipe_ids
+            cooking_times = self.cooking_times
+            difficulties = self.difficulties
+            if rows:
+                first_row = matrix.shape[0]
+                matrix = sparse.vstack([matrix, vectors], format='csr')
+                recipe_index = np.concatenate([recipe_index, np.array([row[0] for row in rows], dtype=np.int64)])
+                cooking_times = np.concatenate([cooking_times, np.array([row[1] for row in rows], dtype=np.int32)])
+                difficulties = np.concatenate([difficulties, np.array([row[2] for row in rows], dtype=str)])
+                for offset, row in enumerate(rows):
+                    self.row_of[row[0]] = first_row + offset
+                if self.ann is not None:
+                    self.ann.add(first_row, vectors)
+
+            # 검색 중인 스레드가 길이가 다른 배열을 섞어 보지 않도록 한 번에 교체
+            self.matrix, self.recipe_ids, self.cooking_times, self.difficulties = (
+                matrix, recipe_index, cooking_times, difficulties
+            )
+            self.updates += len(recipe_ids)
+
+        return [row[0] for row in rows]
+
+    def neighbours(self, recipe_ids, k=20, threshold=0.1):
+        """
+        주어진 레시피별 상위 k개 유사 레시피
+
+        Returns:
+            {recipe_id: [(neighbour_id, score), ...]} - 인덱스에 없는 레시피는 제외
+        """
+        with self.lock:
+            matrix, recipe_index = self.matrix, self.recipe_ids
+            rows = [self.row_of[recipe_id] for recipe_id in recipe_ids if recipe_id in self.row_of]
+        if not rows:
+            return {}
+
+        if self.ann is not None:
+            indices, scores = self.ann.search(
+                matrix, matrix[rows], k=k, n_probe=self.probes, threshold=threshold, exclude_rows=rows
+            )
+        else:
+            indices, scores = top_k_similarity(matrix, k=k, threshold=threshold, rows=rows, n_jobs=1)
+        return {
+            int(recipe_index[row]): [
+                (int(recipe_index[neighbour]), float(score))
+                for neighbour, score in zip(row_indices, row_scores) if neighbour >= 0
+            ]
+            for row, row_indices, row_scores in zip(rows, indices, scores)
+        }
+
+    def search(self, ingredients, top_n=10, max_cooking_time=None, difficulties=None):
+        """
+        재료 문자열과 가장 유사한 레시피를 검색
+
+        Parameters:
+            ingredients: 콤마 또는 공백으로 구분된 재료 목록
+            top_n: 반환할 최대 레시피 수
+            max_cooking_time: 최대 조리 시간(분) 필터
+            difficulties: 허용할 난이도 목록 필터
+
+        Returns:
+            (recipe_id, score) 튜플의 목록, 점수 내림차순
+        """
+        with self.lock:
+            matrix, recipe_index = self.matrix, self.recipe_ids
+            cooking_times, recipe_difficulties = self.cooking_times, self.difficulties
+        if matrix is None:
+            return []
+
+        query_vector = self.vectorizer.transform([ingredients])
+        if self.ann is not None:
+            # 질의와 가까운 묶음의 행만 점수 계산 (필터는 그 안에서 적용)
+            rows = self.ann.candidates(query_vector, self.probes)[0]
+            rows = rows[rows < matrix.shape[0]]
+            scores = (matrix[rows] @ query_vector.T).toarray().ravel()
+        else:
+            rows = np.arange(matrix.shape[0])
+            scores = linear_kernel(query_vector, matrix)[0]
+
+        # 비워진 행은 점수가 0이므로 여기서 함께 빠짐
+        mask = scores > 0
+        if max_cooking_time is not None:
+            mask &= cooking_times[rows] <= max_cooking_time
+        if difficulties:
+            mask &= np.isin(recipe_difficulties[rows], difficulties)
+
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-scores[candidates], top_n - 1)[:top_n]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        return [(int(recipe_index[rows[i]]), float(scores[i])) for i in candidates]
+
+
+def get_recipe_index():
+    """
+    프로세스 전역 레시피 인덱스를 반환
+
+    처음 호출될 때 RECIPE_INDEX_PATH 파일이 있으면 불러오고, 없으면 DB에서 생성합니다.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = getattr(settings, 'RECIPE_INDEX_PATH', None)
+                if path and os.path.exists(path):
+                    _index = RecipeIndex.load(path)
+                else:
+                    _index = RecipeIndex.build()
+        # 다른 워커가 발행한 레시피 변경을 따라가도록 갱신기 시작
+        from .index_updater import watch_recipe_index
+        watch_recipe_index()
+    return _index
+
+
+def loaded_recipe_index():
+    """이 프로세스가 인덱스를 불러왔으면 반환, 아니면 None"""
+    return _index
+
+
+def replace_recipe_index(index):
+    """재구축한 인덱스로 프로세스 전역 인덱스를 교체"""
+    global _index
+    with _index_lock:
+        _index = index
+
+
+def reset_recipe_index():
+    """다음 사용 시 인덱스를 다시 불러오도록 초기화"""
+    global _index
+    with _index_lock:
+        _index = None
@@ -0,0 +1,93 @@
+"""
+레시피 상호작용 통계(RecipeStats) 갱신 모듈
+
+상호작용 한 건이 바뀔 때마다 해당 레시피 통계 행을 UPDATE 한 번으로 고칩니다.
+값은 F() 표현식으로 DB에서 더하고 빼므로 동시에 들어온 평가가 서로 덮어쓰지 않습니다.
+
+- interaction_deltas: 상호작용 한 건이 통계에 기여하는 값
+- apply_deltas: 기여분을 레시피 통계에 더하거나 뺌
+- rebuild_recipe_stats: 상호작용 테이블 전체에서 통계를 다시 계산 (복구용)
+"""
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, NullIf
+
+BATCH_SIZE = 1000
+
+
+def interaction_deltas(interaction_type, rating):
+    """상호작용 유형과 평가 점수가 통계에 기여하는 값"""
+    return {
+        'rating_count': 1 if rating is not None else 0,
+        'rating_sum': rating or 0,
+        'cook_count': 1 if interaction_type == 'cook' else 0,
+        'save_count': 1 if interaction_type == 'save' else 0,
+    }
+
+
+def apply_deltas(recipe_id, deltas, sign=1):
+    """
+    레시피 통계에 기여분을 더하거나(sign=1) 뺌(sign=-1)
+
+    통계 행이 없으면 더할 때만 만듭니다. 레시피가 삭제되면서 상호작용이 함께
+    삭제되는 경우 통계 행이 먼저 지워졌을 수 있기 때문입니다.
+    """
+    RecipeStats = global_apps.get_model('recommandationManager', 'RecipeStats')
+
+    deltas = {field: sign * value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    rating_count = F('rating_count') + deltas.get('rating_count', 0)
+    rating_sum = F('rating_sum') + deltas.get('rating_sum', 0)
+    updates = {
+        # MySQL은 SET 절을 왼쪽부터 적용하므로 평균을 먼저 계산해야 갱신 전 값을 참조함
+        'avg_rating': Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+        'rating_count': rating_count,
+        'rating_sum': rating_sum,
+    }
+    for field in ['cook_count', 'save_count']:
+        if field in deltas:
+            updates[field] = F(field) + deltas[field]
+
+    stats = RecipeStats.objects.filter(recipe_id=recipe_id)
+    if not stats.update(**updates) and sign > 0:
+        RecipeStats.objects.get_or_create(recipe_id=recipe_id)
+        stats.update(**updates)
+
+
+def rebuild_recipe_stats():
+    """
+    상호작용 테이블 전체에서 레시피 통계를 다시 계산
+
+    Returns:
+        통계 행 수
+    """
+    RecipeStats = global_apps.get_model('recommandationManager', 'RecipeStats')
+    UserRecipeInteraction = global_apps.get_model('recommandationManager', 'UserRecipeInteraction')
+
+    aggregated = UserRecipeInteraction.objects.values('recipe_id').annotate(
+        rating_count=Count('rating'),
+        rating_sum=Sum('rating', default=0),
+        cook_count=Count('id', filter=Q(interaction_type='cook')),
+        save_count=Count('id', filter=Q(interaction_type='save')),
+    ).order_by()
+
+    stats = [
+        RecipeStats(
+            recipe_id=row['recipe_id'],
+            rating_count=row['rating_count'],
+            rating_sum=row['rating_sum'],
+            avg_rating=row['rating_sum'] / row['rating_count'] if row['rating_count'] else None,
+            cook_count=row['cook_count'],
+            save_count=row['save_count'],
+        )
+        for row in aggregated.iterator()
+    ]
+
+    with transaction.atomic():
+        RecipeStats.objects.all().delete()
+        RecipeStats.objects.bulk_create(stats, batch_size=BATCH_SIZE)
+    return len(stats)
@@ -6,6 +6,7 @@
 - 레시피 상호작용 데이터 직렬화 (UserRecipeInteractionSerializer)
 - 추천 결과 데이터 직렬화 (RecommendationSerializer)
 - 사용자 선호도 요약 정보 직렬화 (UserPreferenceSummarySerializer)
+- 재료 기반 추천 결과 직렬화 (IngredientRecommendationSerializer)
 """
 
 from rest_framework import serializers
@@ -78,10 +79,12 @@ class RecommendationSerializer(serializers.ModelSerializer):
     - 추천된 레시피 상세 정보 포함
     - 추천 점수 및 추천 이유 제공
     - 사용자 상호작용 여부 표시
+
+    id는 상호작용 기록에 사용하는 recommendation_id이며, 이력이 저장되기 전에도 유효합니다.
     """
+    id = serializers.UUIDField(source='recommendation_id', read_only=True)
     recipe = RecipeSerializer(read_only=True)
-    
-    
+
     class Meta:
         model = RecommendationHistory
         fields = [
@@ -110,4 +113,15 @@ class UserPreferenceSummarySerializer(serializers.ModelSerializer):
             'dietary_restriction', 'max_cooking_time',
             'preferred_difficulty', 'allergies',
             'favorite_categories'
-        ]
\ No newline at end of file
+        ]
+
+class IngredientRecommendationSerializer(serializers.Serializer):
+    """
+    재료 기반 레시피 추천 결과를 직렬화하는 serializer
+
+    주요 기능:
+    - 추천된 레시피 상세 정보 포함
+    - 입력한 재료와의 유사도 점수 제공
+    """
+    recipe = RecipeSerializer(read_only=True)
+    score = serializers.FloatField(read_only=True)
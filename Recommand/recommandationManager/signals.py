@@ -0,0 +1,119 @@
+"""
+추천 캐시 무효화와 레시피 통계 갱신을 위한 시그널 핸들러
+
+추천 입력이 바뀌면 해당하는 버전 스탬프를 올립니다. 트랜잭션이 롤백되거나
+커밋 전에 다른 요청이 옛 데이터로 캐시를 채우는 일이 없도록 커밋 후에 실행합니다.
+
+RecipeSimilarity는 build_recipe_similarity 명령이 bulk_create/대량 삭제로 교체하므로
+post_delete 리시버를 두지 않습니다 (리시버가 있으면 Django가 행 단위 삭제로 바뀜).
+명령이 빌드를 마친 뒤 직접 전역 버전을 올립니다.
+
+레시피나 재료 구성이 바뀌면 커밋 후 재료 인덱스와 해당 레시피의 유사도만 갱신합니다
+(index_updater 참고).
+
+레시피 통계(RecipeStats)는 상호작용이 저장/삭제되는 같은 트랜잭션 안에서 갱신합니다.
+수정 시 이전 값을 알기 위해 인스턴스를 불러올 때 유형/레시피/점수를 기억해 둡니다.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from articles.allergens import allergy_terms, ensure_allergens
+from articles.models import Allergen, Category, Ingredient, Recipe, RecipeIngredient
+from .models import UserPreference, UserRecipeInteraction, RecipeSimilarity
+from . import cache as recommendation_cache
+from .index_updater import schedule_recipe_refresh
+from .recipe_stats import apply_deltas, interaction_deltas
+
+
+@receiver([post_save, post_delete], sender=UserPreference)
+@receiver([post_save, post_delete], sender=UserRecipeInteraction)
+def invalidate_user_recommendations(sender, instance, **kwargs):
+    transaction.on_commit(lambda: recommendation_cache.bump_user_version(instance.user_id))
+
+
+@receiver(post_save, sender=UserPreference)
+def index_preference_allergies(sender, instance, raw=False, **kwargs):
+    # 추천 시 알레르기 제외가 사전 계산된 인덱스 조회 한 번으로 끝나도록 저장 시점에 항목 생성
+    if not raw and instance.allergies:
+        ensure_allergens(allergy_terms(instance.allergies))
+
+
+@receiver(m2m_changed, sender=UserPreference.favorite_categories.through)
+def invalidate_on_favorite_categories_change(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # 카테고리 쪽에서 변경된 경우 어떤 사용자가 영향을 받는지 알 수 없으므로 전체 무효화
+        transaction.on_commit(recommendation_cache.bump_global_version)
+    else:
+        transaction.on_commit(lambda: recommendation_cache.bump_user_version(instance.user_id))
+
+
+@receiver(m2m_changed, sender=Recipe.categories.through)
+def invalidate_on_recipe_categories_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(recommendation_cache.bump_global_version)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver(post_delete, sender=Category)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver(post_save, sender=RecipeSimilarity)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Allergen)
+def invalidate_all_recommendations(sender, **kwargs):
+    transaction.on_commit(recommendation_cache.bump_global_version)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def refresh_recipe_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    transaction.on_commit(lambda: schedule_recipe_refresh([recipe_id]))
+
+
+_SNAPSHOT_FIELDS = ['recipe_id', 'interaction_type', 'rating']
+
+
+def _interaction_snapshot(instance):
+    return tuple(getattr(instance, field) for field in _SNAPSHOT_FIELDS)
+
+
+@receiver(post_init, sender=UserRecipeInteraction)
+def remember_interaction_state(sender, instance, **kwargs):
+    # 지연 로딩된 필드는 건드리지 않음 (접근하면 추가 쿼리가 발생)
+    loaded = all(field in instance.__dict__ for field in _SNAPSHOT_FIELDS)
+    instance._stats_snapshot = _interaction_snapshot(instance) if instance.pk and loaded else None
+
+
+@receiver(pre_save, sender=UserRecipeInteraction)
+def load_interaction_state(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk and instance._stats_snapshot is None:
+        instance._stats_snapshot = UserRecipeInteraction.objects.filter(
+            pk=instance.pk
+        ).values_list(*_SNAPSHOT_FIELDS).first()
+
+
+@receiver(post_save, sender=UserRecipeInteraction)
+def update_recipe_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance._stats_snapshot
+    current = _interaction_snapshot(instance)
+    if previous == current:
+        return
+    if previous is not None:
+        recipe_id, interaction_type, rating = previous
+        apply_deltas(recipe_id, interaction_deltas(interaction_type, rating), sign=-1)
+    recipe_id, interaction_type, rating = current
+    apply_deltas(recipe_id, interaction_deltas(interaction_type, rating))
+    instance._stats_snapshot = current
+
+
+@receiver(post_delete, sender=UserRecipeInteraction)
+def update_recipe_stats_on_delete(sender, instance, **kwargs):
+    recipe_id, interaction_type, rating = instance._stats_snapshot or _interaction_snapshot(instance)
+    apply_deltas(recipe_id, interaction_deltas(interaction_type, rating), sign=-1)
@@ -0,0 +1,176 @@
+"""
+레시피 간 유사도 계산을 위한 벡터화 및 top-k 이웃 탐색 모듈
+
+이 모듈은 Django ORM에 의존하지 않는 순수 계산 로직만 포함합니다:
+- 레시피-재료 쌍으로부터 TF-IDF 행렬 생성 (build_ingredient_matrix)
+- 희소 행렬을 행 블록 단위로 곱해 레시피별 상위 k개 이웃 탐색 (top_k_similarity)
+
+전체 N×N 유사도 행렬은 만들지 않습니다. 메모리 상한(max_memory_mb)에 맞춰
+블록 크기를 정하고, 블록마다 argpartition으로 상위 k개만 남긴 뒤 버립니다.
+결과는 (N, k) 크기의 int32 인덱스 / float32 점수 배열로 반환됩니다.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfTransformer
+
+# 블록의 셀 하나가 차지하는 대략적인 바이트 수
+# (희소 곱 결과 8 + 밀집 float32 4 + argpartition int64 8 + 여유분)
+BYTES_PER_CELL = 24
+
+DEFAULT_MAX_MEMORY_MB = 256
+
+
+def build_ingredient_matrix(recipe_ids, pairs):
+    """
+    (recipe_id, ingredient_id) 쌍 목록으로 레시피 × 재료 TF-IDF 행렬을 생성
+
+    Parameters:
+        recipe_ids: 행 순서를 결정하는 레시피 id 목록
+        pairs: (recipe_id, ingredient_id) 튜플의 iterable
+
+    Returns:
+        각 행이 L2 정규화된 CSR 행렬 (행 간 내적 = 코사인 유사도)
+    """
+    row_of = {recipe_id: row for row, recipe_id in enumerate(recipe_ids)}
+    column_of = {}
+    rows, columns = [], []
+    for recipe_id, ingredient_id in pairs:
+        row = row_of.get(recipe_id)
+        if row is None:
+            continue
+        rows.append(row)
+        columns.append(column_of.setdefault(ingredient_id, len(column_of)))
+
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(recipe_ids), max(len(column_of), 1)),
+    )
+    # 같은 재료가 여러 번 들어간 경우 1로 고정
+    counts.data[:] = 1.0
+    return TfidfTransformer().fit_transform(counts).tocsr()
+
+
+def block_size_for(n_columns, max_memory_mb=DEFAULT_MAX_MEMORY_MB, n_jobs=1):
+    """동시에 처리되는 블록들이 max_memory_mb 안에 들어가도록 블록당 행 수를 계산"""
+    budget = max_memory_mb * 1024 * 1024 // max(n_jobs, 1)
+    return max(1, int(budget // (max(n_columns, 1) * BYTES_PER_CELL)))
+
+
+def _block_top_k(matrix, matrix_t, block_rows, k, threshold):
+    """한 행 블록의 유사도를 계산하고 행별 상위 k개만 남김"""
+    products = (matrix[block_rows] @ matrix_t).toarray()
+    n_columns = products.shape[1]
+
+    # 자기 자신은 이웃에서 제외
+    products[np.arange(len(block_rows)), block_rows] = -np.inf
+
+    if k < n_columns:
+        candidates = np.argpartition(-products, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_columns), products.shape)
+    candidate_scores = np.take_along_axis(products, candidates, axis=1)
+
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    indices = np.take_along_axis(candidates, order, axis=1).astype(np.int32)
+    scores = np.take_along_axis(candidate_scores, order, axis=1).astype(np.float32)
+
+    # 점수가 기준 미만이거나 겹치는 재료가 없으면 -1로 채움
+    dropped = (scores < threshold) | (scores <= 0)
+    indices[dropped] = -1
+    scores[dropped] = 0.0
+
+    if indices.shape[1] < k:
+        padding = k - indices.shape[1]
+        indices = np.pad(indices, ((0, 0), (0, padding)), constant_values=-1)
+        scores = np.pad(scores, ((0, 0), (0, padding)))
+    return indices, scores
+
+
+def iter_top_k_blocks(matrix, k=20, threshold=0.0, rows=None,
+                      max_memory_mb=DEFAULT_MAX_MEMORY_MB, n_jobs=None):
+    """
+    행 블록 단위로 상위 k개 이웃을 계산해 순서대로 반환
+
+    블록은 스레드 풀에서 병렬로 처리됩니다 (희소 곱셈과 argpartition은 GIL을 해제).
+
+    Parameters:
+        matrix: 행이 L2 정규화된 CSR 행렬
+        k: 행별로 유지할 최대 이웃 수
+        threshold: 이 값 미만의 유사도는 버림
+        rows: 계산할 행 번호 목록 (None이면 전체)
+        max_memory_mb: 동시에 처리 중인 블록들이 사용할 메모리 상한
+        n_jobs: 병렬 스레드 수 (None이면 CPU 코어 수)
+
+    Yields:
+        (block_rows, indices, scores) - indices/scores는 (len(block_rows), k) 배열,
+        점수 내림차순 정렬, 빈 자리는 인덱스 -1
+    """
+    matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+    if rows is None:
+        rows = np.arange(matrix.shape[0])
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) == 0 or k <= 0:
+        return
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    block_size = block_size_for(matrix.shape[0], max_memory_mb, n_jobs)
+    blocks = [rows[start:start + block_size] for start in range(0, len(rows), block_size)]
+    matrix_t = matrix.T.tocsc()
+
+    def compute(block_rows):
+        return _block_top_k(matrix, matrix_t, block_rows, k, threshold)
+
+    if n_jobs == 1 or len(blocks) == 1:
+        results = map(compute, blocks)
+        for block_rows, (indices, scores) in zip(blocks, results):
+            yield block_rows, indices, scores
+        return
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        # 한 번에 n_jobs개 블록만 진행시켜 메모리 상한을 지킴
+        for start in range(0, len(blocks), n_jobs):
+            window = blocks[start:start + n_jobs]
+            for block_rows, (indices, scores) in zip(window, executor.map(compute, window)):
+                yield block_rows, indices, scores
+
+
+def top_k_similarity(matrix, k=20, threshold=0.0, rows=None,
+                     max_memory_mb=DEFAULT_MAX_MEMORY_MB, n_jobs=None):
+    """
+    모든 (또는 지정한) 행의 상위 k개 이웃을 압축된 배열로 반환
+
+    Returns:
+        (indices, scores) - (len(rows), k) 크기의 int32 / float32 배열
+    """
+    n_rows = matrix.shape[0] if rows is None else len(rows)
+    indices = np.full((n_rows, k), -1, dtype=np.int32)
+    scores = np.zeros((n_rows, k), dtype=np.float32)
+
+    offset = 0
+    for block_rows, block_indices, block_scores in iter_top_k_blocks(
+        matrix, k, threshold, rows, max_memory_mb, n_jobs
+    ):
+        indices[offset:offset + len(block_rows)] = block_indices
+        scores[offset:offset + len(block_rows)] = block_scores
+        offset += len(block_rows)
+    return indices, scores
+
+
+def top_k_neighbours(matrix, k=20, threshold=0.1, rows=None,
+                     max_memory_mb=DEFAULT_MAX_MEMORY_MB, n_jobs=None):
+    """
+    행별 상위 k개 이웃을 하나씩 반환 (빈 자리는 제거)
+
+    Yields:
+        (row, neighbour_rows, scores) - 점수 내림차순으로 정렬된 배열
+    """
+    for block_rows, indices, scores in iter_top_k_blocks(
+        matrix, k, threshold, rows, max_memory_mb, n_jobs
+    ):
+        for row, row_indices, row_scores in zip(block_rows, indices, scores):
+            keep = row_indices >= 0
+            yield int(row), row_indices[keep], row_scores[keep]
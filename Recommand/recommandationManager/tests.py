@@ -1,3 +1,929 @@
-from django.test import TestCase
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from unittest import mock, skipUnless
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from Recommand.sql_instrumentation import enforce_query_budgets
+from articles.models import Category, CookingTool, Ingredient, Recipe, RecipeIngredient, RecipeStep
+from .models import (
+    UserPreference, UserRecipeInteraction, RecipeStats, RecipeSimilarity,
+    RecipeSimilarityBuild, RecommendationHistory
+)
+from .ann import IVFIndex
+from .benchmark import ENDPOINTS, compare_results, run_benchmark, seed_benchmark_data
+from .category_sampler import category_recipe_ids, sample_category_recipes
+from .collaborative import ItemItemModel, get_item_cf_model, interaction_arrays, reset_item_cf_model
+from .history_writer import HistoryWriter, get_history_writer, reset_history_writer
+from .neighbours import update_recipe_neighbours
+from .similarity import block_size_for, build_ingredient_matrix, top_k_similarity
+from . import cache as recommendation_cache
+from .index_updater import (
+    CHANGES_KEY, RecipeIndexUpdater, current_version, get_recipe_index_updater, publish_recipe_changes,
+    reset_recipe_index_updater,
+)
+from .recipe_index import RecipeIndex, get_recipe_index, loaded_recipe_index, reset_recipe_index
+from .tokenizers import (
+    DEFAULT_SENTENCEPIECE_MODEL, CachedTokenizer, TokenCorpusStore, Tokenizer, get_tokenizer
+)
 
-# Create your tests here.
+
+def create_recipe(author, name, ingredients, **kwargs):
+    recipe = Recipe.objects.create(
+        name=name,
+        author=author,
+        description=f'{name} 설명',
+        cooking_time=kwargs.get('cooking_time', 30),
+        difficulty=kwargs.get('difficulty', 'easy'),
+        serving_size=2
+    )
+    for ingredient in ingredients:
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=1, unit='개')
+    return recipe
+
+
+class BuildRecipeSimilarityCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cook', password='pw')
+        self.egg, self.garlic, self.onion, self.beef = [
+            Ingredient.objects.create(name=name, price=1000, unit='개')
+            for name in ['계란', '마늘', '양파', '소고기']
+        ]
+        self.omelette = create_recipe(self.user, '계란말이', [self.egg, self.onion])
+        self.fried_egg = create_recipe(self.user, '계란후라이', [self.egg])
+        self.bulgogi = create_recipe(self.user, '불고기', [self.beef, self.garlic])
+
+    def build(self, *args):
+        call_command('build_recipe_similarity', *args, stdout=StringIO())
+
+    def test_full_build_keeps_top_k_above_threshold(self):
+        self.build('--top-k', '1', '--threshold', '0.1')
+
+        pairs = set(RecipeSimilarity.objects.values_list('recipe1_id', 'recipe2_id'))
+        self.assertEqual(pairs, {
+            (self.omelette.id, self.fried_egg.id),
+            (self.fried_egg.id, self.omelette.id),
+        })
+        self.assertEqual(RecipeSimilarityBuild.objects.get().mode, 'full')
+
+    def test_incremental_build_recomputes_changed_recipes(self):
+        self.build()
+        build = RecipeSimilarityBuild.objects.get()
+        self.assertFalse(RecipeSimilarity.objects.filter(recipe1=self.bulgogi).exists())
+
+        steak = create_recipe(self.user, '마늘스테이크', [self.beef, self.garlic, self.onion])
+        self.build('--incremental')
+
+        latest = RecipeSimilarityBuild.objects.latest()
+        self.assertEqual(latest.mode, 'incremental')
+        self.assertGreater(latest.started_at, build.started_at)
+        self.assertTrue(RecipeSimilarity.objects.filter(recipe1=steak, recipe2=self.bulgogi).exists())
+        self.assertTrue(RecipeSimilarity.objects.filter(recipe1=self.bulgogi, recipe2=steak).exists())
+
+    def test_incremental_build_skips_recipes_created_during_the_build(self):
+        self.build()
+
+        def build_matrix_then_add_recipe(*args):
+            matrix = build_ingredient_matrix(*args)
+            create_recipe(self.user, '양파볶음', [self.onion])
+            return matrix
+
+        with mock.patch(
+            'recommandationManager.neighbours.build_ingredient_matrix',
+            side_effect=build_matrix_then_add_recipe,
+        ):
+            self.build('--incremental')
+
+        onion = Recipe.objects.get(name='양파볶음')
+        self.assertFalse(RecipeSimilarity.objects.filter(recipe1=onion).exists())
+        self.build('--incremental')
+        self.assertTrue(RecipeSimilarity.objects.filter(recipe1=onion, recipe2=self.omelette).exists())
+
+    def test_incremental_build_sees_ingredient_changes(self):
+        self.build()
+        self.assertFalse(RecipeSimilarity.objects.filter(recipe1=self.bulgogi).exists())
+
+        # 재료만 바뀐 레시피도 다음 증분 빌드에서 다시 계산
+        RecipeIngredient.objects.create(recipe=self.bulgogi, ingredient=self.onion, quantity=1, unit='개')
+        self.build('--incremental')
+        self.assertTrue(RecipeSimilarity.objects.filter(recipe1=self.bulgogi, recipe2=self.omelette).exists())
+
+        RecipeIngredient.objects.filter(recipe=self.bulgogi, ingredient=self.onion).delete()
+        self.build('--incremental')
+        self.assertFalse(RecipeSimilarity.objects.filter(recipe1=self.bulgogi).exists())
+
+
+@override_settings(RECIPE_INDEX_BACKGROUND=False)
+class HistoryWriterTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('eater', password='pw')
+        self.recipe = create_recipe(self.user, '비빔밥', [])
+
+    def histories(self, count):
+        return [RecommendationHistory(user=self.user, recipe=self.recipe, score=1.0, reason='') for _ in range(count)]
+
+    def test_bounded_buffer_drops_and_counts_overflow(self):
+        writer = HistoryWriter(batch_size=100, flush_interval_ms=1000, max_buffer=3)
+        writer.enqueue(self.histories(5), background=False)
+
+        self.assertEqual(writer.stats()['dropped'], 2)
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(RecommendationHistory.objects.count(), 3)
+
+    def test_full_batch_is_written_without_waiting(self):
+        writer = HistoryWriter(batch_size=2, flush_interval_ms=1000, max_buffer=10)
+        writer.enqueue(self.histories(1), background=False)
+        self.assertEqual(RecommendationHistory.objects.count(), 0)
+        writer.enqueue(self.histories(1), background=False)
+        self.assertEqual(RecommendationHistory.objects.count(), 2)
+
+    def test_background_thread_flushes_on_interval_and_close(self):
+        writer = HistoryWriter(batch_size=100, flush_interval_ms=20, max_buffer=10)
+        writer.enqueue(self.histories(2))
+        for _ in range(100):
+            if writer.stats()['written'] == 2:
+                break
+            time.sleep(0.02)
+        self.assertEqual(writer.stats()['written'], 2)
+
+        writer.enqueue(self.histories(1))
+        writer.close()
+        self.assertEqual(RecommendationHistory.objects.count(), 3)
+        self.assertEqual(writer.stats()['queued'], 0)
+
+
+@override_settings(RECOMMENDATION_HISTORY_BACKGROUND=False, RECIPE_INDEX_BACKGROUND=False)
+class CategorySamplerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_history_writer()
+        self.addCleanup(reset_history_writer)
+        self.user = User.objects.create_user('eater', password='pw')
+        self.korean = Category.objects.create(name='한식')
+        self.dessert = Category.objects.create(name='디저트')
+        self.easy = []
+        for i in range(30):
+            recipe = create_recipe(self.user, f'한식 {i}', [], difficulty='easy' if i % 3 else 'hard')
+            recipe.categories.add(self.korean)
+            if i % 3:
+                self.easy.append(recipe.id)
+        create_recipe(self.user, '케이크', []).categories.add(self.dessert)
+
+    def test_samples_filtered_recipes_from_categories(self):
+        recipes = Recipe.objects.filter(difficulty='easy')
+        sampled = sample_category_recipes([self.korean.id], recipes, k=5, exclude=self.easy[:3])
+
+        self.assertEqual(len(sampled), 5)
+        self.assertEqual(len(set(sampled)), 5)
+        self.assertTrue(set(sampled) <= set(self.easy[3:]))
+
+    def test_small_categories_return_every_match(self):
+        sampled = sample_category_recipes([self.dessert.id], Recipe.objects.all(), k=5)
+        self.assertEqual(sampled, [Recipe.objects.get(name='케이크').id])
+
+    def test_category_arrays_are_cached_until_membership_changes(self):
+        category_recipe_ids([self.dessert.id])
+        with self.assertNumQueries(0):
+            category_recipe_ids([self.dessert.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(self.user, '푸딩', []).categories.add(self.dessert)
+        self.assertEqual(len(category_recipe_ids([self.dessert.id])[self.dessert.id]), 2)
+
+    def test_recommendations_fall_back_to_favourite_categories(self):
+        preference = UserPreference.objects.create(user=self.user, preferred_difficulty='beginner')
+        preference.favorite_categories.add(self.korean)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(reverse('recipe-recommendations'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+        self.assertTrue({item['recipe']['id'] for item in response.data} <= set(self.easy))
+
+
+class RecipeStatsTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'user{i}', password='pw') for i in range(3)]
+        self.recipe = create_recipe(self.users[0], '비빔밥', [])
+
+    def stats(self):
+        stats = RecipeStats.objects.get(recipe=self.recipe)
+        return stats.rating_count, stats.rating_sum, stats.avg_rating, stats.cook_count, stats.save_count
+
+    def test_interactions_update_stats_in_place(self):
+        first = UserRecipeInteraction.objects.create(
+            user=self.users[0], recipe=self.recipe, interaction_type='rate', rating=5
+        )
+        UserRecipeInteraction.objects.create(user=self.users[1], recipe=self.recipe, interaction_type='rate', rating=2)
+        UserRecipeInteraction.objects.create(user=self.users[2], recipe=self.recipe, interaction_type='cook')
+        UserRecipeInteraction.objects.create(user=self.users[2], recipe=self.recipe, interaction_type='save')
+        UserRecipeInteraction.objects.create(user=self.users[2], recipe=self.recipe, interaction_type='view')
+        self.assertEqual(self.stats(), (2, 7, 3.5, 1, 1))
+
+        first = UserRecipeInteraction.objects.get(pk=first.pk)
+        first.rating = 3
+        first.save()
+        self.assertEqual(self.stats(), (2, 5, 2.5, 1, 1))
+
+        UserRecipeInteraction.objects.filter(interaction_type='rate').delete()
+        self.assertEqual(self.stats(), (0, 0, None, 1, 1))
+
+    def test_rebuild_command_repairs_stats(self):
+        UserRecipeInteraction.objects.create(user=self.users[0], recipe=self.recipe, interaction_type='rate', rating=4)
+        UserRecipeInteraction.objects.create(user=self.users[1], recipe=self.recipe, interaction_type='cook')
+        expected = self.stats()
+        RecipeStats.objects.update(rating_count=0, rating_sum=0, avg_rating=None, cook_count=9)
+
+        call_command('rebuild_recipe_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), expected)
+
+    def test_deleting_recipe_with_interactions(self):
+        UserRecipeInteraction.objects.create(user=self.users[0], recipe=self.recipe, interaction_type='rate', rating=4)
+        self.recipe.delete()
+        self.assertFalse(RecipeStats.objects.exists())
+
+
+class ItemItemModelTest(SimpleTestCase):
+    def setUp(self):
+        # 사용자 1, 2는 레시피 10, 20을 함께 즐겼고 사용자 3은 30, 40만 봄
+        self.model = ItemItemModel.train(
+            user_ids=[1, 1, 2, 2, 2, 3, 3],
+            recipe_ids=[10, 20, 10, 20, 30, 30, 40],
+            interaction_types=['cook', 'rate', 'save', 'rate', 'view', 'view', 'view'],
+            ratings=[None, 5, None, 4, None, None, None],
+            k=2, max_memory_mb=1,
+        )
+
+    def test_neighbours_follow_co_interactions(self):
+        self.assertEqual(self.model.recipe_ids.tolist(), [10, 20, 30, 40])
+        neighbours = self.model.neighbours.toarray()
+        self.assertEqual(neighbours.shape, (4, 4))
+        self.assertTrue(np.all(np.diag(neighbours) == 0))
+        self.assertEqual(int(np.argmax(neighbours[0])), 1)
+        self.assertEqual(neighbours[0, 3], 0)
+
+    def test_score_excludes_seen_and_unknown_recipes(self):
+        scored = self.model.score([10, 999], ['cook', 'view'], [None, None], top_n=5)
+        recipe_ids = [recipe_id for recipe_id, _ in scored]
+        self.assertEqual(recipe_ids[0], 20)
+        self.assertNotIn(10, recipe_ids)
+        self.assertNotIn(40, recipe_ids)
+        self.assertEqual(self.model.score([999], ['view'], [None]), [])
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.npz')
+            self.model.save(path)
+            loaded = ItemItemModel.load(path)
+
+        np.testing.assert_array_equal(loaded.recipe_ids, self.model.recipe_ids)
+        np.testing.assert_allclose(loaded.neighbours.toarray(), self.model.neighbours.toarray())
+        self.assertEqual(loaded.weights, self.model.weights)
+
+    def test_interaction_arrays_are_filled_in_chunks(self):
+        rows = [(1, 10, 'cook', None), (1, 20, 'rate', 5), (2, 10, 'view', None)]
+        user_ids, recipe_ids, interaction_types, ratings = interaction_arrays(iter(rows), chunk_size=2)
+
+        self.assertEqual(user_ids.tolist(), [1, 1, 2])
+        self.assertEqual(recipe_ids.tolist(), [10, 20, 10])
+        self.assertEqual(interaction_types.tolist(), ['cook', 'rate', 'view'])
+        np.testing.assert_array_equal(ratings, np.array([np.nan, 5, np.nan], dtype=np.float32))
+        self.assertEqual(ratings.dtype, np.float32)
+
+        self.assertEqual([len(column) for column in interaction_arrays([])], [0, 0, 0, 0])
+
+
+@enforce_query_budgets
+@override_settings(RECOMMENDATION_HISTORY_BACKGROUND=False)
+class ItemCFRecommendationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_history_writer()
+        reset_item_cf_model()
+        self.addCleanup(reset_history_writer)
+        self.addCleanup(reset_item_cf_model)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'item_cf_model.npz')
+
+        self.user = User.objects.create_user('eater', password='pw')
+        UserPreference.objects.create(user=self.user)
+        others = [User.objects.create_user(f'cook{i}', password='pw') for i in range(3)]
+        self.kimchi_stew, self.rolled_omelette, self.pasta = [
+            create_recipe(self.user, name, []) for name in ['김치찌개', '계란말이', '파스타']
+        ]
+        for other in others:
+            for recipe in [self.kimchi_stew, self.rolled_omelette]:
+                UserRecipeInteraction.objects.create(user=other, recipe=recipe, interaction_type='cook')
+        UserRecipeInteraction.objects.create(user=others[0], recipe=self.pasta, interaction_type='view')
+        UserRecipeInteraction.objects.create(user=self.user, recipe=self.kimchi_stew, interaction_type='save')
+
+    def test_command_trains_model_used_by_recommendations(self):
+        with override_settings(ITEM_CF_MODEL_PATH=self.path):
+            call_command('train_item_cf', '--output', self.path, '--weight', 'view=0.5', stdout=StringIO())
+            model = get_item_cf_model()
+            self.assertEqual(model.weights['view'], 0.5)
+
+            client = APIClient()
+            client.force_authenticate(self.user)
+            response = client.get(reverse('recipe-recommendations'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['recipe']['id'], self.rolled_omelette.id)
+        self.assertEqual(response.data[0]['score'], 1.0)
+        self.assertNotIn(self.kimchi_stew.id, [item['recipe']['id'] for item in response.data])
+
+    def test_missing_model_file_disables_stage(self):
+        with override_settings(ITEM_CF_MODEL_PATH=self.path):
+            self.assertIsNone(get_item_cf_model())
+
+
+class IVFIndexTest(SimpleTestCase):
+    def setUp(self):
+        # 특징 공간의 서로 다른 구간에 몰린 20개 묶음
+        rng = np.random.default_rng(0)
+        blocks = [
+            sparse.random(20, 10, density=0.5, format='csr', random_state=rng)
+            for _ in range(20)
+        ]
+        self.matrix = normalize(sparse.block_diag(blocks, format='csr')).astype(np.float32)
+
+    def test_probing_every_list_matches_exact_search(self):
+        index = IVFIndex.build(self.matrix, n_lists=10)
+        rows = np.arange(0, 400, 7)
+        indices, scores = index.search(
+            self.matrix, self.matrix[rows], k=5, n_probe=index.n_lists, exclude_rows=rows
+        )
+        _, expected = top_k_similarity(self.matrix, k=5, rows=rows)
+        np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-6)
+        self.assertFalse(np.any(indices == rows[:, None]))
+
+    def test_few_probes_keep_recall_on_clustered_data(self):
+        index = IVFIndex.build(self.matrix, n_lists=20)
+        _, approximate = index.search(self.matrix, self.matrix, k=5, n_probe=2)
+        _, exact = top_k_similarity(self.matrix, k=5, rows=np.arange(400))
+        # 자기 자신을 포함하므로 정확한 검색의 1순위와 같음
+        self.assertGreater(np.mean(approximate[:, 0] >= 0.999), 0.99)
+        self.assertGreater(np.mean(np.isclose(approximate[:, 1:], exact[:, :4], atol=1e-5)), 0.9)
+
+    def test_save_load_and_add(self):
+        index = IVFIndex.build(self.matrix[:200], n_lists=8)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ivf.npz')
+            index.save(path)
+            loaded = IVFIndex.load(path)
+        np.testing.assert_array_equal(loaded.centroids, index.centroids)
+        self.assertEqual(len(loaded), 200)
+
+        loaded.add(200, self.matrix[200:])
+        self.assertEqual(len(loaded), 400)
+        indices, _ = loaded.search(self.matrix, self.matrix[[399]], k=1, n_probe=loaded.n_lists)
+        self.assertEqual(indices[0, 0], 399)
+
+
+class TopKSimilarityTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.matrix = normalize(sparse.random(300, 40, density=0.1, format='csr', random_state=rng))
+
+    def test_matches_dense_cosine_top_k(self):
+        indices, scores = top_k_similarity(self.matrix, k=5, max_memory_mb=1, n_jobs=4)
+
+        self.assertEqual(indices.dtype, np.int32)
+        self.assertEqual(scores.dtype, np.float32)
+        dense = (self.matrix @ self.matrix.T).toarray()
+        np.fill_diagonal(dense, -np.inf)
+        expected = -np.sort(-dense, axis=1)[:, :5]
+        expected[expected <= 0] = 0
+        np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-6)
+
+        rows = np.arange(len(indices))[:, None]
+        self.assertFalse(np.any(indices == rows))
+
+    def test_block_size_respects_memory_cap(self):
+        self.assertEqual(block_size_for(100_000, max_memory_mb=1, n_jobs=1), 1)
+        self.assertLess(block_size_for(1_000, max_memory_mb=1, n_jobs=4), block_size_for(1_000, max_memory_mb=1, n_jobs=1))
+
+
+@enforce_query_budgets
+@override_settings(RECOMMENDATION_HISTORY_BACKGROUND=False, RECIPE_INDEX_BACKGROUND=False, ITEM_CF_MODEL_PATH=None)
+class RecipeRecommendationViewTest(TestCase):
+    # 선호도 1 + 유사도 후보 1 + 인기 후보 1 + 레시피 조회 5 (레시피, 단계, 도구, 카테고리, 재료)
+    # 이력은 요청 밖에서 저장되므로 포함되지 않음
+    QUERY_BUDGET = 8
+
+    def setUp(self):
+        cache.clear()
+        reset_history_writer()
+        reset_item_cf_model()
+        self.addCleanup(reset_history_writer)
+        self.addCleanup(reset_item_cf_model)
+        self.user = User.objects.create_user('eater', password='pw')
+        UserPreference.objects.create(user=self.user, preferred_difficulty='beginner', allergies='땅콩')
+        other = User.objects.create_user('critic', password='pw')
+
+        egg = Ingredient.objects.create(name='계란', price=1000, unit='개')
+        peanut = Ingredient.objects.create(name='땅콩', price=1000, unit='g')
+        pan = CookingTool.objects.create(name='프라이팬', description='팬')
+
+        self.liked = create_recipe(self.user, '좋아한 레시피', [egg])
+        UserRecipeInteraction.objects.create(user=self.user, recipe=self.liked, interaction_type='rate', rating=5)
+
+        self.similar = []
+        for i in range(6):
+            recipe = create_recipe(self.user, f'유사 레시피 {i}', [egg])
+            recipe.tools.add(pan)
+            RecipeStep.objects.create(recipe=recipe, step_number=1, description='굽기')
+            RecipeSimilarity.objects.create(recipe1=self.liked, recipe2=recipe, similarity_score=0.9 - i / 100)
+            self.similar.append(recipe)
+
+        self.popular = []
+        for i in range(5):
+            recipe = create_recipe(self.user, f'인기 레시피 {i}', [egg])
+            UserRecipeInteraction.objects.create(user=other, recipe=recipe, interaction_type='rate', rating=5)
+            self.popular.append(recipe)
+
+        # 필터에 걸러져야 하는 레시피
+        self.allergic = create_recipe(self.user, '땅콩 레시피', [egg, peanut])
+        self.hard = create_recipe(self.user, '어려운 레시피', [egg], difficulty='hard')
+        for recipe in [self.allergic, self.hard]:
+            RecipeSimilarity.objects.create(recipe1=self.liked, recipe2=recipe, similarity_score=0.99)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('recipe-recommendations')
+
+    def test_query_count_is_constant(self):
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        recipe_ids = [item['recipe']['id'] for item in response.data]
+        self.assertEqual(recipe_ids[:6], [recipe.id for recipe in self.similar])
+        self.assertEqual(len(recipe_ids), 11)
+        self.assertTrue(set(recipe_ids[6:]) <= {recipe.id for recipe in self.popular + [self.liked]})
+        self.assertNotIn(self.allergic.id, recipe_ids)
+        self.assertNotIn(self.hard.id, recipe_ids)
+        self.assertEqual(response.data[0]['recipe']['tools'][0]['name'], '프라이팬')
+
+    def test_query_count_does_not_grow_with_allergies(self):
+        preference = UserPreference.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            preference.allergies = '메밀, 땅콩, 키위, 조개류'
+            preference.save()
+
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(self.url)
+        self.assertNotIn(self.allergic.id, [item['recipe']['id'] for item in response.data])
+
+    def test_repeated_requests_do_not_fail_on_existing_history(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        get_history_writer().flush()
+        self.assertEqual(RecommendationHistory.objects.filter(user=self.user).count(), 2 * len(response.data))
+
+    def test_interaction_with_recommendation_id_before_history_is_written(self):
+        recommendation = self.client.get(self.url).data[0]
+        self.assertFalse(RecommendationHistory.objects.exists())
+
+        response = self.client.post(
+            reverse('recommendation-interaction', args=[recommendation['id']]),
+            {'interaction_type': 'rate', 'rating': 4}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        history = RecommendationHistory.objects.get(recommendation_id=recommendation['id'])
+        self.assertTrue(history.interacted)
+        self.assertEqual(history.recipe_id, recommendation['recipe']['id'])
+        self.assertTrue(UserRecipeInteraction.objects.filter(
+            user=self.user, recipe_id=history.recipe_id, interaction_type='rate', rating=4
+        ).exists())
+
+    def test_interaction_is_recorded_when_history_is_in_another_worker(self):
+        recommendation = self.client.get(self.url).data[0]
+        # 이력이 다른 워커의 저장 큐에 있는 상황 (이 프로세스의 큐에는 없음)
+        reset_history_writer()
+        url = reverse('recommendation-interaction', args=[recommendation['id']])
+
+        response = self.client.post(url, {'interaction_type': 'rate', 'rating': 4})
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.post(url, {'interaction_type': 'rate', 'rating': 4, 'recipe_id': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            url, {'interaction_type': 'rate', 'rating': 4, 'recipe_id': recommendation['recipe']['id']}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(RecommendationHistory.objects.exists())
+        self.assertTrue(UserRecipeInteraction.objects.filter(
+            user=self.user, recipe_id=recommendation['recipe']['id'], interaction_type='rate', rating=4
+        ).exists())
+
+    def test_repeat_visit_is_served_from_cache(self):
+        first = self.client.get(self.url)
+
+        # 레시피 조회 5, 순위 계산 쿼리는 실행되지 않음
+        with self.assertNumQueries(5):
+            second = self.client.get(self.url)
+
+        self.assertEqual(
+            [item['recipe']['id'] for item in first.data],
+            [item['recipe']['id'] for item in second.data]
+        )
+        self.assertEqual(recommendation_cache.get_stats()['hits'], 1)
+        self.assertEqual(recommendation_cache.get_stats()['misses'], 1)
+
+    def test_rating_change_invalidates_cache(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRecipeInteraction.objects.create(
+                user=self.user, recipe=self.similar[0], interaction_type='rate', rating=1
+            )
+
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            self.client.get(self.url)
+        self.assertEqual(recommendation_cache.get_stats()['misses'], 2)
+
+    def test_recipe_change_invalidates_cache(self):
+        self.client.get(self.url)
+
+        deleted_id = self.similar[0].id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.similar[0].delete()
+
+        response = self.client.get(self.url)
+        self.assertNotIn(deleted_id, [item['recipe']['id'] for item in response.data])
+        self.assertEqual(recommendation_cache.get_stats()['misses'], 2)
+
+
+@enforce_query_budgets
+@override_settings(RECIPE_INDEX_PATH=None, RECIPE_INDEX_BACKGROUND=False)
+class IngredientRecommendationViewTest(TestCase):
+    def setUp(self):
+        reset_recipe_index()
+        self.addCleanup(reset_recipe_index)
+        self.user = User.objects.create_user('cook', password='pw')
+        scallion, garlic, egg, gochujang, beef = [
+            Ingredient.objects.create(name=name, price=1000, unit='개')
+            for name in ['대파', '다진 마늘', '계란', '고추장', '소고기']
+        ]
+        self.fried_rice = create_recipe(self.user, '계란볶음밥', [scallion, garlic, egg])
+        self.stew = create_recipe(self.user, '고추장찌개', [scallion, gochujang, beef], cooking_time=60)
+        self.steak = create_recipe(self.user, '스테이크', [beef], difficulty='hard')
+        self.client = APIClient()
+        self.url = reverse('ingredient-recommendations')
+
+    def test_scores_recipes_against_index(self):
+        response = self.client.get(self.url, {'ingredients': '대파, 마늘, 계란, 고추장'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['recipe']['id'] for item in response.data],
+            [self.fried_rice.id, self.stew.id]
+        )
+        self.assertGreater(response.data[0]['score'], response.data[1]['score'])
+
+    def test_index_is_built_once_per_process(self):
+        self.client.get(self.url, {'ingredients': '대파'})
+        index = get_recipe_index()
+
+        # 레시피 조회 1 + prefetch 4, 인덱스 재생성 쿼리 없음
+        with self.assertNumQueries(5):
+            self.client.get(self.url, {'ingredients': '계란'})
+        self.assertIs(get_recipe_index(), index)
+
+    def test_filters_by_query_params_and_preference(self):
+        response = self.client.get(self.url, {'ingredients': '대파', 'max_time': 30})
+        self.assertEqual([item['recipe']['id'] for item in response.data], [self.fried_rice.id])
+
+        UserPreference.objects.create(user=self.user, preferred_difficulty='beginner')
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url, {'ingredients': '소고기'})
+        self.assertEqual([item['recipe']['id'] for item in response.data], [self.stew.id])
+
+    def test_extracts_ingredients_from_free_text(self):
+        response = self.client.get(self.url, {'ingredients': '고추장(국산) 1큰술, 계란'})
+
+        self.assertEqual(
+            [item['recipe']['id'] for item in response.data],
+            [self.stew.id, self.fried_rice.id]
+        )
+
+    def test_requires_ingredients(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(RECIPE_INDEX_PATH=None, RECIPE_INDEX_BACKGROUND=False)
+class RecipeIndexUpdateTest(TestCase):
+    def setUp(self):
+        reset_recipe_index()
+        reset_recipe_index_updater()
+        self.addCleanup(reset_recipe_index)
+        self.addCleanup(reset_recipe_index_updater)
+        self.user = User.objects.create_user('cook', password='pw')
+        self.garlic, self.egg, self.rice, self.tofu = [
+            Ingredient.objects.create(name=name, price=1000, unit='개')
+            for name in ['마늘', '계란', '밥', '두부']
+        ]
+        self.garlic_rice = create_recipe(self.user, '마늘밥', [self.garlic, self.rice])
+        self.omelette = create_recipe(self.user, '계란말이', [self.egg])
+        self.index = get_recipe_index()
+        self.updater = get_recipe_index_updater()
+
+    def search(self, ingredients):
+        return [recipe_id for recipe_id, _ in loaded_recipe_index().search(ingredients)]
+
+    def test_new_recipe_is_searchable_and_gets_neighbours(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            fried_rice = create_recipe(self.user, '계란볶음밥', [self.egg, self.rice])
+
+        self.assertIs(loaded_recipe_index(), self.index)
+        self.assertEqual(self.search('밥, 계란')[0], fried_rice.id)
+        self.assertEqual(len(self.index), 3)
+        pairs = set(RecipeSimilarity.objects.values_list('recipe1_id', 'recipe2_id'))
+        self.assertTrue({
+            (fried_rice.id, self.omelette.id), (self.omelette.id, fried_rice.id),
+            (fried_rice.id, self.garlic_rice.id), (self.garlic_rice.id, fried_rice.id),
+        } <= pairs)
+
+    def test_edits_replace_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.filter(recipe=self.garlic_rice, ingredient=self.garlic).delete()
+            self.omelette.delete()
+
+        self.assertEqual(self.search('마늘'), [])
+        self.assertEqual(self.search('계란'), [])
+        self.assertEqual(self.search('밥'), [self.garlic_rice.id])
+        self.assertEqual(len(self.index), 1)
+
+    def test_compaction_refreshes_vocabulary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tofu_rice = create_recipe(self.user, '두부밥', [self.tofu, self.rice])
+        # 기존 어휘에 없는 재료는 재구축 전까지 검색되지 않음
+        self.assertNotIn(tofu_rice.id, self.search('두부'))
+        self.assertGreater(self.index.updates, 0)
+
+        get_recipe_index_updater().compact()
+        compacted = loaded_recipe_index()
+        self.assertIsNot(compacted, self.index)
+        self.assertEqual(compacted.updates, 0)
+        self.assertEqual(self.search('두부'), [tofu_rice.id])
+
+    @override_settings(RECIPE_INDEX_ANN_MIN_RECIPES=1, RECIPE_INDEX_ANN_PROBES=100)
+    def test_approximate_index_follows_updates(self):
+        index = RecipeIndex.build()
+        self.assertIsNotNone(index.ann)
+        create_recipe(self.user, '마늘계란밥', [self.garlic, self.egg, self.rice])
+        recipe_id = Recipe.objects.get(name='마늘계란밥').id
+        index.refresh_recipes([recipe_id])
+
+        self.assertEqual(index.search('마늘, 계란, 밥')[0][0], recipe_id)
+        self.assertEqual(
+            {neighbour for neighbour, _ in index.neighbours([recipe_id])[recipe_id]},
+            {self.garlic_rice.id, self.omelette.id}
+        )
+
+    def test_changes_published_by_another_worker_are_applied(self):
+        # 다른 워커가 커밋하고 발행한 변경 (이 프로세스의 on_commit은 실행되지 않음)
+        fried_rice = create_recipe(self.user, '계란볶음밥', [self.egg, self.rice])
+        publish_recipe_changes([fried_rice.id])
+        self.assertNotIn(fried_rice.id, self.search('밥, 계란'))
+
+        self.assertEqual(self.updater.sync(), 1)
+        self.assertEqual(self.search('밥, 계란')[0], fried_rice.id)
+        self.assertTrue(RecipeSimilarity.objects.filter(recipe1=fried_rice).exists())
+
+        # 같은 버전을 확인한 다른 워커는 인덱스만 갱신하고 유사도는 다시 계산하지 않음
+        RecipeSimilarity.objects.all().delete()
+        other_worker = RecipeIndexUpdater(delay_ms=0, compact_interval=0)
+        other_worker.seen_version -= 1
+        self.assertEqual(other_worker.sync(), 1)
+        self.assertFalse(RecipeSimilarity.objects.exists())
+
+    def test_expired_changes_rebuild_the_index(self):
+        tofu_rice = create_recipe(self.user, '두부밥', [self.tofu, self.rice])
+        version = publish_recipe_changes([tofu_rice.id])
+        publish_recipe_changes([self.omelette.id])
+        cache.delete(CHANGES_KEY.format(version=version))
+
+        self.updater.sync()
+        self.assertIsNot(loaded_recipe_index(), self.index)
+        self.assertEqual(self.search('두부'), [tofu_rice.id])
+
+    def test_workers_without_an_index_do_not_build_one(self):
+        reset_recipe_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(self.user, '계란볶음밥', [self.egg, self.rice])
+
+        self.assertIsNone(loaded_recipe_index())
+        self.assertEqual(self.updater.seen_version, current_version())
+        # 유사도 행은 인덱스가 없어도 다시 계산
+        fried_rice = Recipe.objects.get(name='계란볶음밥')
+        self.assertTrue(RecipeSimilarity.objects.filter(recipe1=fried_rice, recipe2=self.omelette).exists())
+        self.assertTrue(RecipeSimilarity.objects.filter(recipe1=self.omelette, recipe2=fried_rice).exists())
+
+    def test_neighbours_match_the_similarity_build(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(self.user, '계란볶음밥', [self.egg, self.rice])
+        updated = {
+            (recipe1, recipe2): round(score, 6)
+            for recipe1, recipe2, score in RecipeSimilarity.objects.values_list(
+                'recipe1_id', 'recipe2_id', 'similarity_score'
+            )
+        }
+
+        call_command('build_recipe_similarity', stdout=StringIO())
+        built = {
+            (recipe1, recipe2): round(score, 6)
+            for recipe1, recipe2, score in RecipeSimilarity.objects.values_list(
+                'recipe1_id', 'recipe2_id', 'similarity_score'
+            )
+        }
+        self.assertEqual(updated, built)
+
+    def test_neighbour_lists_stay_within_k(self):
+        rice_dishes = [
+            create_recipe(self.user, name, [self.rice, ingredient])
+            for name, ingredient in [('두부밥', self.tofu), ('계란밥', self.egg)]
+        ]
+        update_recipe_neighbours([self.garlic_rice.id] + [recipe.id for recipe in rice_dishes], k=1)
+        fried_rice = create_recipe(self.user, '밥', [self.rice])
+        update_recipe_neighbours([fried_rice.id], k=1)
+
+        counts = RecipeSimilarity.objects.values('recipe1_id').annotate(count=Count('id'))
+        self.assertTrue(counts)
+        self.assertTrue(all(row['count'] <= 1 for row in counts))
+
+    def test_saved_index_can_still_be_patched(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recipe_index.joblib')
+            self.index.save(path)
+            loaded = RecipeIndex.load(path)
+
+        create_recipe(self.user, '마늘계란밥', [self.garlic, self.egg, self.rice])
+        loaded.refresh_recipes(Recipe.objects.filter(name='마늘계란밥').values_list('id', flat=True))
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(loaded.search('마늘, 계란, 밥')[0][0], Recipe.objects.get(name='마늘계란밥').id)
+
+
+class CountingTokenizer(Tokenizer):
+    name = 'counting'
+
+    def _tokenize_batch(self, texts):
+        return [' '.join(text.split('|')) for text in texts]
+
+
+@override_settings(
+    RECOMMENDATION_HISTORY_BACKGROUND=False, RECIPE_INDEX_BACKGROUND=False,
+    ITEM_CF_MODEL_PATH=None, RECIPE_INDEX_PATH=None,
+)
+class EndpointBenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_history_writer()
+        self.addCleanup(reset_history_writer)
+
+    def test_seed_is_reproducible_and_capped(self):
+        counts = seed_benchmark_data(recipes=5, users=2, interactions=100, ingredients=8, categories=2)
+
+        # 사용자 2 × 레시피 5 × 유형 4 = 40개 조합이 최대
+        self.assertEqual(counts['interactions'], 40)
+        self.assertEqual(UserRecipeInteraction.objects.count(), 40)
+        self.assertEqual(UserPreference.objects.count(), 2)
+        self.assertTrue(all(
+            3 <= recipe.ingredients.count() <= 8 for recipe in Recipe.objects.all()
+        ))
+
+    def test_run_reports_latency_and_queries_per_endpoint(self):
+        seed_benchmark_data(recipes=10, users=3, interactions=30, ingredients=10, categories=2)
+
+        results = run_benchmark(iterations=3, warmup=1)
+
+        self.assertEqual(list(results), [endpoint.name for endpoint in ENDPOINTS])
+        for name, result in results.items():
+            self.assertEqual(result['requests'], 3, name)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertGreater(result['queries_mean'], 0, name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'], name)
+
+    def test_compare_flags_query_and_latency_regressions(self):
+        baseline = {
+            'recipe_list': {'p95_ms': 10.0, 'queries_mean': 5.0},
+            'cart_clear': {'p95_ms': 10.0, 'queries_mean': 5.0},
+        }
+        current = {
+            'recipe_list': {'p95_ms': 11.0, 'queries_mean': 6.0},
+            'cart_clear': {'p95_ms': 13.0, 'queries_mean': 5.0},
+            'cart_summary': {'p95_ms': 99.0, 'queries_mean': 99.0},
+        }
+
+        regressions = compare_results(baseline, current, tolerance=0.2)
+
+        self.assertEqual([name for name, _ in regressions], ['recipe_list', 'cart_clear'])
+
+
+class TokenizerCacheTest(SimpleTestCase):
+    def test_lru_answers_repeated_queries_from_memory(self):
+        backend = CountingTokenizer()
+        tokenizer = CachedTokenizer(backend, maxsize=2)
+
+        for text in ['대파|마늘', '계란', '대파|마늘']:
+            tokenizer.tokenize(text)
+
+        self.assertEqual(backend.calls, 2)
+        self.assertEqual(tokenizer.stats()['hits'], 1)
+
+    def test_store_only_tokenizes_new_or_changed_texts(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'tokens.sqlite3')
+        backend = CountingTokenizer()
+
+        store = TokenCorpusStore(path)
+        self.assertEqual(store.tokenize_corpus(['대파|마늘', '계란'], backend), ['대파 마늘', '계란'])
+        store.close()
+
+        store = TokenCorpusStore(path)
+        self.assertEqual(store.tokenize_corpus(['대파|마늘', '계란|우유'], backend), ['대파 마늘', '계란 우유'])
+        store.close()
+
+        self.assertEqual(backend.calls, 3)
+        self.assertEqual((store.hits, store.misses), (1, 1))
+
+
+class SentencePieceTokenizerTest(SimpleTestCase):
+    @skipUnless(DEFAULT_SENTENCEPIECE_MODEL.exists(), 'jearyo.model is not available')
+    def test_batch_encodes_ingredient_words(self):
+        tokenizer = get_tokenizer('sentencepiece')
+
+        tokens = tokenizer.tokenize_many(['[재료] 계란 4개| 마늘 1개', '대파, 고추장'])
+
+        self.assertEqual(tokens[1], '대파 고추장')
+        self.assertIn('계란', tokens[0].split())
+        self.assertNotIn('4', tokens[0].split())
+        self.assertEqual(tokenizer.calls, 2)
+
+    @skipUnless(DEFAULT_SENTENCEPIECE_MODEL.exists(), 'jearyo.model is not available')
+    def test_parallel_corpus_matches_serial_and_resumes(self):
+        texts = [f'계란 {i}개| 마늘, 대파' if i % 2 else f'고추장 {i}큰술, 두부' for i in range(40)]
+        expected = get_tokenizer('sentencepiece').tokenize_many(texts)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'tokens.sqlite3')
+        store = TokenCorpusStore(path)
+        # 앞쪽 절반만 저장된 상태 = 중단된 빌드
+        self.assertEqual(store.tokenize_corpus(texts[:20], get_tokenizer('sentencepiece')), expected[:20])
+
+        progress = []
+        tokens = store.tokenize_corpus_parallel(
+            texts, 'sentencepiece', processes=2, chunk_size=7,
+            progress=lambda done, total: progress.append((done, total))
+        )
+        store.close()
+
+        self.assertEqual(tokens, expected)
+        self.assertEqual(store.misses, 40)
+        self.assertEqual(progress[0], (20, 40))
+        self.assertEqual(progress[-1], (40, 40))
+        self.assertEqual(len(progress), 4)
+
+    @skipUnless(DEFAULT_SENTENCEPIECE_MODEL.exists(), 'jearyo.model is not available')
+    def test_entry_script_runs_the_process_pool(self):
+        # Spawned workers re-import the entry script; it must not run its body again
+        repo = DEFAULT_SENTENCEPIECE_MODEL.parent
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shutil.copy(repo / 'RECIPE_DATA.csv', directory.name)
+
+        result = subprocess.run(
+            [sys.executable, str(repo / 'recipe_analysis.py')],
+            cwd=directory.name, capture_output=True, text=True, timeout=300,
+            env={**os.environ, 'RECIPE_TOKENIZER': 'sentencepiece', 'RECIPE_TOKENIZER_JOBS': '2'},
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('Recommended recipes:', result.stdout)
+        self.assertTrue(os.path.exists(os.path.join(directory.name, 'recipe_tokens.sqlite3')))
+
+    def test_unknown_tokenizer(self):
+        with self.assertRaises(ValueError):
+            get_tokenizer('mecab')
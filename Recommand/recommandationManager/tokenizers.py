@@ -0,0 +1,331 @@
+"""
+레시피 재료 문자열 토큰화 모듈
+
+이 모듈은 Django에 의존하지 않으므로 루트의 분석 스크립트에서도 사용합니다:
+- Tokenizer: 토크나이저 공통 인터페이스 (name, tokenize, tokenize_many)
+- OktTokenizer: konlpy Okt로 정규화 후 구문 단위로 분리 (JVM 필요)
+- SentencePieceTokenizer: 저장소의 jearyo.model로 배치 인코딩 (JVM 불필요)
+- CachedTokenizer: 반복되는 질의 문자열을 위한 메모리 LRU 캐시
+- TokenCorpusStore: 토큰화된 레시피 재료를 내용 해시로 저장하는 디스크 저장소
+  (재빌드 시 새로 추가되거나 바뀐 레시피만 다시 토큰화)
+- tokenize_parallel: 프로세스 풀에서 청크 단위로 토큰화해 입력 순서대로 반환
+  (워커마다 토크나이저/JVM을 한 번만 띄움)
+
+모든 토크나이저는 calls/seconds로 백엔드 호출 횟수와 소요 시간을 제공합니다.
+"""
+
+import functools
+import hashlib
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# 저장소 루트에 포함된 SentencePiece 재료 모델
+DEFAULT_SENTENCEPIECE_MODEL = Path(__file__).resolve().parents[2] / 'jearyo.model'
+
+# 글자가 하나도 없는 조각(숫자, 괄호, 구분자 등)은 토큰에서 제외
+_WORD_PATTERN = re.compile(r'[가-힣A-Za-z]')
+
+
+class Tokenizer:
+    """
+    토크나이저 공통 인터페이스
+
+    하위 클래스는 name과 _tokenize_batch(texts)를 구현하며, 결과는
+    공백으로 구분된 토큰 문자열입니다 (TfidfVectorizer 입력 형식).
+    """
+    name = None
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+    def _tokenize_batch(self, texts):
+        raise NotImplementedError
+
+    def tokenize_many(self, texts):
+        texts = list(texts)
+        start = time.perf_counter()
+        tokens = self._tokenize_batch(texts)
+        self.seconds += time.perf_counter() - start
+        self.calls += len(texts)
+        return tokens
+
+    def tokenize(self, text):
+        return self.tokenize_many([text])[0]
+
+    def warm_up(self):
+        """백엔드를 미리 초기화 (기본값: 아무것도 하지 않음)"""
+
+
+class OktTokenizer(Tokenizer):
+    """konlpy Okt 기반 토크나이저 (첫 사용 시 JVM을 띄움)"""
+    name = 'okt'
+
+    def __init__(self):
+        super().__init__()
+        self._okt = None
+
+    @property
+    def okt(self):
+        if self._okt is None:
+            from konlpy.tag import Okt
+            self._okt = Okt()
+        return self._okt
+
+    def warm_up(self):
+        # JVM 기동은 수 초가 걸리므로 첫 청크 전에 끝냄
+        self.okt
+
+    def _tokenize_batch(self, texts):
+        results = []
+        for text in texts:
+            tokens = self.okt.normalize(text)
+            tokens = self.okt.phrases(tokens)
+            results.append(' '.join(tokens))
+        return results
+
+
+class SentencePieceTokenizer(Tokenizer):
+    """SentencePiece 모델 기반 토크나이저 (네이티브 라이브러리로 배치 인코딩)"""
+    name = 'sentencepiece'
+
+    def __init__(self, model_path=DEFAULT_SENTENCEPIECE_MODEL, num_threads=None):
+        super().__init__()
+        import sentencepiece as spm
+        self.processor = spm.SentencePieceProcessor(model_file=str(model_path))
+        self.num_threads = num_threads or os.cpu_count() or 1
+
+    def _tokenize_batch(self, texts):
+        encoded = self.processor.encode(texts, out_type=str, num_threads=self.num_threads)
+        results = []
+        for pieces in encoded:
+            words = (piece.lstrip('▁') for piece in pieces)
+            results.append(' '.join(word for word in words if _WORD_PATTERN.search(word)))
+        return results
+
+
+TOKENIZERS = {
+    OktTokenizer.name: OktTokenizer,
+    SentencePieceTokenizer.name: SentencePieceTokenizer,
+}
+
+
+def get_tokenizer(name, **options):
+    """이름으로 토크나이저를 생성 ('okt' 또는 'sentencepiece')"""
+    try:
+        tokenizer_class = TOKENIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown tokenizer '{name}', expected one of {sorted(TOKENIZERS)}")
+    return tokenizer_class(**options)
+
+
+# 프로세스 풀 워커마다 한 번 만들어 재사용하는 토크나이저
+_worker_tokenizer = None
+
+DEFAULT_CHUNK_SIZE = 256
+
+
+def _init_worker(name, options):
+    global _worker_tokenizer
+    _worker_tokenizer = get_tokenizer(name, **options)
+    _worker_tokenizer.warm_up()
+
+
+def _tokenize_chunk(chunk):
+    return _worker_tokenizer.tokenize_many(chunk)
+
+
+def tokenize_parallel(texts, name, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, options=None):
+    """
+    문자열을 청크로 나눠 프로세스 풀에서 토큰화
+
+    워커는 spawn으로 시작하고(JVM은 fork 이후 사용할 수 없음) 초기화할 때 토크나이저를
+    한 번만 만듭니다. SentencePiece는 워커 간 과다 구독을 막기 위해 워커당 스레드 1개를 씁니다.
+
+    Parameters:
+        texts: 토큰화할 문자열 목록
+        name: 토크나이저 이름 ('okt' 또는 'sentencepiece')
+        processes: 워커 수 (None이면 CPU 코어 수)
+        chunk_size: 워커에 한 번에 보내는 문자열 수
+
+    Yields:
+        청크별 토큰화 결과 목록, 입력 순서대로 (끝난 청크부터 바로 반환)
+    """
+    texts = list(texts)
+    options = dict(options or {})
+    if name == SentencePieceTokenizer.name:
+        options.setdefault('num_threads', 1)
+
+    chunks = (texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size))
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes, initializer=_init_worker, initargs=(name, options)) as pool:
+        yield from pool.imap(_tokenize_chunk, chunks)
+
+
+def progress_printer(label, stream=sys.stderr, interval=1.0):
+    """(done, total) 진행 콜백 - interval초마다, 그리고 끝났을 때 한 줄씩 출력"""
+    started = time.perf_counter()
+    last = [0.0]
+
+    def report(done, total):
+        now = time.perf_counter()
+        if done < total and now - last[0] < interval:
+            return
+        last[0] = now
+        elapsed = now - started
+        rate = done / elapsed if elapsed else 0.0
+        print(f'{label}: {done}/{total} ({rate:.0f}/s)', file=stream, flush=True)
+
+    return report
+
+
+class CachedTokenizer:
+    """최근 토큰화한 문자열의 결과를 LRU로 보관하는 래퍼"""
+
+    def __init__(self, tokenizer, maxsize=4096):
+        self.tokenizer = tokenizer
+        self.name = tokenizer.name
+        self._tokenize = functools.lru_cache(maxsize=maxsize)(tokenizer.tokenize)
+
+    def tokenize(self, text):
+        return self._tokenize(text)
+
+    def stats(self):
+        info = self._tokenize.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'tokenizer': self.name,
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': info.hits / lookups if lookups else None,
+            'size': info.currsize,
+            'backend_calls': self.tokenizer.calls,
+            'backend_seconds': round(self.tokenizer.seconds, 4),
+        }
+
+
+class TokenCorpusStore:
+    """
+    토큰화 결과를 (토크나이저 이름, 원문)의 해시로 저장하는 SQLite 저장소
+
+    레시피 재료 문자열은 거의 바뀌지 않으므로, 이미 저장된 해시는 토크나이저를
+    호출하지 않고 그대로 재사용합니다.
+    """
+    QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS tokens (key TEXT PRIMARY KEY, tokens TEXT NOT NULL)'
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(tokenizer_name, text):
+        return hashlib.sha1(f'{tokenizer_name}\0{text}'.encode('utf-8')).hexdigest()
+
+    def _lookup(self, keys):
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), self.QUERY_CHUNK_SIZE):
+            chunk = unique_keys[start:start + self.QUERY_CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self.connection.execute(
+                f'SELECT key, tokens FROM tokens WHERE key IN ({placeholders})', chunk
+            )
+            found.update(rows)
+        return found
+
+    def _missing(self, texts, tokenizer_name):
+        """(입력별 키, 저장된 결과, 새로 토큰화할 {키: 원문})"""
+        keys = [self.key(tokenizer_name, text) for text in texts]
+        found = self._lookup(keys)
+
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key in found:
+                self.hits += 1
+            else:
+                self.misses += 1
+                missing.setdefault(key, text)
+        return keys, found, missing
+
+    def _store(self, new_tokens):
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO tokens (key, tokens) VALUES (?, ?)',
+                new_tokens.items()
+            )
+
+    def tokenize_corpus(self, texts, tokenizer):
+        """
+        문자열 목록을 토큰화하고, 저장소에 없는 문자열만 토크나이저로 처리
+
+        Returns:
+            입력 순서대로 토큰화된 문자열 목록
+        """
+        texts = list(texts)
+        keys, found, missing = self._missing(texts, tokenizer.name)
+
+        new_tokens = dict(zip(missing, tokenizer.tokenize_many(missing.values()))) if missing else {}
+        if new_tokens:
+            self._store(new_tokens)
+
+        found.update(new_tokens)
+        return [found[key] for key in keys]
+
+    def tokenize_corpus_parallel(self, texts, tokenizer_name, processes=None,
+                                 chunk_size=DEFAULT_CHUNK_SIZE, progress=None, tokenizer_options=None):
+        """
+        tokenize_corpus의 프로세스 풀 버전
+
+        청크가 끝날 때마다 바로 저장(커밋)하므로, 중간에 중단되어도 다시 실행하면
+        저장된 청크는 건너뛰고 남은 문자열만 토큰화합니다.
+
+        Parameters:
+            progress: (처리한 문자열 수, 전체 수)를 받는 콜백 (예: progress_printer)
+
+        Returns:
+            입력 순서대로 토큰화된 문자열 목록
+        """
+        texts = list(texts)
+        keys, found, missing = self._missing(texts, tokenizer_name)
+
+        total = len(set(keys))
+        done = total - len(missing)
+        if progress:
+            progress(done, total)
+
+        if missing:
+            missing_keys = list(missing)
+            chunks = tokenize_parallel(
+                missing.values(), tokenizer_name, processes, chunk_size, tokenizer_options
+            )
+            for start, tokens in zip(range(0, len(missing_keys), chunk_size), chunks):
+                new_tokens = dict(zip(missing_keys[start:start + chunk_size], tokens))
+                self._store(new_tokens)
+                found.update(new_tokens)
+                done += len(new_tokens)
+                if progress:
+                    progress(done, total)
+
+        return [found[key] for key in keys]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'path': str(self.path),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+        }
+
+    def close(self):
+        self.connection.close()
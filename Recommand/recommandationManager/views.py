@@ -5,25 +5,55 @@
 - 사용자 선호도 관리 (UserPreferenceViewSet)
 - 레시피 상호작용 기록 (UserRecipeInteractionViewSet)
 - 개인화된 레시피 추천 (RecipeRecommendationView)
+- 추천에 대한 상호작용 기록 (RecommendationInteractionView)
+- 추천 캐시 통계 조회 (RecommendationCacheStatsView)
+- 재료 기반 레시피 추천 (IngredientRecommendationView)
 """
 
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, IsAdminUser
 from rest_framework.views import APIView
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Max, Q
 from django.shortcuts import get_object_or_404
+from articles.allergens import allergy_terms
+from articles.ingredient_extractor import get_ingredient_extractor
 from articles.models import Recipe, Category
+from articles.serializers import prefetch_recipe_relations
 from .models import (
     UserPreference, UserRecipeInteraction,
     RecipeSimilarity, RecommendationHistory
 )
+from . import cache as recommendation_cache
+from .category_sampler import sample_category_recipes
+from .collaborative import get_item_cf_model
+from .history_writer import get_history_writer, record_recommendations
+from .index_updater import get_recipe_index_updater
+from .recipe_index import get_recipe_index
 from .serializers import (
     UserPreferenceSerializer, UserRecipeInteractionSerializer,
-    RecommendationSerializer, UserPreferenceSummarySerializer
+    RecommendationSerializer, UserPreferenceSummarySerializer,
+    IngredientRecommendationSerializer
 )
 
+# 한 번에 반환하는 최대 추천 수
+RECOMMENDATION_LIMIT = 10
+
+# 재료 기반 추천에서 한 번에 요청할 수 있는 최대 레시피 수
+MAX_INGREDIENT_RECOMMENDATIONS = 50
+
+# 사용자 숙련도별로 추천 가능한 레시피 난이도
+DIFFICULTIES_FOR_SKILL_LEVEL = {
+    'beginner': ['easy'],
+    'intermediate': ['easy', 'medium'],
+    'advanced': ['easy', 'medium', 'hard'],
+}
+
+def recipes_for_serialization():
+    """RecipeSerializer가 사용하는 관계를 미리 불러온 레시피 쿼리셋"""
+    return prefetch_recipe_relations(Recipe.objects.all())
+
 class UserPreferenceViewSet(viewsets.ModelViewSet):
     """
     사용자 선호도 관리를 위한 ViewSet
@@ -37,6 +67,8 @@ class UserPreferenceViewSet(viewsets.ModelViewSet):
     """
     serializer_class = UserPreferenceSerializer
     permission_classes = [IsAuthenticated]
+    # 쿼리 예산 (Recommand.sql_instrumentation 참고): 목록 = 개수 + 선호도 + 선호 카테고리
+    query_budget = {'list': 3, 'summary': 2}
 
     def get_queryset(self):
         return UserPreference.objects.filter(user=self.request.user)
@@ -73,6 +105,7 @@ class UserRecipeInteractionViewSet(viewsets.ModelViewSet):
     """
     serializer_class = UserRecipeInteractionSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 2}
 
     def get_queryset(self):
         return UserRecipeInteraction.objects.filter(user=self.request.user)
@@ -100,11 +133,14 @@ class RecipeRecommendationView(APIView):
        - 각 레시피별 추천 점수 계산
        - 추천 이유 제공
        - 사용자 상호작용 추적
+       - 사용자별 추천 순위 캐시 (입력 데이터가 바뀌면 시그널로 무효화)
 
     모든 엔드포인트는 인증된 사용자만 접근 가능하며,
     사용자 선호도 정보가 필요합니다.
     """
     permission_classes = [IsAuthenticated]
+    # 캐시 미스 기준: 선호도 1 + 협업 필터링 2 + 유사도 1 + 인기 1 + 카테고리 3 + 레시피 조회 5
+    query_budget = 13
 
     def get(self, request):
         """
@@ -114,14 +150,48 @@ class RecipeRecommendationView(APIView):
             추천된 레시피 목록, 각각의 추천 점수와 추천 이유 포함
         """
         user = request.user
-        try:
-            preference = UserPreference.objects.get(user=user)
-        except UserPreference.DoesNotExist:
-            return Response(
-                {"error": "사용자 선호도 설정이 필요합니다."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
 
+        # 입력이 바뀌지 않았다면 캐시된 추천 순위를 그대로 사용
+        candidates = recommendation_cache.get_recommendations(user.id)
+        if candidates is None:
+            try:
+                preference = UserPreference.objects.get(user=user)
+            except UserPreference.DoesNotExist:
+                return Response(
+                    {"error": "사용자 선호도 설정이 필요합니다."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            candidates = self.rank_recipes(user, preference)
+            recommendation_cache.set_recommendations(user.id, candidates)
+
+        if not candidates:
+            return Response([])
+
+        # 직렬화에 필요한 관계를 미리 불러온 레시피 조회
+        recipe_map = recipes_for_serialization().in_bulk([recipe_id for recipe_id, _, _ in candidates])
+
+        # 추천 이력은 저장 큐에 넣고 응답은 바로 반환 (recommendation_id는 이미 정해져 있음)
+        recommendations = [
+            RecommendationHistory(
+                user=user,
+                recipe=recipe_map[recipe_id],
+                score=score,
+                reason=reason
+            ) for recipe_id, score, reason in candidates if recipe_id in recipe_map
+        ]
+        record_recommendations(recommendations)
+
+        # 응답 데이터 생성
+        serializer = RecommendationSerializer(recommendations, many=True)
+        return Response(serializer.data)
+
+    def rank_recipes(self, user, preference):
+        """
+        사용자 선호도와 상호작용을 바탕으로 추천 후보의 순위를 계산하는 메서드
+
+        Returns:
+            (recipe_id, score, reason) 튜플의 목록
+        """
         # 기본 쿼리셋 설정
         recipes = Recipe.objects.all()
 
@@ -134,104 +204,100 @@ class RecipeRecommendationView(APIView):
             recipes = recipes.filter(cooking_time__lte=preference.max_cooking_time)
 
         if preference.preferred_difficulty:
-            recipes = recipes.filter(difficulty=preference.preferred_difficulty)
+            recipes = recipes.filter(
+                difficulty__in=DIFFICULTIES_FOR_SKILL_LEVEL[preference.preferred_difficulty]
+            )
 
-        # 알레르기 필터링
+        # 알레르기 필터링: 저장 시점에 계산된 알레르기 소속으로 한 번에 제외
         if preference.allergies:
-            allergies = [a.strip() for a in preference.allergies.split(',')]
-            for allergy in allergies:
-                recipes = recipes.exclude(
-                    ingredients__ingredient__name__icontains=allergy
-                )
-
-        # 사용자 상호작용 기반 추천
-        user_interactions = UserRecipeInteraction.objects.filter(
-            user=user,
-            interaction_type='rate',
-            rating__gte=4
-        ).values_list('recipe_id', flat=True)
+            recipes = recipes.exclude(allergens__name__in=allergy_terms(preference.allergies))
 
-        similar_recipes = RecipeSimilarity.objects.filter(
-            recipe1_id__in=user_interactions
-        ).order_by('-similarity_score')
-
-        # 최종 추천 결과 생성
-        recommended_recipes = []
+        # 후보 레시피는 (id, 점수, 이유) 형태로만 모으고 레시피 객체는 마지막에 한 번에 조회
+        candidates = []
         seen_recipes = set()
 
-        # 1. 유사도 기반 추천
-        for similarity in similar_recipes:
-            if similarity.recipe2_id not in seen_recipes:
-                recipe = recipes.filter(id=similarity.recipe2_id).first()
-                if recipe:
-                    recommended_recipes.append({
-                        'recipe': recipe,
-                        'score': similarity.similarity_score,
-                        'reason': '비슷한 레시피를 좋아하셨네요!'
-                    })
-                    seen_recipes.add(recipe.id)
-
-        # 2. 인기있는 레시피 추가
-        if len(recommended_recipes) < 10:
+        # 1. 협업 필터링 추천: 학습된 모델(train_item_cf)이 있을 때만 사용자의 상호작용 이력으로 점수 계산
+        item_cf_model = get_item_cf_model()
+        if item_cf_model is not None:
+            history = list(UserRecipeInteraction.objects.filter(user=user).values_list(
+                'recipe_id', 'interaction_type', 'rating'
+            ))
+            scored = item_cf_model.score(*zip(*history), top_n=RECOMMENDATION_LIMIT * 2) if history else []
+            allowed = set(recipes.filter(
+                id__in=[recipe_id for recipe_id, _ in scored]
+            ).values_list('id', flat=True)) if scored else set()
+
+            # 점수는 이웃 유사도의 가중합이므로 가장 높은 점수를 1로 맞춤
+            top_score = scored[0][1] if scored else 1.0
+            for recipe_id, score in scored:
+                if recipe_id in allowed and len(candidates) < RECOMMENDATION_LIMIT:
+                    candidates.append((recipe_id, score / top_score, '함께 즐긴 사용자들이 좋아한 레시피입니다!'))
+                    seen_recipes.add(recipe_id)
+
+        # 2. 유사도 기반 추천: 높게 평가한 레시피의 이웃 중 필터를 통과한 레시피를 한 번의 쿼리로 조회
+        if len(candidates) < RECOMMENDATION_LIMIT:
+            liked_recipe_ids = UserRecipeInteraction.objects.filter(
+                user=user,
+                interaction_type='rate',
+                rating__gte=4
+            ).values('recipe_id')
+
+            similar_recipes = RecipeSimilarity.objects.filter(
+                recipe1_id__in=liked_recipe_ids,
+                recipe2_id__in=recipes.values('id')
+            ).exclude(
+                recipe2_id__in=seen_recipes
+            ).values('recipe2_id').annotate(
+                score=Max('similarity_score')
+            ).order_by('-score')[:RECOMMENDATION_LIMIT - len(candidates)]
+
+            for similarity in similar_recipes:
+                candidates.append((similarity['recipe2_id'], similarity['score'], '비슷한 레시피를 좋아하셨네요!'))
+                seen_recipes.add(similarity['recipe2_id'])
+
+        # 3. 인기있는 레시피 추가
+        if len(candidates) < RECOMMENDATION_LIMIT:
+            # 평균 평점은 RecipeStats에 미리 집계되어 있으므로 인덱스 순서로 바로 조회
             popular_recipes = recipes.exclude(
                 id__in=seen_recipes
-            ).annotate(
-                avg_rating=Avg('user_interactions__rating')
             ).filter(
-                avg_rating__gte=4
-            ).order_by('-avg_rating')[:5]
-
-            for recipe in popular_recipes:
-                recommended_recipes.append({
-                    'recipe': recipe,
-                    'score': float(recipe.avg_rating),
-                    'reason': '많은 사용자들이 좋아하는 레시피입니다!'
-                })
-                seen_recipes.add(recipe.id)
-
-        # 3. 사용자 선호 카테고리 기반 추천
-        if len(recommended_recipes) < 10:
-            category_recipes = recipes.filter(
-                category__in=preference.favorite_categories.all()
-            ).exclude(
-                id__in=seen_recipes
-            ).order_by('?')[:5]
-
-            for recipe in category_recipes:
-                recommended_recipes.append({
-                    'recipe': recipe,
-                    'score': 0.7,  # 기본 점수
-                    'reason': '선호하는 카테고리의 레시피입니다!'
-                })
-
-        # 추천 이력 저장
-        for rec in recommended_recipes:
-            RecommendationHistory.objects.create(
-                user=user,
-                recipe=rec['recipe'],
-                score=rec['score'],
-                reason=rec['reason']
-            )
+                stats__avg_rating__gte=4
+            ).order_by('-stats__avg_rating').values_list('id', 'stats__avg_rating')[:5]
 
-        # 응답 데이터 생성
-        serializer = RecommendationSerializer([
-            RecommendationHistory.objects.get(
-                user=user,
-                recipe=rec['recipe'],
-                reason=rec['reason']
-            ) for rec in recommended_recipes
-        ], many=True)
+            for recipe_id, avg_rating in popular_recipes:
+                candidates.append((recipe_id, float(avg_rating), '많은 사용자들이 좋아하는 레시피입니다!'))
+                seen_recipes.add(recipe_id)
 
-        return Response(serializer.data)
+        # 4. 사용자 선호 카테고리 기반 추천: 캐시된 카테고리별 id 배열에서 무작위 추출
+        if len(candidates) < RECOMMENDATION_LIMIT:
+            category_ids = preference.favorite_categories.values_list('id', flat=True)
+            category_recipes = sample_category_recipes(category_ids, recipes, k=5, exclude=seen_recipes)
+
+            for recipe_id in category_recipes:
+                candidates.append((recipe_id, 0.7, '선호하는 카테고리의 레시피입니다!'))  # 기본 점수
 
-    @action(detail=True, methods=['post'])
-    def interaction(self, request, pk=None):
+        return candidates
+
+class RecommendationInteractionView(APIView):
+    """
+    추천된 레시피에 대한 사용자 상호작용을 기록하는 View
+
+    추천 응답의 id(recommendation_id)로 요청하며, 이력이 아직 저장 큐에 남아 있으면
+    큐를 먼저 비운 뒤 조회합니다. 이력이 다른 워커의 큐에 있거나 저장되지 못한 경우에도
+    요청에 recipe_id가 있으면 상호작용은 기록합니다 (이력의 interacted는 갱신되지 않음).
+    """
+    permission_classes = [IsAuthenticated]
+    # 최악의 경우: 저장 전 이력 재조회 + 이력 갱신 + update_or_create로 기존 평가 변경
+    # (RecipeStats에서 이전 점수를 빼고 새 점수를 더함, 세이브포인트 포함)
+    query_budget = 16
+
+    def post(self, request, recommendation_id):
         """
         추천된 레시피에 대한 사용자 상호작용을 기록하는 메서드
 
         Parameters:
-            request: HTTP 요청 객체 (상호작용 유형과 평점 포함)
-            pk: 추천 이력 ID
+            request: HTTP 요청 객체 (상호작용 유형과 평점, 추천된 레시피의 recipe_id 포함)
+            recommendation_id: 추천 응답에 포함된 추천 id
 
         기능:
         - 추천된 레시피에 대한 사용자의 반응 기록
@@ -241,21 +307,131 @@ class RecipeRecommendationView(APIView):
         Returns:
             상호작용 기록 완료 메시지
         """
-        recommendation = get_object_or_404(
-            RecommendationHistory,
-            id=pk,
+        recommendations = RecommendationHistory.objects.filter(
+            recommendation_id=recommendation_id,
             user=request.user
         )
-        recommendation.interacted = True
-        recommendation.save()
+        recipe_id = recommendations.values_list('recipe_id', flat=True).first()
+        if recipe_id is None:
+            get_history_writer().flush()
+            recipe_id = recommendations.values_list('recipe_id', flat=True).first()
+
+        if recipe_id is not None:
+            recommendations.update(interacted=True)
+        else:
+            # 이력이 다른 워커의 저장 큐에 있거나 버려진 경우: 클라이언트가 보낸 레시피로 기록
+            try:
+                recipe_id = int(request.data.get('recipe_id') or 0)
+            except (TypeError, ValueError):
+                return Response({'error': 'recipe_id는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not Recipe.objects.filter(pk=recipe_id).exists():
+                return Response({'error': '추천 이력을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
 
         interaction_type = request.data.get('interaction_type')
         if interaction_type:
-            UserRecipeInteraction.objects.create(
+            UserRecipeInteraction.objects.update_or_create(
                 user=request.user,
-                recipe=recommendation.recipe,
+                recipe_id=recipe_id,
                 interaction_type=interaction_type,
-                rating=request.data.get('rating')
+                defaults={'rating': request.data.get('rating')}
             )
 
         return Response({'status': 'interaction recorded'})
+
+class RecommendationCacheStatsView(APIView):
+    """
+    추천 캐시의 적중/미스 카운터와 추천 이력 저장 큐 상태를 제공하는 View
+
+    모니터링 용도로 관리자만 접근 가능합니다.
+    """
+    permission_classes = [IsAdminUser]
+    query_budget = 0
+
+    def get(self, request):
+        stats = recommendation_cache.get_stats()
+        stats['history_writer'] = get_history_writer().stats()
+        stats['recipe_index_updater'] = get_recipe_index_updater().stats()
+        return Response(stats)
+
+def query_ingredients(text):
+    """
+    사용자가 입력한 재료 문자열을 인덱스 검색용 재료 목록으로 변환
+
+    재료명만 적힌 항목("대파")은 그대로 사용하고, 수량이나 설명이 섞인 항목
+    ("소고기200g을 깐마늘(국산)과")은 재료 사전에 있는 이름만 추출합니다.
+    """
+    extractor = get_ingredient_extractor()
+    names = []
+    for part in text.split(','):
+        part = part.strip()
+        if part.isalpha():
+            names.append(part)
+        elif part:
+            names.extend(extractor.extract(part) or [part])
+    return ', '.join(dict.fromkeys(names))
+
+
+class IngredientRecommendationView(APIView):
+    """
+    가지고 있는 재료로 만들 수 있는 레시피를 추천하는 View
+
+    요청 파라미터:
+    - ingredients: 콤마로 구분된 재료 목록 (예: 대파,마늘,계란,고추장)
+      또는 자유 문장 (예: 소고기200g을 깐마늘(국산)과 볶는다)
+    - limit: 반환할 레시피 수 (기본 10, 최대 50)
+    - max_time: 최대 조리 시간(분)
+    - difficulty: 레시피 난이도 (easy, medium, hard)
+
+    max_time, difficulty를 지정하지 않으면 로그인한 사용자의 선호도
+    (최대 조리 시간, 숙련도)를 적용합니다.
+
+    점수 계산은 워커 프로세스마다 한 번 만들어지는 레시피 인덱스를 사용하므로
+    요청마다 벡터라이저를 다시 학습하지 않습니다.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    # 선호도 1 + 레시피 조회 5, 인덱스 파일이 없으면 첫 요청에서 인덱스 생성 2
+    query_budget = 8
+
+    def get(self, request):
+        ingredients = request.query_params.get('ingredients', '').strip()
+        if not ingredients:
+            return Response(
+                {"error": "재료를 입력해주세요. 예: ?ingredients=대파,마늘,계란"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = min(int(request.query_params.get('limit', RECOMMENDATION_LIMIT)), MAX_INGREDIENT_RECOMMENDATIONS)
+            max_time = request.query_params.get('max_time')
+            max_time = int(max_time) if max_time else None
+        except ValueError:
+            return Response(
+                {"error": "limit과 max_time은 숫자여야 합니다."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        difficulty = request.query_params.get('difficulty')
+        difficulties = [difficulty] if difficulty else None
+
+        # 파라미터가 없으면 사용자 선호도의 필터를 사용
+        if request.user.is_authenticated and (max_time is None or difficulties is None):
+            preference = UserPreference.objects.filter(user=request.user).first()
+            if preference:
+                if max_time is None:
+                    max_time = preference.max_cooking_time
+                if difficulties is None and preference.preferred_difficulty:
+                    difficulties = DIFFICULTIES_FOR_SKILL_LEVEL[preference.preferred_difficulty]
+
+        results = get_recipe_index().search(
+            query_ingredients(ingredients),
+            top_n=max(limit, 1),
+            max_cooking_time=max_time,
+            difficulties=difficulties
+        )
+
+        recipe_map = recipes_for_serialization().in_bulk([recipe_id for recipe_id, _ in results])
+        serializer = IngredientRecommendationSerializer([
+            {'recipe': recipe_map[recipe_id], 'score': score}
+            for recipe_id, score in results if recipe_id in recipe_map
+        ], many=True)
+        return Response(serializer.data)
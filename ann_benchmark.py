@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Reuse the index code from the Django project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Recommand'))
+from recommandationManager.ann import IVFIndex
+from recommandationManager.recipe_index import ingredient_tokens
+
+def load_ingredient_texts(csv_path='RECIPE_DATA.csv'):
+    # Load data from CSV and remove any NA values
+    recipes_df = pd.read_csv(csv_path).dropna()
+    return recipes_df['CKG_MTRL_CN'].tolist()
+
+def synthetic_texts(texts, n_recipes, seed=0):
+    # RECIPE_DATA.csv is only a sample; grow it to production scale by drawing
+    # ingredient lists from its vocabulary with a Zipf-like popularity skew
+    vocabulary = sorted({token for text in texts for token in ingredient_tokens(text)})
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, len(vocabulary) + 1)
+    weights = rng.permutation(weights / weights.sum())
+    sizes = rng.integers(3, 12, size=n_recipes)
+    return [
+        ', '.join(rng.choice(vocabulary, size=min(size, len(vocabulary)), replace=False, p=weights))
+        for size in sizes
+    ]
+
+def exact_kth_scores(matrix, queries, k):
+    # Ground truth for recall: the k-th best score of a full scan per query.
+    # Comparing scores rather than ids keeps tied neighbours from counting as misses.
+    kth_scores, counts = [], []
+    for start in range(0, queries.shape[0], 256):
+        scores = (queries[start:start + 256] @ matrix.T).toarray()
+        top = -np.partition(-scores, k - 1, axis=1)[:, :k]
+        kth_scores.extend(top.min(axis=1))
+        counts.extend((top > 0).sum(axis=1))
+    return np.array(kth_scores), np.array(counts)
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description='Recall and latency of the IVF recipe index against exact search')
+    parser.add_argument('--csv', default='RECIPE_DATA.csv')
+    parser.add_argument('--synthetic', type=int, default=100_000,
+                        help='Number of synthetic recipes generated from the CSV vocabulary (0 = use the CSV as is)')
+    parser.add_argument('--queries', type=int, default=500,
+                        help='Number of recipes used as queries')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--lists', type=int, default=None,
+                        help='Number of IVF clusters (default: sqrt(N))')
+    parser.add_argument('--probes', default='1,2,4,8,16,32',
+                        help='Comma separated n_probe values to measure')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    texts = load_ingredient_texts(args.csv)
+    if args.synthetic:
+        texts = synthetic_texts(texts, args.synthetic)
+
+    matrix = TfidfVectorizer(analyzer=ingredient_tokens, dtype=np.float32).fit_transform(texts).tocsr()
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(matrix.shape[0], size=min(args.queries, matrix.shape[0]), replace=False)
+    queries = matrix[query_rows]
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix, n_lists=args.lists)
+    build_seconds = time.perf_counter() - start
+
+    # Exact baseline: per-query full scan, as RecipeIndex.search does without an IVF index
+    exact_latencies = []
+    for row in range(queries.shape[0]):
+        start = time.perf_counter()
+        scores = (matrix @ queries[row].T).toarray().ravel()
+        np.argpartition(-scores, args.top_k - 1)[:args.top_k]
+        exact_latencies.append(time.perf_counter() - start)
+    kth_scores, counts = exact_kth_scores(matrix, queries, args.top_k)
+
+    results = {
+        'recipes': matrix.shape[0],
+        'features': matrix.shape[1],
+        'lists': index.n_lists,
+        'build_seconds': round(build_seconds, 3),
+        'exact': {
+            'p50_ms': percentile_ms(exact_latencies, 50),
+            'p95_ms': percentile_ms(exact_latencies, 95),
+        },
+        'ivf': [],
+    }
+    for n_probe in [int(value) for value in args.probes.split(',')]:
+        latencies, recalls = [], []
+        for row in range(queries.shape[0]):
+            start = time.perf_counter()
+            indices, scores = index.search(matrix, queries[row], k=args.top_k, n_probe=n_probe)
+            latencies.append(time.perf_counter() - start)
+            if counts[row]:
+                found = scores[0][indices[0] >= 0]
+                recalls.append(min((found >= kth_scores[row] - 1e-6).sum(), counts[row]) / counts[row])
+        results['ivf'].append({
+            'n_probe': n_probe,
+            f'recall@{args.top_k}': round(float(np.mean(recalls)), 4) if recalls else None,
+            'p50_ms': percentile_ms(latencies, 50),
+            'p95_ms': percentile_ms(latencies, 95),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f'{results["recipes"]} recipes, {results["features"]} features, '
+          f'{results["lists"]} clusters built in {results["build_seconds"]}s')
+    print(f'exact: p50 {results["exact"]["p50_ms"]}ms, p95 {results["exact"]["p95_ms"]}ms')
+    for row in results['ivf']:
+        print(f'n_probe={row["n_probe"]:>3}: recall@{args.top_k} {row[f"recall@{args.top_k}"]}, '
+              f'p50 {row["p50_ms"]}ms, p95 {row["p95_ms"]}ms')
+
+if __name__ == '__main__':
+    main()
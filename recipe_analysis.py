@@ -1,47 +1,66 @@
+import os
+import sys
+
 import pandas as pd
-from konlpy.tag import Okt
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
-# Load data from CSV
-df01 = pd.read_csv('RECIPE_DATA.csv')
+# Reuse the blocked top-k similarity kernel and tokenizers from the Django project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Recommand'))
+from recommandationManager.similarity import top_k_similarity
+from recommandationManager.tokenizers import TokenCorpusStore, get_tokenizer, progress_printer
 
-# Convert to dictionary format with list orientation
-data = df01.to_dict(orient='list')
+def load_recipes_df(csv_path='RECIPE_DATA.csv'):
+    # Load data from CSV
+    df01 = pd.read_csv(csv_path)
 
-# Create DataFrame and remove any NA values
-recipes_df = pd.DataFrame(data).dropna()
+    # Convert to dictionary format with list orientation
+    data = df01.to_dict(orient='list')
 
-# Initialize Korean text processor
-okt = Okt()
+    # Create DataFrame and remove any NA values
+    return pd.DataFrame(data).dropna()
 
-# Function to preprocess ingredients text
-def preprocess_ingredients(text):
-    # Tokenize and normalize Korean text
-    tokens = okt.normalize(text)
-    tokens = okt.phrases(tokens)
-    return ' '.join(tokens)
+def tokenize_ingredients(recipes_df, tokenizer_name, jobs, store_path='recipe_tokens.sqlite3'):
+    # Preprocess ingredients column, reusing tokens stored by earlier (or interrupted) runs
+    token_store = TokenCorpusStore(store_path)
+    if jobs > 1:
+        # One tokenizer (and JVM) per worker process, results streamed back in order.
+        # Workers are spawned and re-import this module, hence the __main__ guard below.
+        tokens = token_store.tokenize_corpus_parallel(
+            recipes_df['CKG_MTRL_CN'], tokenizer_name, processes=jobs, progress=progress_printer('tokenize')
+        )
+        print('token store:', token_store.stats())
+    else:
+        tokenizer = get_tokenizer(tokenizer_name)
+        tokens = token_store.tokenize_corpus(recipes_df['CKG_MTRL_CN'], tokenizer)
+        print('token store:', token_store.stats(), f'{tokenizer.name} time: {tokenizer.seconds:.3f}s')
+    token_store.close()
+    return tokens
 
-# Preprocess ingredients column
-recipes_df['processed_ingredients'] = recipes_df['CKG_MTRL_CN'].apply(preprocess_ingredients)
+# Function to get recipe recommendations
+def get_recommendations(recipes_df, neighbour_indices, idx):
+    recipe_indices = [i for i in neighbour_indices[idx] if i >= 0]
+    return recipes_df.iloc[recipe_indices][['RCP_TTL', 'CKG_MTRL_CN']]
 
-# Create TF-IDF vectorizer
-tfidf = TfidfVectorizer()
-tfidf_matrix = tfidf.fit_transform(recipes_df['processed_ingredients'])
+def main():
+    recipes_df = load_recipes_df()
 
-# Calculate cosine similarity
-cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
+    # Korean text processor: 'okt' (starts a JVM) or 'sentencepiece' (no JVM)
+    tokenizer_name = os.getenv('RECIPE_TOKENIZER', 'okt')
+    jobs = int(os.getenv('RECIPE_TOKENIZER_JOBS', os.cpu_count() or 1))
+    recipes_df['processed_ingredients'] = tokenize_ingredients(recipes_df, tokenizer_name, jobs)
 
-# Function to get recipe recommendations
-def get_recommendations(idx, cosine_sim=cosine_sim):
-    sim_scores = list(enumerate(cosine_sim[idx]))
-    sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-    sim_scores = sim_scores[1:6]  # Get top 5 similar recipes (excluding itself)
-    recipe_indices = [i[0] for i in sim_scores]
-    return recipes_df.iloc[recipe_indices][['RCP_TTL', 'CKG_MTRL_CN']]
+    # Create TF-IDF vectorizer
+    tfidf = TfidfVectorizer()
+    tfidf_matrix = tfidf.fit_transform(recipes_df['processed_ingredients'])
+
+    # Keep only the top 5 neighbours per recipe (excluding itself) instead of a dense N x N matrix
+    neighbour_indices, neighbour_scores = top_k_similarity(tfidf_matrix, k=5, max_memory_mb=256)
+
+    # Example: Get recommendations for first recipe
+    print("Recommendations for:", recipes_df.iloc[0]['RCP_TTL'])
+    recommendations = get_recommendations(recipes_df, neighbour_indices, 0)
+    print("\nRecommended recipes:")
+    print(recommendations)
 
-# Example: Get recommendations for first recipe
-print("Recommendations for:", recipes_df.iloc[0]['RCP_TTL'])
-recommendations = get_recommendations(0)
-print("\nRecommended recipes:")
-print(recommendations)
\ No newline at end of file
+if __name__ == '__main__':
+    main()
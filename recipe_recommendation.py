@@ -1,64 +1,124 @@
+import os
+import sys
+
+import joblib
 import pandas as pd
-from konlpy.tag import Okt
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.metrics.pairwise import linear_kernel
+
+# Reuse the tokenizers from the Django project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Recommand'))
+from recommandationManager.tokenizers import CachedTokenizer, TokenCorpusStore, get_tokenizer, progress_printer
+
+# Location of the prebuilt TF-IDF index (vectorizer + recipe matrix)
+INDEX_PATH = 'recipe_index.joblib'
+
+# Tokenized recipe ingredients keyed by content hash, reused across rebuilds
+TOKEN_STORE_PATH = 'recipe_tokens.sqlite3'
+
+# Columns kept alongside the matrix so queries never need the CSV
+RESULT_COLUMNS = ['CKG_NM', 'CKG_MTRL_CN', 'CKG_IPDC']
 
-# Load data from CSV
-df01 = pd.read_csv('RECIPE_DATA.csv')
+# Tokenizer backend: 'okt' (konlpy, starts a JVM) or 'sentencepiece' (jearyo.model, no JVM)
+TOKENIZER = os.getenv('RECIPE_TOKENIZER', 'okt')
 
-# Convert to dictionary format with list orientation
-data = df01.to_dict(orient='list')
+# Worker processes used to tokenize the corpus when building the index (1 = in-process)
+TOKENIZER_JOBS = int(os.getenv('RECIPE_TOKENIZER_JOBS', os.cpu_count() or 1))
 
-# Create DataFrame and remove any NA values
-recipes_df = pd.DataFrame(data).dropna()
+# One tokenizer per backend; repeated query strings are answered from memory
+_query_tokenizers = {}
 
-# Initialize Korean text processor
-okt = Okt()
+def get_query_tokenizer(name=TOKENIZER):
+    if name not in _query_tokenizers:
+        _query_tokenizers[name] = CachedTokenizer(get_tokenizer(name))
+    return _query_tokenizers[name]
 
-def preprocess_ingredients(text):
+def preprocess_ingredients(text, tokenizer=TOKENIZER):
     # Tokenize and normalize Korean text
-    tokens = okt.normalize(text)
-    tokens = okt.phrases(tokens)
-    return ' '.join(tokens)
-
-def recommend_recipes(user_ingredients, recipes_df):
-    # Preprocess user ingredients
-    user_ingredients = preprocess_ingredients(user_ingredients)
-    
-    # Preprocess recipe ingredients
-    recipes_df['processed_ingredients'] = recipes_df['CKG_MTRL_CN'].apply(preprocess_ingredients)
-    
-    # Create TF-IDF vectorizer
+    return get_query_tokenizer(tokenizer).tokenize(text)
+
+def load_recipes_df(csv_path='RECIPE_DATA.csv'):
+    # Load data from CSV and remove any NA values
+    df01 = pd.read_csv(csv_path)
+    data = df01.to_dict(orient='list')
+    return pd.DataFrame(data).dropna()
+
+def build_index(recipes_df, path=INDEX_PATH, token_store_path=TOKEN_STORE_PATH, tokenizer=TOKENIZER,
+                jobs=TOKENIZER_JOBS):
+    """
+    Fit the TF-IDF vectorizer and recipe matrix once and save them to disk.
+
+    The matrix rows are L2-normalised by TfidfVectorizer, so scoring a query
+    later is a single sparse dot product against the stored matrix.
+    """
+    # Preprocess recipe ingredients; only new or changed texts go through the tokenizer.
+    # With several jobs each worker process starts its own tokenizer (and JVM) once,
+    # and finished chunks are stored right away so an interrupted build resumes.
+    store = TokenCorpusStore(token_store_path)
+    if jobs > 1:
+        processed_ingredients = store.tokenize_corpus_parallel(
+            recipes_df['CKG_MTRL_CN'], tokenizer, processes=jobs, progress=progress_printer('tokenize')
+        )
+        print('token store:', store.stats())
+    else:
+        backend = get_query_tokenizer(tokenizer).tokenizer
+        processed_ingredients = store.tokenize_corpus(recipes_df['CKG_MTRL_CN'], backend)
+        print('token store:', store.stats(), f'{backend.name} time: {backend.seconds:.3f}s')
+    store.close()
+
     tfidf = TfidfVectorizer()
-    
-    # Combine user ingredients with recipe ingredients for fitting
-    all_ingredients = [user_ingredients] + recipes_df['processed_ingredients'].tolist()
-    tfidf_matrix = tfidf.fit_transform(all_ingredients)
-    
-    # Calculate similarity between user ingredients and all recipes
-    user_vector = tfidf_matrix[0:1]
-    recipe_vectors = tfidf_matrix[1:]
-    similarities = cosine_similarity(user_vector, recipe_vectors)[0]
-    
+    tfidf_matrix = tfidf.fit_transform(processed_ingredients)
+
+    index = {
+        'vectorizer': tfidf,
+        'matrix': tfidf_matrix,
+        'tokenizer': tokenizer,
+        'recipes': recipes_df[RESULT_COLUMNS].reset_index(drop=True),
+    }
+    joblib.dump(index, path)
+    return index
+
+def load_index(path=INDEX_PATH):
+    return joblib.load(path)
+
+def recommend_recipes(user_ingredients, index, top_n=10):
+    # Only the user's ingredient string is preprocessed and vectorized per query,
+    # with the same tokenizer the index was built with
+    user_ingredients = preprocess_ingredients(user_ingredients, index.get('tokenizer', 'okt'))
+    user_vector = index['vectorizer'].transform([user_ingredients])
+
+    # Cosine similarity against every recipe (rows are already normalised)
+    similarities = linear_kernel(user_vector, index['matrix'])[0]
+
     # Get indices of top similar recipes
-    top_indices = similarities.argsort()[::-1][:10]  # Get top 10 recipes
-    
+    top_indices = similarities.argsort()[::-1][:top_n]
+
     # Create result list with recipe information
+    recipes = index['recipes']
     recommended_recipes = []
     for idx in top_indices:
         recommended_recipes.append({
-            'recipe_name': recipes_df.iloc[idx]['CKG_NM'],
-            'ingredients': recipes_df.iloc[idx]['CKG_MTRL_CN'],
-            'sdescription': recipes_df.iloc[idx]['CKG_IPDC']
+            'recipe_name': recipes.iloc[idx]['CKG_NM'],
+            'ingredients': recipes.iloc[idx]['CKG_MTRL_CN'],
+            'sdescription': recipes.iloc[idx]['CKG_IPDC'],
+            'score': float(similarities[idx])
         })
-    
+
     return recommended_recipes
 
-# Example usage
-user_ingredients_list = ['대파', '마늘', '계란', '고추장']
-user_ingredients = ' '.join(user_ingredients_list)
-recommended_recipes = recommend_recipes(user_ingredients, recipes_df)
-recommended_recipes_dataframe = pd.DataFrame(recommended_recipes[['recipe_name', 'ingredients', 'sdescription']])
+if __name__ == '__main__':
+    # Build the index on first run, afterwards just load it
+    if os.path.exists(INDEX_PATH):
+        index = load_index()
+    else:
+        index = build_index(load_recipes_df())
+
+    # Example usage
+    user_ingredients_list = ['대파', '마늘', '계란', '고추장']
+    user_ingredients = ' '.join(user_ingredients_list)
+    recommended_recipes = recommend_recipes(user_ingredients, index)
+    recommended_recipes_dataframe = pd.DataFrame(recommended_recipes)
 
-print(f"검색단어:{user_ingredients}")
-recommended_recipes_dataframe.head(10)
\ No newline at end of file
+    print(f"검색단어:{user_ingredients}")
+    print(recommended_recipes_dataframe.head(10))
+    print('query cache:', get_query_tokenizer(index.get('tokenizer', 'okt')).stats())
@@ -0,0 +1,114 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+
+# Reuse the tokenizers from the Django project
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Recommand'))
+from recommandationManager.tokenizers import get_tokenizer, tokenize_parallel
+
+# User-style queries scored in addition to every recipe's own ingredient list
+SAMPLE_QUERIES = [
+    '대파 마늘 계란 고추장',
+    '돼지고기 김치 두부',
+    '감자 당근 양파',
+    '밥 계란 간장 참기름',
+    '소고기 무 국간장',
+]
+
+def load_ingredient_texts(csv_path='RECIPE_DATA.csv'):
+    # Load data from CSV and remove any NA values
+    recipes_df = pd.read_csv(csv_path).dropna()
+    return recipes_df['CKG_MTRL_CN'].tolist()
+
+def measure_throughput(tokenizer, texts, repeat):
+    # The first call includes backend start-up (e.g. booting the JVM for Okt)
+    start = time.perf_counter()
+    tokenizer.tokenize(texts[0])
+    startup_seconds = time.perf_counter() - start
+
+    corpus = texts * repeat
+    start = time.perf_counter()
+    tokenizer.tokenize_many(corpus)
+    elapsed = time.perf_counter() - start
+    return {
+        'startup_seconds': round(startup_seconds, 4),
+        'texts': len(corpus),
+        'seconds': round(elapsed, 4),
+        'texts_per_second': round(len(corpus) / elapsed, 1) if elapsed else None,
+    }
+
+def measure_scaling(name, texts, repeat, job_counts, chunk_size):
+    # Process-pool throughput per worker count; pool start-up (one tokenizer/JVM
+    # per worker) is reported separately from the tokenizing itself
+    corpus = texts * repeat
+    results = {}
+    for jobs in job_counts:
+        start = time.perf_counter()
+        chunks = tokenize_parallel(corpus, name, processes=jobs, chunk_size=chunk_size)
+        first = next(chunks)
+        first_chunk_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        count = len(first) + sum(len(chunk) for chunk in chunks)
+        elapsed = time.perf_counter() - start
+        results[jobs] = {
+            'startup_seconds': round(first_chunk_seconds, 4),
+            'texts_per_second': round((count - len(first)) / elapsed, 1) if elapsed else None,
+        }
+    base = results[job_counts[0]]['texts_per_second']
+    for jobs, row in results.items():
+        row['speedup'] = round(row['texts_per_second'] / base, 2) if base and row['texts_per_second'] else None
+    return results
+
+def top_k_recommendations(tokenizer, texts, queries, k):
+    # Same pipeline as recipe_recommendation.py: fit on recipes, transform queries
+    tfidf = TfidfVectorizer()
+    matrix = tfidf.fit_transform(tokenizer.tokenize_many(texts))
+    query_vectors = tfidf.transform(tokenizer.tokenize_many(queries))
+    scores = linear_kernel(query_vectors, matrix)
+    return [set(np.argsort(-row, kind='stable')[:k]) for row in scores]
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare Okt and SentencePiece tokenizers on RECIPE_DATA.csv')
+    parser.add_argument('--csv', default='RECIPE_DATA.csv')
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='How many times the recipe texts are repeated for the throughput run')
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--jobs', default=None,
+                        help='Comma separated worker counts for the process-pool scaling run, e.g. 1,2,4')
+    parser.add_argument('--chunk-size', type=int, default=256)
+    args = parser.parse_args()
+
+    texts = load_ingredient_texts(args.csv)
+    queries = SAMPLE_QUERIES + texts
+
+    recommendations = {}
+    for name in ['okt', 'sentencepiece']:
+        try:
+            tokenizer = get_tokenizer(name)
+            throughput = measure_throughput(tokenizer, texts, args.repeat)
+        except Exception as error:  # e.g. no JVM available for Okt
+            print(f'{name}: skipped ({error})')
+            continue
+        print(f'{name}: {throughput}')
+        if args.jobs:
+            job_counts = [int(value) for value in args.jobs.split(',')]
+            for jobs, row in measure_scaling(name, texts, args.repeat, job_counts, args.chunk_size).items():
+                print(f'{name} x{jobs} processes: {row}')
+        recommendations[name] = top_k_recommendations(tokenizer, texts, queries, args.top_k)
+
+    if len(recommendations) == 2:
+        overlaps = [
+            len(okt_top & sp_top) / args.top_k
+            for okt_top, sp_top in zip(recommendations['okt'], recommendations['sentencepiece'])
+        ]
+        print(f'top-{args.top_k} recommendation overlap over {len(queries)} queries: '
+              f'mean {np.mean(overlaps):.3f}, min {np.min(overlaps):.3f}')
+
+if __name__ == '__main__':
+    main()